@@ -0,0 +1,120 @@
+"""
+API Benchmark - APIService latency and throughput against a stub backend
+
+Starts the local stub backend (stub_server.py) with a configurable
+response latency and measures blocking and streamed chat requests,
+history pages, conditional GETs and concurrent throughput with the
+response cache off, then the cost of reads served from the cache.
+Network latencies come from the client's own LatencyTracer, so they
+include connection setup and time to first byte as the app sees them.
+
+Usage:
+    python benchmarks/bench_api.py [--latency 0.02] [--requests 50]
+
+Runs headless; no Kivy window is needed.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.api_service import APIService
+from stub_server import StubBackend
+
+
+def tracer_results(api, results, prefix, endpoint):
+    """Copy one endpoint's percentiles out of the tracer and reset it"""
+    stats = api.tracer.summary().get(endpoint, {})
+    for key in ('p50_ms', 'p95_ms', 'ttfb_p50_ms'):
+        if stats.get(key) is not None:
+            results[f'{prefix}.{key}'] = stats[key]
+    results[f'{prefix}.errors'] = stats.get('errors', 0)
+    api.tracer.reset()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--latency', type=float, default=0.02, help='stub latency (seconds)')
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--json', action='store_true', help='print results as one JSON line')
+    args = parser.parse_args()
+    
+    results = {}
+    tracemalloc.start()
+    
+    with StubBackend(latency=args.latency, jitter=args.jitter) as backend:
+        api = APIService(backend.url)
+        api.cache.enabled = False
+        
+        for i in range(args.requests):
+            api.send_message(f'Benchmark message {i}', session_id='bench')
+        tracer_results(api, results, 'chat', 'POST /chat')
+        
+        chunks = []
+        for i in range(args.requests // 5 or 1):
+            api.send_message_stream(
+                f'Benchmark stream {i}',
+                session_id='bench',
+                on_chunk=chunks.append
+            )
+        tracer_results(api, results, 'stream', 'POST /chat')
+        
+        history = {}
+        for _ in range(args.requests):
+            history = api.get_history('session-1', limit=50)
+        tracer_results(api, results, 'history', 'GET /chat/history/{id}')
+        
+        for _ in range(args.requests):
+            api.get_history('session-1', limit=50, etag=history.get('etag'))
+        tracer_results(api, results, 'history_304', 'GET /chat/history/{id}')
+        
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            list(pool.map(
+                lambda i: api.send_message(f'Concurrent {i}', session_id='bench'),
+                range(args.requests * 2)
+            ))
+        results['concurrent.requests_per_s'] = args.requests * 2 / (time.perf_counter() - start)
+        tracer_results(api, results, 'concurrent', 'POST /chat')
+        
+        # Repeated navigation: the same page and session list again
+        api.cache.enabled = True
+        api.get_history('session-1', limit=50)
+        api.get_all_sessions()
+        timings = []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            api.get_history('session-1', limit=50)
+            api.get_all_sessions()
+            timings.append((time.perf_counter() - start) * 1000)
+        results['cached_reads.p50_ms'] = statistics.median(timings)
+        # Everything after the two priming reads should have been cached
+        traced = sum(stats['count'] for stats in api.tracer.summary().values())
+        results['cached_reads.network_requests'] = traced - 2
+        
+        api.reset_session()
+    
+    results['heap_peak_mb'] = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    
+    print(f"stub latency: {args.latency * 1000:.0f} ms, {args.requests} requests per test")
+    for metric, value in results.items():
+        print(f"{metric:34} {value:10.1f}")
+    
+    if args.json:
+        print('RESULT', json.dumps(results))
+
+
+if __name__ == '__main__':
+    main()
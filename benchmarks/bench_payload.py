@@ -0,0 +1,199 @@
+"""
+Payload Benchmark - Bytes on the wire and decode time for large sessions
+
+Measures a session history of --messages messages in each body format
+the client can negotiate: JSON, gzip/deflate-compressed JSON and, if the
+msgpack package is installed, MessagePack with and without gzip. For
+each: encoded size and the client's decode time (decompression plus
+parsing, median of --repeat runs).
+
+Then fetches the same history through APIService from the stub backend
+(stub_server.py) uncompressed, as gzipped JSON and, if available, as
+gzipped MessagePack, reading bytes received from the client's
+LatencyTracer, and sends a large message with and without request
+compression, reading bytes sent from the tracer.
+
+Message texts are drawn from a word list rather than repeated, so
+compression ratios are close to those of real transcripts.
+
+Usage:
+    python benchmarks/bench_payload.py [--messages 2000] [--repeat 20]
+
+Runs headless; no Kivy window is needed.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import zlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services import payload_codec
+from services.api_service import APIService
+from stub_server import StubBackend
+
+
+WORDS = (
+    'the a to of and in is it you that for on with as this be are can or '
+    'your not have will from by at an if more when which one about there '
+    'some time would how what use data into only also then them these so '
+    'other than first like just any could make over should very well way '
+    'system value number file function python request server message model '
+    'weather tomorrow meeting schedule reminder music playlist volume light '
+    'temperature calendar email search answer question result example list '
+    'because between through during before after above below under again'
+).split()
+
+
+def synthetic_history(count, seed=0):
+    """History page of count messages with varied text"""
+    rng = random.Random(seed)
+    messages = []
+    for i in range(count):
+        words = rng.randint(6, 20) if i % 2 == 0 else rng.randint(40, 160)
+        text = ' '.join(rng.choice(WORDS) for _ in range(words))
+        messages.append({
+            'id': str(i),
+            'role': 'user' if i % 2 == 0 else 'assistant',
+            'content': text.capitalize() + ('?' if i % 2 == 0 else '.'),
+            'timestamp': f'2024-01-{1 + i // 500 % 28:02d}T{i // 60 % 24:02d}:{i % 60:02d}:00'
+        })
+    return {'messages': messages, 'has_more': False, 'before': '0'}
+
+
+class PayloadStub(StubBackend):
+    """Stub backend whose sessions hold the synthetic history"""
+    
+    def __init__(self, history, **kwargs):
+        super().__init__(**kwargs)
+        self.history = history
+    
+    def messages(self, session_id):
+        return self.history['messages']
+
+
+def formats():
+    """Format name -> (encode(payload) -> bytes, decode(bytes) -> payload)"""
+    def json_bytes(payload):
+        return json.dumps(payload).encode('utf-8')
+    
+    def json_decode(body):
+        return payload_codec.decode(body, payload_codec.JSON)
+    
+    result = {
+        'json': (json_bytes, json_decode),
+        'json_gzip': (
+            lambda payload: gzip.compress(json_bytes(payload), 6),
+            lambda body: json_decode(gzip.decompress(body))
+        ),
+        'json_deflate': (
+            lambda payload: zlib.compress(json_bytes(payload), 6),
+            lambda body: json_decode(zlib.decompress(body))
+        ),
+    }
+    
+    msgpack = payload_codec.msgpack_module()
+    if msgpack is not None:
+        def msgpack_decode(body):
+            return payload_codec.decode(body, payload_codec.MSGPACK)
+        
+        result['msgpack'] = (lambda payload: msgpack.packb(payload), msgpack_decode)
+        result['msgpack_gzip'] = (
+            lambda payload: gzip.compress(msgpack.packb(payload), 6),
+            lambda body: msgpack_decode(gzip.decompress(body))
+        )
+    return result
+
+
+def measure_formats(history, repeat, results):
+    """Encoded size and decode time of the history in each format"""
+    for name, (encode, decode) in formats().items():
+        body = encode(history)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            decode(body)
+            timings.append((time.perf_counter() - start) * 1000)
+        results[f'{name}.kb'] = len(body) / 1024
+        results[f'{name}.decode_ms'] = statistics.median(timings)
+
+
+def fetch_history(api, repeat):
+    """Average bytes received and median total time for the full history"""
+    for _ in range(repeat):
+        history = api.get_history('session-1')
+        if history.get('error'):
+            raise RuntimeError(history['error'])
+    stats = api.tracer.summary()['GET /chat/history/{id}']
+    api.tracer.reset()
+    return stats['avg_bytes_received'], stats['p50_ms']
+
+
+def measure_wire(history, repeat, results):
+    """Bytes on the wire for history reads and a large message"""
+    with PayloadStub(history, messages_per_session=len(history['messages'])) as backend:
+        cases = {
+            'wire_identity': dict(binary=False, accept_encoding='identity'),
+            'wire_json_gzip': dict(binary=False, accept_encoding=None),
+        }
+        if payload_codec.msgpack_module() is not None:
+            cases['wire_msgpack_gzip'] = dict(binary=True, accept_encoding=None)
+        
+        for name, case in cases.items():
+            api = APIService(backend.url)
+            api.cache.enabled = False
+            api.binary_payloads = case['binary']
+            if case['accept_encoding']:
+                api._get_session().headers['Accept-Encoding'] = case['accept_encoding']
+            
+            received, total = fetch_history(api, repeat)
+            results[f'{name}.kb'] = received / 1024
+            results[f'{name}.total_ms'] = total
+            api.reset_session()
+        
+        # A long pasted text, sent before and after compression is negotiated
+        text = ' '.join(message['content'] for message in history['messages'][:40])
+        for name, compress in (('send_identity', False), ('send_compressed', True)):
+            api = APIService(backend.url)
+            api.compress_requests = compress
+            # Any response tells the client which request codings are accepted
+            api.health_check()
+            reply = api.send_message(text, session_id='bench')
+            if reply.get('error'):
+                raise RuntimeError(reply['response'])
+            results[f'{name}.kb'] = api.tracer.summary()['POST /chat']['avg_bytes_sent'] / 1024
+            api.reset_session()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--messages', type=int, default=2000, help='messages in the session')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help='print results as one JSON line')
+    args = parser.parse_args()
+    
+    history = synthetic_history(args.messages)
+    results = {}
+    measure_formats(history, args.repeat, results)
+    measure_wire(history, max(args.repeat // 4, 3), results)
+    
+    if payload_codec.msgpack_module() is None:
+        print("msgpack is not installed; MessagePack formats skipped")
+    print(f"{args.messages} messages")
+    for metric, value in results.items():
+        print(f"{metric:34} {value:10.1f}")
+    
+    if args.json:
+        print('RESULT', json.dumps(results))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Search Benchmark - Index build and query latency for SearchIndex
+
+Builds the full-text index over a synthetic history and times a set of
+typical queries (whole words, prefixes, multi-word, no match).
+
+Usage:
+    python benchmarks/bench_search.py [--messages 100000]
+
+Runs headless; no Kivy window is needed.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.search_index import SearchIndex
+
+
+WORDS = (
+    'weather forecast python kivy android battery schedule meeting email '
+    'reminder music playlist recipe dinner travel flight hotel budget invoice '
+    'project deadline report summary translate spanish french german news '
+    'sports football score movie review restaurant booking calendar alarm '
+    'timer workout running distance calories sleep coffee morning evening'
+).split()
+
+QUERIES = ('weather', 'wea', 'flight hotel', 'proj dead', 'calories', 'xyzzy', 'the')
+
+
+class MemoryStorage:
+    """Holds a synthetic history with the StorageService read API"""
+    
+    def __init__(self, messages, per_session=20):
+        rng = random.Random(42)
+        self.sessions = []
+        self.messages = {}
+        
+        for i in range(messages):
+            session_id = f'session-{i // per_session}'
+            if session_id not in self.messages:
+                self.sessions.append({'session_id': session_id})
+                self.messages[session_id] = []
+            
+            words = rng.choices(WORDS, k=rng.randint(5, 40))
+            self.messages[session_id].append({
+                'role': 'user' if i % 2 == 0 else 'assistant',
+                'content': 'the ' + ' '.join(words),
+                'timestamp': f'2024-01-01T12:00:{i:06d}'
+            })
+    
+    def load_sessions(self):
+        return self.sessions
+    
+    def load_messages(self, session_id):
+        return self.messages.get(session_id, [])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--messages', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help='print results as one JSON line')
+    args = parser.parse_args()
+    
+    storage = MemoryStorage(args.messages)
+    index = SearchIndex(storage)
+    
+    start = time.perf_counter()
+    index.ensure_built()
+    metrics = {'build_ms': (time.perf_counter() - start) * 1000}
+    print(f"messages:   {args.messages}")
+    print(f"build:      {metrics['build_ms']:.0f} ms")
+    
+    for query in QUERIES:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            results = index.search(query)
+            timings.append((time.perf_counter() - start) * 1000)
+        
+        timings.sort()
+        print(
+            f"{query!r:14} {len(results):3} results  "
+            f"p50 {statistics.median(timings):6.1f} ms  "
+            f"max {timings[-1]:6.1f} ms"
+        )
+        metrics[f'query.{query.replace(" ", "_")}.p50_ms'] = statistics.median(timings)
+    
+    if args.json:
+        print('RESULT', json.dumps(metrics))
+
+
+if __name__ == '__main__':
+    main()
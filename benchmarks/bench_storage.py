@@ -0,0 +1,148 @@
+"""
+Storage Benchmark - Write throughput and read latency of StorageService
+
+Fills a scratch directory with a realistic history (a couple hundred
+sessions of 100 messages) through both storage backends, the JSON files
+and SQLite, and reports throughput, load latency and Python heap peak.
+
+Usage:
+    python benchmarks/bench_storage.py [--sessions 200] [--messages 100]
+
+Runs headless; no Kivy window is needed.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+
+from services.storage_service import StorageService
+from services.sqlite_storage_service import SQLiteStorageService
+
+
+BACKENDS = {
+    'json': StorageService,
+    'sqlite': SQLiteStorageService,
+}
+
+REPLY = 'A synthetic assistant reply with enough words to look like one. ' * 3
+
+
+def synthetic_session(index, count):
+    """One session record and its messages"""
+    session_id = f'session-{index}'
+    messages = [
+        {
+            'role': 'user' if i % 2 == 0 else 'assistant',
+            'content': f'Question {i}?' if i % 2 == 0 else REPLY,
+            'timestamp': f'2024-01-01T12:{i // 60 % 60:02d}:{i % 60:02d}'
+        }
+        for i in range(count)
+    ]
+    session = {
+        'session_id': session_id,
+        'preview': f'Synthetic conversation {index}',
+        'timestamp': '2024-01-01T12:00:00'
+    }
+    return session, messages
+
+
+def timed(operation, repeat=1):
+    """Median duration of operation over repeat runs, in ms"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operation()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def p95(values):
+    ordered = sorted(values)
+    return ordered[max(int(len(ordered) * 0.95) - 1, 0)]
+
+
+def run_backend(storage_class, sessions, messages, appends):
+    """Time one backend in its own scratch directory"""
+    results = {}
+    
+    with tempfile.TemporaryDirectory(prefix='jarvis-bench-') as directory:
+        os.environ['JARVIS_STORAGE_DIR'] = directory
+        tracemalloc.start()
+        storage = storage_class()
+        
+        history = [synthetic_session(i, messages) for i in range(sessions)]
+        
+        results['save_sessions_ms'] = timed(
+            lambda: storage.save_sessions([session for session, _ in history]),
+            repeat=5
+        )
+        
+        start = time.perf_counter()
+        for session, records in history:
+            storage.save_messages(session['session_id'], records)
+        elapsed = time.perf_counter() - start
+        results['save_messages_per_s'] = sessions * messages / elapsed
+        
+        # Appending to a session that already holds `messages` messages
+        target = history[0][0]['session_id']
+        start = time.perf_counter()
+        for i in range(appends):
+            storage.append_message(target, {'role': 'user', 'content': f'Appended {i}'})
+        results['append_per_s'] = appends / (time.perf_counter() - start)
+        
+        # Deferred writes coalesce by key; flush writes what is left
+        for i in range(appends):
+            stats = {'total_messages': i}
+            storage.defer(lambda stats=stats: storage.save_stats(stats), key='stats')
+        results['flush_ms'] = timed(storage.flush)
+        
+        results['load_sessions_ms'] = timed(storage.load_sessions, repeat=5)
+        
+        loads = [
+            timed(lambda session_id=session['session_id']: storage.load_messages(session_id))
+            for session, _ in history
+        ]
+        results['load_messages_p50_ms'] = statistics.median(loads)
+        results['load_messages_p95_ms'] = p95(loads)
+        
+        results['heap_peak_mb'] = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sessions', type=int, default=200)
+    parser.add_argument('--messages', type=int, default=100, help='messages per session')
+    parser.add_argument('--appends', type=int, default=200)
+    parser.add_argument('--backend', choices=sorted(BACKENDS), action='append')
+    parser.add_argument('--json', action='store_true', help='print results as one JSON line')
+    args = parser.parse_args()
+    
+    results = {}
+    for name in args.backend or BACKENDS:
+        for metric, value in run_backend(
+            BACKENDS[name], args.sessions, args.messages, args.appends
+        ).items():
+            results[f'{name}.{metric}'] = value
+    
+    print(f"sessions:   {args.sessions} x {args.messages} messages")
+    for metric, value in results.items():
+        print(f"{metric:34} {value:10.1f}")
+    
+    if args.json:
+        print('RESULT', json.dumps(results))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,298 @@
+"""
+Transcript Benchmark - Memory and frame time for a long chat session
+
+Loads a synthetic session into ChatScreen, waits for the frame-budgeted
+bulk load to finish (timing its frames), scrolls the transcript from
+bottom to top and reports Python heap growth, process RSS and per-frame
+times. Then fills HistoryScreen with synthetic sessions and scrolls that
+list too.
+
+Usage:
+    python benchmarks/bench_transcript.py [--messages 5000] [--sessions 1000] [--legacy]
+
+--legacy builds one MessageBubble-style BoxLayout per message inside a
+plain ScrollView (the pre-RecycleView layout) for comparison.
+Needs a display; on a headless Linux box run it under xvfb-run or with
+SDL_VIDEODRIVER=offscreen. App data goes to a scratch directory.
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+
+from kivy.clock import Clock
+from kivy.lang import Builder
+from kivy.properties import StringProperty
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.screenmanager import NoTransition
+
+from main import JarvisApp
+
+
+class LegacyBubble(BoxLayout):
+    """One widget per message, as before the RecycleView transcript"""
+    
+    # Declared in Python so it can be passed to the constructor
+    text = StringProperty('')
+
+
+LEGACY_KV = '''
+<LegacyBubble>:
+    orientation: 'vertical'
+    size_hint: 0.85, None
+    height: self.minimum_height
+    padding: '12dp'
+    spacing: '4dp'
+    canvas.before:
+        Color:
+            rgba: 0.1, 0.1, 0.18, 1
+        RoundedRectangle:
+            pos: self.pos
+            size: self.size
+            radius: [16]
+    Label:
+        text: root.text
+        size_hint_y: None
+        height: self.texture_size[1] + 20
+        text_size: self.width - 24, None
+    Label:
+        text: '12:00 PM'
+        size_hint_y: None
+        height: '20dp'
+'''
+
+
+def synthetic_messages(count):
+    """Alternate short user prompts and longer replies"""
+    reply = ('This is a synthetic reply used to exercise text layout. ' * 4).strip()
+    return [
+        {
+            'text': f'Question number {i}?' if i % 2 == 0 else f'{reply} ({i})',
+            'is_user': i % 2 == 0,
+            'timestamp': '2024-01-01T12:00:00'
+        }
+        for i in range(count)
+    ]
+
+
+def synthetic_sessions(count):
+    """Sessions spread over the last few weeks, so every section shows"""
+    now = datetime.now()
+    return [
+        {
+            'session_id': f'session-{i}',
+            'preview': f'Synthetic conversation number {i} about something',
+            'timestamp': (now - timedelta(hours=6 * i)).isoformat()
+        }
+        for i in range(count)
+    ]
+
+
+def frame_stats(frame_times):
+    """p50/p95/max of frame times"""
+    frames = sorted(frame_times) or [0]
+    return {
+        'frames': len(frames),
+        'p50': statistics.median(frames),
+        'p95': frames[int(len(frames) * 0.95) - 1],
+        'max': frames[-1]
+    }
+
+
+def rss_mb():
+    """Peak resident set size of this process in MB"""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage / 1024.0 if sys.platform != 'darwin' else usage / (1024.0 * 1024.0)
+
+
+class TranscriptBenchApp(JarvisApp):
+    """JarvisApp that loads a synthetic session and scrolls through it"""
+    
+    kv_file = os.path.join(ROOT, 'jarvis.kv')
+    
+    def __init__(self, count, sessions, legacy, print_json=False, **kwargs):
+        super().__init__(**kwargs)
+        self.count = count
+        self.sessions = sessions
+        self.legacy = legacy
+        self.print_json = print_json
+        self.frame_times = []
+        self.results = {}
+    
+    def on_start(self):
+        Clock.schedule_once(self._load, 0.5)
+    
+    def _load(self, dt):
+        chat = self.get_chat_screen()
+        records = synthetic_messages(self.count)
+        
+        tracemalloc.start()
+        start = time.perf_counter()
+        
+        if self.legacy:
+            self._load_legacy(chat, records)
+        else:
+            chat._set_messages(records)
+        
+        self.results['chat.load_ms'] = (time.perf_counter() - start) * 1000
+        
+        if self.legacy:
+            # Widgets are all built up front; let the first layout settle
+            Clock.schedule_once(self._start_scroll, 0.5)
+            return
+        
+        # Time the frames of the bulk load, the one that started it
+        # included, then let the layout settle
+        self.frame_times = []
+        self._load_start = self._last = start
+        self._hydrated = False
+        Clock.schedule_interval(self._hydrate_step, 0)
+    
+    def _hydrate_step(self, dt):
+        now = time.perf_counter()
+        self.frame_times.append((now - self._last) * 1000)
+        self._last = now
+        
+        # Also count the frame after the last batch, which draws it
+        hydrated = self.get_chat_screen()._hydration is None
+        if not (hydrated and self._hydrated):
+            self._hydrated = hydrated
+            return
+        
+        frames = frame_stats(self.frame_times)
+        self.results['chat.hydrate_ms'] = (now - self._load_start) * 1000
+        self.results['chat.hydrate_frame_max_ms'] = frames['max']
+        Clock.schedule_once(self._start_scroll, 0.5)
+        return False
+    
+    def _load_legacy(self, chat, records):
+        """Replace the RecycleView with one widget per message"""
+        from kivy.uix.scrollview import ScrollView
+        
+        Builder.load_string(LEGACY_KV)
+        rv = chat.ids.scroll_view
+        parent = rv.parent
+        
+        scroll = ScrollView(do_scroll_x=False)
+        container = BoxLayout(orientation='vertical', size_hint_y=None, spacing=8)
+        container.bind(minimum_height=container.setter('height'))
+        for record in records:
+            container.add_widget(LegacyBubble(text=record['text']))
+        scroll.add_widget(container)
+        
+        index = parent.children.index(rv)
+        parent.remove_widget(rv)
+        parent.add_widget(scroll, index=index)
+        chat.ids['scroll_view'] = scroll
+    
+    def _start_scroll(self, dt, scroll_view=None, on_done=None):
+        self.scroll_view = scroll_view or self.get_chat_screen().ids.scroll_view
+        self.scroll_view.scroll_y = 0
+        self.frame_times = []
+        self._on_scrolled = on_done or self._finish_chat
+        self._last = time.perf_counter()
+        Clock.schedule_interval(self._scroll_step, 0)
+    
+    def _scroll_step(self, dt):
+        now = time.perf_counter()
+        self.frame_times.append((now - self._last) * 1000)
+        self._last = now
+        
+        if self.scroll_view.scroll_y >= 1:
+            self._on_scrolled()
+            return False
+        
+        self.scroll_view.scroll_y = min(1, self.scroll_view.scroll_y + 0.005)
+    
+    def _finish_chat(self):
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        
+        frames = frame_stats(self.frame_times)
+        self.results.update({
+            'chat.heap_mb': current / 1e6,
+            'chat.heap_peak_mb': peak / 1e6,
+            'chat.frame_p50_ms': frames['p50'],
+            'chat.frame_p95_ms': frames['p95']
+        })
+        
+        print(f"mode:             {'legacy widgets' if self.legacy else 'RecycleView'}")
+        print(f"messages:         {self.count}")
+        print(f"load:             {self.results['chat.load_ms']:.1f} ms")
+        if not self.legacy:
+            print(f"bulk load:        {self.results['chat.hydrate_ms']:.1f} ms "
+                  f"(longest frame {self.results['chat.hydrate_frame_max_ms']:.1f} ms)")
+        print(f"python heap:      {current / 1e6:.1f} MB (peak {peak / 1e6:.1f} MB)")
+        print(f"frames:           {frames['frames']}")
+        print(f"frame time p50:   {frames['p50']:.1f} ms")
+        print(f"frame time p95:   {frames['p95']:.1f} ms")
+        print(f"frame time max:   {frames['max']:.1f} ms")
+        if not self.legacy:
+            from screens.message_text import text_cache
+            print(f"text cache:       {text_cache.hits} hits, {text_cache.misses} layouts")
+        
+        if self.sessions:
+            self.get_history_screen()
+            self.root.transition = NoTransition()
+            self.root.current = 'history'
+            Clock.schedule_once(self._load_history, 0.5)
+        else:
+            self._finish()
+    
+    def _load_history(self, dt):
+        history = self.get_history_screen()
+        sessions = synthetic_sessions(self.sessions)
+        
+        start = time.perf_counter()
+        history._show_sessions(sessions)
+        self.results['history.load_ms'] = (time.perf_counter() - start) * 1000
+        
+        Clock.schedule_once(
+            lambda dt: self._start_scroll(dt, history.ids.history_list, self._finish_history),
+            0.5
+        )
+    
+    def _finish_history(self):
+        frames = frame_stats(self.frame_times)
+        self.results['history.frame_p50_ms'] = frames['p50']
+        self.results['history.frame_p95_ms'] = frames['p95']
+        
+        print(f"sessions:         {self.sessions}")
+        print(f"history load:     {self.results['history.load_ms']:.1f} ms")
+        print(f"history p50/p95:  {frames['p50']:.1f} / {frames['p95']:.1f} ms")
+        self._finish()
+    
+    def _finish(self):
+        self.results['rss_max_mb'] = rss_mb()
+        print(f"process max RSS:  {self.results['rss_max_mb']:.1f} MB")
+        if self.print_json:
+            print('RESULT', json.dumps(self.results))
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--messages', type=int, default=5000)
+    parser.add_argument('--sessions', type=int, default=1000, help='history sessions (0 skips)')
+    parser.add_argument('--legacy', action='store_true')
+    parser.add_argument('--json', action='store_true', help='print results as one JSON line')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory(prefix='jarvis-bench-') as directory:
+        os.environ.setdefault('JARVIS_STORAGE_DIR', directory)
+        TranscriptBenchApp(args.messages, args.sessions, args.legacy, args.json).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Voice Startup Benchmark - Main-thread cost of creating VoiceService
+
+Compares constructing VoiceService the old way (TTS engine and
+recognizer created up front) with the lazy constructor the app now uses.
+Each run happens in a fresh interpreter so module imports are cold.
+
+Usage:
+    python benchmarks/bench_voice_startup.py [--runs 5]
+
+Needs pyttsx3 and SpeechRecognition installed to show the full cost;
+without them the eager numbers only include the failed imports.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MEASURE = '''
+import os, sys, time
+sys.path.insert(0, {root!r})
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_LOG_MODE', 'PYTHON')
+from services.voice_service import VoiceService
+
+start = time.perf_counter()
+voice = VoiceService()
+if {eager!r}:
+    voice._ensure_recognizer()
+    voice._ensure_tts()
+print('RESULT', (time.perf_counter() - start) * 1000)
+'''
+
+
+def measure(eager):
+    """Time VoiceService construction in a fresh interpreter (ms)"""
+    output = subprocess.run(
+        [sys.executable, '-c', MEASURE.format(root=ROOT, eager=eager)],
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    
+    for line in output.splitlines():
+        if line.startswith('RESULT'):
+            return float(line.split()[1])
+    raise RuntimeError(f'No result in output: {output!r}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+    
+    eager = [measure(True) for _ in range(args.runs)]
+    lazy = [measure(False) for _ in range(args.runs)]
+    
+    print(f"eager init (before): median {statistics.median(eager):8.1f} ms  max {max(eager):8.1f} ms")
+    print(f"lazy init (now):     median {statistics.median(lazy):8.1f} ms  max {max(lazy):8.1f} ms")
+    print(f"saved before first frame: {statistics.median(eager) - statistics.median(lazy):.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
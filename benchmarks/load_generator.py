@@ -0,0 +1,315 @@
+"""
+Load Generator - Many concurrent app clients against the backend
+
+Simulates N virtual users, each with its own APIService (so its own
+connection pool, like a separate device). A user repeatedly picks an
+action from a weighted mix, waits a random think time and goes again:
+    
+    send      send_message / send_message_stream with an idempotency key,
+              so '/chat' or '/chat/realtime' is chosen exactly as the app
+              does; continues one of the user's sessions most of the time
+    history   get_history of one of the user's sessions (50 messages)
+    sessions  get_all_sessions
+    delete    delete_session of one of the user's sessions
+
+Throughput, latency percentiles, error rate and 429 rate are reported per
+endpoint from the clients' LatencyTracer timings (a request's latency
+includes its retries and backoff). Reads answered by a client's response
+cache never reach the backend, as in the app; --no-cache turns it off.
+
+Usage:
+    python benchmarks/load_generator.py --url http://backend:8000 --users 50 --duration 60
+    python benchmarks/load_generator.py --stub --users 50 --stub-rate-limit 100
+
+--stub starts the bundled stub backend (stub_server.py) on a free local
+port, so the generator can be tried offline.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.api_service import APIService
+from services.latency_tracer import LatencyTracer, percentile
+
+
+DEFAULT_MIX = 'send=60,history=20,sessions=15,delete=5'
+
+
+def parse_mix(text):
+    """'send=60,history=20' -> {'send': 60.0, 'history': 20.0}"""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in VirtualUser.ACTIONS:
+            raise argparse.ArgumentTypeError(
+                f"unknown action {name!r} (choose from {', '.join(VirtualUser.ACTIONS)})"
+            )
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class LoadTracer(LatencyTracer):
+    """
+    LatencyTracer shared by every virtual user
+    
+    Keeps a compact record of every finished request for the final
+    report, in addition to the tracer's bounded per-endpoint samples.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self.records = []
+    
+    def finish(self, trace, response=None, error=None):
+        if trace is None or trace['total_ms'] is not None:
+            return
+        
+        super().finish(trace, response, error)
+        record = (trace['endpoint'], trace['total_ms'], trace['status'], trace['error'])
+        with self._lock:
+            self.records.append(record)
+
+
+class QuietUsers:
+    """
+    stdout wrapper that drops output from virtual user threads
+    
+    APIService prints every failed request; under load that would bury
+    the progress lines, and failures are counted in the report anyway.
+    """
+    
+    def __init__(self, stream):
+        self.stream = stream
+    
+    def write(self, text):
+        if threading.current_thread().name.startswith('vu-'):
+            return len(text)
+        return self.stream.write(text)
+    
+    def flush(self):
+        self.stream.flush()
+
+
+class VirtualUser:
+    """One simulated app client"""
+    
+    # Action name (as used in --mix) -> method
+    ACTIONS = {
+        'send': 'send',
+        'history': 'load_history',
+        'sessions': 'list_sessions',
+        'delete': 'delete_session',
+    }
+    
+    # Chance that a message continues an existing session
+    CONTINUE_SESSION = 0.8
+    
+    def __init__(self, index, url, tracer, mix, think, realtime, stream, seed, cache):
+        self.api = APIService(url)
+        self.api.tracer = tracer
+        self.api.cache.enabled = cache
+        self.rng = random.Random(seed + index)
+        self.actions = list(mix)
+        self.weights = [mix[name] for name in self.actions]
+        self.think = think
+        self.realtime = realtime
+        self.stream = stream
+        self.session_ids = []
+    
+    def run(self, stop_event):
+        """Act until stop_event is set"""
+        try:
+            while not stop_event.is_set():
+                action = self.rng.choices(self.actions, self.weights)[0]
+                try:
+                    getattr(self, self.ACTIONS[action])()
+                except Exception as e:
+                    print(f"Virtual user {action} failed: {e}")
+                
+                if self.think:
+                    stop_event.wait(self.rng.expovariate(1.0 / self.think))
+        finally:
+            self.api.reset_session()
+    
+    def send(self):
+        session_id = None
+        if self.session_ids and self.rng.random() < self.CONTINUE_SESSION:
+            session_id = self.rng.choice(self.session_ids)
+        
+        request = dict(
+            message=f'Load test message {uuid.uuid4().hex[:8]}',
+            session_id=session_id,
+            mode='realtime' if self.rng.random() < self.realtime else 'general',
+            idempotency_key=uuid.uuid4().hex
+        )
+        if self.rng.random() < self.stream:
+            result = self.api.send_message_stream(**request)
+        else:
+            result = self.api.send_message(**request)
+        
+        new_session = result.get('session_id')
+        if not result.get('error') and new_session and new_session not in self.session_ids:
+            self.session_ids.append(new_session)
+    
+    def load_history(self):
+        if not self.session_ids:
+            return self.list_sessions()
+        self.api.get_history(self.rng.choice(self.session_ids), limit=50)
+    
+    def list_sessions(self):
+        self.api.get_all_sessions()
+    
+    def delete_session(self):
+        if not self.session_ids:
+            return self.send()
+        session_id = self.session_ids.pop(self.rng.randrange(len(self.session_ids)))
+        self.api.delete_session(session_id)
+
+
+def summarize(records, elapsed):
+    """Per-endpoint and overall statistics from finished requests"""
+    groups = {}
+    for record in records:
+        groups.setdefault(record[0], []).append(record)
+    groups['ALL'] = list(records)
+    
+    report = {}
+    for name, group in sorted(groups.items()):
+        if not group:
+            continue
+        latencies = [total for _, total, _, error in group if not error]
+        statuses = Counter(status for _, _, status, _ in group)
+        errors = sum(1 for *_, error in group if error)
+        report[name] = {
+            'requests': len(group),
+            'requests_per_s': len(group) / elapsed,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'error_rate': errors / len(group),
+            'rate_limited_rate': statuses.get(429, 0) / len(group)
+        }
+    return report
+
+
+def print_report(report, elapsed, users):
+    def ms(value):
+        return '-' if value is None else f'{value:.0f}'
+    
+    print(f"\n{users} users, {elapsed:.0f} s")
+    print(f"{'endpoint':28} {'req':>7} {'req/s':>7} {'p50':>6} {'p95':>6} {'p99':>6} {'err%':>6} {'429%':>6}")
+    for name, stats in report.items():
+        print(
+            f"{name:28} {stats['requests']:7d} {stats['requests_per_s']:7.1f} "
+            f"{ms(stats['p50_ms']):>6} {ms(stats['p95_ms']):>6} {ms(stats['p99_ms']):>6} "
+            f"{stats['error_rate'] * 100:6.1f} {stats['rate_limited_rate'] * 100:6.1f}"
+        )
+
+
+def run(args, url):
+    tracer = LoadTracer()
+    stop_event = threading.Event()
+    threads = []
+    
+    start = time.perf_counter()
+    for index in range(args.users):
+        user = VirtualUser(
+            index, url, tracer, args.mix, args.think, args.realtime, args.stream, args.seed,
+            not args.no_cache
+        )
+        thread = threading.Thread(target=user.run, args=(stop_event,), name=f'vu-{index}')
+        thread.daemon = True
+        thread.start()
+        threads.append(thread)
+        
+        # Spread user start-up over the ramp-up period
+        if args.ramp_up:
+            time.sleep(args.ramp_up / args.users)
+    
+    deadline = start + args.duration
+    try:
+        while time.perf_counter() < deadline:
+            time.sleep(min(args.interval, max(deadline - time.perf_counter(), 0)))
+            elapsed = time.perf_counter() - start
+            done = len(tracer.records)
+            failed = sum(1 for record in tracer.records if record[3])
+            print(f"[{elapsed:5.0f} s] {done} requests, {done / elapsed:.1f} req/s, {failed} errors")
+    except KeyboardInterrupt:
+        print("Stopping...")
+    
+    stop_event.set()
+    for thread in threads:
+        thread.join()
+    
+    elapsed = time.perf_counter() - start
+    return summarize(tracer.records, elapsed), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--url', default='http://localhost:8000', help='backend base URL')
+    parser.add_argument('--users', type=int, default=20, help='concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=30, help='seconds to run')
+    parser.add_argument('--ramp-up', type=float, default=5, help='seconds to start all users')
+    parser.add_argument('--think', type=float, default=1.0, help='mean seconds between actions')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f'action weights (default {DEFAULT_MIX})')
+    parser.add_argument('--realtime', type=float, default=0.2, help='share of realtime-mode messages')
+    parser.add_argument('--stream', type=float, default=0.5, help='share of streamed messages')
+    parser.add_argument('--no-cache', action='store_true', help="disable the clients' read cache")
+    parser.add_argument('--interval', type=float, default=5, help='seconds between progress lines')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='print the report as one JSON line')
+    parser.add_argument('--verbose', action='store_true', help="show the clients' error messages")
+    
+    stub = parser.add_argument_group('bundled stub backend')
+    stub.add_argument('--stub', action='store_true', help='run against a local stub backend')
+    stub.add_argument('--stub-latency', type=float, default=0.05)
+    stub.add_argument('--stub-jitter', type=float, default=0.05)
+    stub.add_argument('--stub-error-rate', type=float, default=0.0)
+    stub.add_argument('--stub-rate-limit', type=float, default=0.0, help='requests per second')
+    args = parser.parse_args()
+    
+    if args.stub:
+        from stub_server import StubBackend
+        
+        backend = StubBackend(
+            latency=args.stub_latency,
+            jitter=args.stub_jitter,
+            error_rate=args.stub_error_rate,
+            rate_limit=args.stub_rate_limit
+        ).start()
+        url = backend.url
+    else:
+        backend = None
+        url = args.url
+    
+    if not args.verbose:
+        sys.stdout = QuietUsers(sys.stdout)
+    
+    print(f"{args.users} virtual users against {url} for {args.duration:.0f} s")
+    try:
+        report, elapsed = run(args, url)
+    finally:
+        if backend is not None:
+            backend.stop()
+    
+    print_report(report, elapsed, args.users)
+    if args.json:
+        print('RESULT', json.dumps(report))
+
+
+if __name__ == '__main__':
+    main()
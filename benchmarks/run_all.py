@@ -0,0 +1,151 @@
+"""
+Benchmark Suite - Run every benchmark and compare with a baseline
+
+Runs each benchmark in its own interpreter with --json (several times;
+the median of each metric is kept) and compares the results with
+benchmarks/baseline.json. Metrics ending in _per_s are better when
+higher; everything else (_ms, _mb, .kb, errors) is better when lower. A
+metric regresses when it is worse than the baseline by more than the
+tolerance and by more than one unit (1 ms, 1 MB, 1 KB), so sub-millisecond
+noise does not count.
+
+Usage:
+    python benchmarks/run_all.py [--only storage api] [--tolerance 0.2]
+    python benchmarks/run_all.py --save-baseline
+
+Exits with status 1 if anything regressed. Runs headless: without a
+display the Kivy benchmark uses SDL's offscreen video driver.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(HERE, 'baseline.json')
+
+# name -> script and arguments; sizes are kept small enough for the
+# whole suite to finish in a few minutes with software rendering
+SUITE = {
+    'storage': ['bench_storage.py', '--sessions', '200', '--messages', '100'],
+    'api': ['bench_api.py', '--latency', '0.02', '--requests', '50'],
+    'search': ['bench_search.py', '--messages', '20000'],
+    'payload': ['bench_payload.py', '--messages', '2000'],
+    'render': ['bench_transcript.py', '--messages', '500', '--sessions', '1000'],
+}
+
+
+def run_benchmark(name, timeout):
+    """Run one benchmark and return its metrics"""
+    script, *args = SUITE[name]
+    env = dict(os.environ)
+    env.setdefault('KIVY_NO_ARGS', '1')
+    if sys.platform.startswith('linux') and not env.get('DISPLAY'):
+        env.setdefault('SDL_VIDEODRIVER', 'offscreen')
+    
+    output = subprocess.run(
+        [sys.executable, os.path.join(HERE, script), *args, '--json'],
+        capture_output=True,
+        text=True,
+        env=env,
+        timeout=timeout
+    )
+    
+    for line in output.stdout.splitlines():
+        if line.startswith('RESULT '):
+            return json.loads(line[len('RESULT '):])
+    raise RuntimeError(
+        f'{script} exited with {output.returncode} and no result:\n'
+        + '\n'.join(output.stderr.splitlines()[-15:])
+    )
+
+
+def run_repeated(name, repeat, timeout):
+    """Median of each metric over repeat runs"""
+    runs = [run_benchmark(name, timeout) for _ in range(repeat)]
+    return {metric: statistics.median(run[metric] for run in runs) for metric in runs[0]}
+
+
+def higher_is_better(metric):
+    return metric.endswith('_per_s')
+
+
+def compare(metric, value, base, tolerance):
+    """Relative change (positive = better) and whether it regressed"""
+    if higher_is_better(metric):
+        change = (value - base) / base if base else 0.0
+        return change, change < -tolerance
+    
+    change = (base - value) / base if base else -float(value > 0)
+    return change, change < -tolerance and value - base > 1.0
+
+
+def load_baseline():
+    try:
+        with open(BASELINE_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--only', nargs='+', choices=sorted(SUITE), help='benchmarks to run')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative slowdown')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per benchmark')
+    parser.add_argument('--timeout', type=int, default=900, help='seconds per benchmark')
+    parser.add_argument('--save-baseline', action='store_true', help='store results as the baseline')
+    args = parser.parse_args()
+    
+    baseline = load_baseline()
+    base_results = baseline['results'] if baseline else {}
+    results = {}
+    regressions = []
+    
+    for name in args.only or SUITE:
+        print(f"== {name}", flush=True)
+        try:
+            results[name] = run_repeated(name, args.repeat, args.timeout)
+        except Exception as e:
+            print(f"   failed: {e}")
+            regressions.append(f'{name} (failed)')
+            continue
+        
+        for metric, value in results[name].items():
+            base = base_results.get(name, {}).get(metric)
+            line = f"   {metric:34} {value:10.1f}"
+            if base is not None:
+                change, regressed = compare(metric, value, base, args.tolerance)
+                line += f"   baseline {base:10.1f}  {change * 100:+6.0f}%"
+                if regressed:
+                    line += '  REGRESSED'
+                    regressions.append(f'{name}.{metric}')
+            print(line)
+    
+    if args.save_baseline:
+        saved = dict(base_results)
+        saved.update(results)
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as f:
+            json.dump({
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'machine': f'{platform.system()} {platform.machine()} Python {platform.python_version()}',
+                'results': saved
+            }, f, indent=2)
+        print(f"Baseline saved to {BASELINE_PATH}")
+    elif baseline is None:
+        print("No baseline yet; run with --save-baseline to store one")
+    else:
+        print(f"Baseline from {baseline.get('created')} ({baseline.get('machine')})")
+    
+    if regressions and not args.save_baseline:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,381 @@
+"""
+Stub Backend - Local stand-in for the J.A.R.V.I.S API
+
+Implements the endpoints APIService uses (chat with JSON or SSE replies,
+paginated history with ETags, sessions, delete, health) with
+configurable latency, jitter, error rate and rate limit, so the client
+can be measured without a real backend. Like a typical production
+server it gzips larger responses, answers MessagePack to clients that
+ask for it (if msgpack is installed) and accepts gzip/deflate request
+bodies, advertising that in Accept-Encoding.
+
+Usage:
+    python benchmarks/stub_server.py [--port 8000] [--latency 0.05] [--rate-limit 100]
+
+or from a benchmark:
+    with StubBackend(latency=0.05) as backend:
+        api = APIService(backend.url)
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+
+REPLY = (
+    'Certainly. Here is a synthetic reply from the stub backend, long '
+    'enough to stream in several chunks and exercise text layout. '
+) * 3
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Request handler; settings live on the server (self.server)"""
+    
+    protocol_version = 'HTTP/1.1'
+    
+    # Headers and body are separate writes; without TCP_NODELAY the body
+    # waits for the client's delayed ACK (~40 ms on Linux)
+    disable_nagle_algorithm = True
+    
+    def log_message(self, *args):
+        pass
+    
+    def _delay(self):
+        """Sleep for the configured latency (plus jitter)"""
+        server = self.server
+        delay = server.latency + random.uniform(0, server.jitter)
+        if delay > 0:
+            time.sleep(delay)
+    
+    def _send_json(self, status, payload, headers=None):
+        """Send payload as JSON or MessagePack, gzipped if the client accepts it"""
+        msgpack = self.server.msgpack_module()
+        if msgpack is not None and 'msgpack' in self.headers.get('Accept', ''):
+            body = msgpack.packb(payload, use_bin_type=True)
+            content_type = 'application/msgpack'
+        else:
+            body = json.dumps(payload).encode('utf-8')
+            content_type = 'application/json'
+        
+        encoding = None
+        if (
+            self.server.compression
+            and len(body) >= self.server.COMPRESS_MIN_BYTES
+            and 'gzip' in self.headers.get('Accept-Encoding', '')
+        ):
+            body = gzip.compress(body, compresslevel=6)
+            encoding = 'gzip'
+        
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+            self.send_header('Vary', 'Accept, Accept-Encoding')
+        self._send_accept_encoding()
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _send_empty(self, status):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self._send_accept_encoding()
+        self.end_headers()
+    
+    def _send_accept_encoding(self):
+        """Advertise compressed request bodies (RFC 7694)"""
+        if self.server.compression:
+            self.send_header('Accept-Encoding', 'gzip, deflate')
+    
+    def _read_body(self):
+        """Request JSON, or None if its Content-Encoding is not supported"""
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        
+        encoding = self.headers.get('Content-Encoding', 'identity').lower()
+        if encoding != 'identity' and not self.server.compression:
+            return None
+        if encoding == 'gzip':
+            raw = gzip.decompress(raw)
+        elif encoding == 'deflate':
+            raw = zlib.decompress(raw)
+        elif encoding != 'identity':
+            return None
+        
+        try:
+            return json.loads(raw or b'{}')
+        except ValueError:
+            return {}
+    
+    def _fail(self):
+        """Answer 429 over the rate limit, else 503 for the error share"""
+        if not self.server.take_token():
+            self.send_response(429)
+            self.send_header('Retry-After', '1')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return True
+        
+        if self.server.error_rate and random.random() < self.server.error_rate:
+            self._send_empty(503)
+            return True
+        return False
+    
+    def do_GET(self):
+        self.server.count_request()
+        url = urlsplit(self.path)
+        self._delay()
+        
+        if url.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        elif self._fail():
+            return
+        elif url.path == '/chat/sessions':
+            self._send_json(200, {'sessions': self.server.sessions()})
+        elif url.path.startswith('/chat/history/'):
+            self._history(url.path.rsplit('/', 1)[1], parse_qs(url.query))
+        else:
+            self._send_empty(404)
+    
+    def do_POST(self):
+        self.server.count_request()
+        url = urlsplit(self.path)
+        payload = self._read_body()
+        self._delay()
+        
+        if url.path not in ('/chat', '/chat/realtime'):
+            self._send_empty(404)
+            return
+        if payload is None:
+            self._send_empty(415)
+            return
+        if self._fail():
+            return
+        
+        session_id = payload.get('session_id') or f'stub-{uuid.uuid4().hex[:12]}'
+        if payload.get('stream'):
+            self._stream_reply(session_id)
+        else:
+            self._send_json(200, {'response': REPLY, 'session_id': session_id})
+    
+    def do_DELETE(self):
+        self.server.count_request()
+        self._delay()
+        if not self._fail():
+            self._send_json(200, {'deleted': True})
+    
+    def _history(self, session_id, query):
+        """Paginated history with an ETag for conditional GETs"""
+        messages = self.server.messages(session_id)
+        etag = '"' + hashlib.md5(f'{session_id}:{len(messages)}'.encode()).hexdigest() + '"'
+        
+        if self.headers.get('If-None-Match') == etag:
+            self._send_empty(304)
+            return
+        
+        end = len(messages)
+        if 'before' in query:
+            end = int(query['before'][0])
+        limit = int(query['limit'][0]) if 'limit' in query else end
+        start = max(end - limit, 0)
+        
+        self._send_json(
+            200,
+            {
+                'messages': messages[start:end],
+                'has_more': start > 0,
+                'before': str(start)
+            },
+            {'ETag': etag}
+        )
+    
+    def _stream_reply(self, session_id):
+        """Send the reply as server-sent events over chunked encoding"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        
+        words = REPLY.split(' ')
+        events = [
+            'data: ' + json.dumps({'token': ' '.join(words[i:i + 4]) + ' '}) + '\n\n'
+            for i in range(0, len(words), 4)
+        ]
+        events.append('data: ' + json.dumps({'done': True, 'session_id': session_id}) + '\n\n')
+        
+        for event in events:
+            data = event.encode('utf-8')
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+            self.wfile.flush()
+            if self.server.chunk_delay:
+                time.sleep(self.server.chunk_delay)
+        self.wfile.write(b'0\r\n\r\n')
+
+
+class StubBackend(ThreadingHTTPServer):
+    """
+    Threaded stub server with synthetic sessions
+    
+    Args:
+        port: Port to listen on (0 picks a free one)
+        latency: Seconds added before every response
+        jitter: Up to this many extra seconds, uniformly random
+        error_rate: Share of chat/history/session requests answered 503
+        rate_limit: Requests per second allowed across all clients before
+            answering 429 (0 for no limit); bursts of one second pass
+        chunk_delay: Seconds between streamed reply chunks
+        sessions: Number of synthetic sessions
+        messages_per_session: Messages in each session's history
+        compression: Gzip responses and accept compressed request bodies
+        msgpack: Answer MessagePack when asked (needs the msgpack package)
+    """
+    
+    daemon_threads = True
+    
+    # Responses smaller than this are sent uncompressed
+    COMPRESS_MIN_BYTES = 1024
+    
+    def __init__(
+        self,
+        port=0,
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        rate_limit=0.0,
+        chunk_delay=0.0,
+        sessions=50,
+        messages_per_session=200,
+        compression=True,
+        msgpack=True
+    ):
+        super().__init__(('127.0.0.1', port), StubHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.chunk_delay = chunk_delay
+        self.session_count = sessions
+        self.messages_per_session = messages_per_session
+        self.compression = compression
+        self.msgpack = msgpack
+        self.requests = 0
+        self._count_lock = threading.Lock()
+        self._tokens = rate_limit
+        self._refilled = time.monotonic()
+        self._thread = None
+    
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_port}'
+    
+    def count_request(self):
+        with self._count_lock:
+            self.requests += 1
+    
+    def msgpack_module(self):
+        """The msgpack module if MessagePack replies are on and it is installed"""
+        if not self.msgpack:
+            return None
+        try:
+            import msgpack
+        except ImportError:
+            return None
+        return msgpack
+    
+    def take_token(self):
+        """Token bucket for rate_limit; False if the request is over it"""
+        if not self.rate_limit:
+            return True
+        
+        with self._count_lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.rate_limit,
+                self._tokens + (now - self._refilled) * self.rate_limit
+            )
+            self._refilled = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+    
+    def sessions(self):
+        return [
+            {
+                'session_id': f'session-{i}',
+                'preview': f'Synthetic conversation {i}',
+                'timestamp': f'2024-01-{1 + i % 28:02d}T12:00:00'
+            }
+            for i in range(self.session_count)
+        ]
+    
+    def messages(self, session_id):
+        return [
+            {
+                'id': str(i),
+                'role': 'user' if i % 2 == 0 else 'assistant',
+                'content': f'Question {i}?' if i % 2 == 0 else REPLY,
+                'timestamp': '2024-01-01T12:00:00'
+            }
+            for i in range(self.messages_per_session)
+        ]
+    
+    def start(self):
+        """Serve on a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, name='stub-backend')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *args):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds per response')
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='requests per second')
+    parser.add_argument('--chunk-delay', type=float, default=0.02)
+    parser.add_argument('--no-compression', action='store_true', help='send and accept identity bodies only')
+    parser.add_argument('--no-msgpack', action='store_true', help='always answer JSON')
+    args = parser.parse_args()
+    
+    server = StubBackend(
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        chunk_delay=args.chunk_delay,
+        compression=not args.no_compression,
+        msgpack=not args.no_msgpack
+    )
+    print(f"Stub backend on {server.url} (latency {args.latency * 1000:.0f} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -1,88 +1,284 @@
-"""
-J.A.R.V.I.S Mobile App - Main Entry Point
-==========================================
-A Kivy-based mobile application that connects to the J.A.R.V.I.S backend.
-"""
-
-from kivy.app import App
-from kivy.uix.screenmanager import ScreenManager
-from kivy.core.window import Window
-from kivy.utils import platform
-
-# Set window size for desktop testing
-if platform != 'android':
-    Window.size = (400, 700)
-
-from screens.chat_screen import ChatScreen
-from screens.settings_screen import SettingsScreen
-from screens.history_screen import HistoryScreen
-from services.api_service import APIService
-from services.voice_service import VoiceService
-from services.storage_service import StorageService
-
-
-class JarvisApp(App):
-    """
-    Main Application Class
-    Manages screens, services, and app lifecycle
-    """
-    
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        
-        # Initialize services
-        self.api_service = APIService()
-        self.voice_service = VoiceService()
-        self.storage_service = StorageService()
-        
-        # App state
-        self.session_id = None
-        self.current_mode = 'general'  # 'general' or 'realtime'
-        self.settings = self.storage_service.load_settings()
-        self.stats = self.storage_service.load_stats()
-    
-    def build(self):
-        """
-        Build the app UI
-        Returns: ScreenManager with all screens
-        """
-        self.title = 'J.A.R.V.I.S'
-        
-        # Create screen manager
-        sm = ScreenManager()
-        
-        # Add screens
-        sm.add_widget(ChatScreen(name='chat'))
-        sm.add_widget(SettingsScreen(name='settings'))
-        sm.add_widget(HistoryScreen(name='history'))
-        
-        # Apply saved theme
-        self.apply_theme()
-        
-        return sm
-    
-    def apply_theme(self):
-        """Apply theme settings from storage"""
-        theme = self.settings.get('theme', 'dark')
-        # Theme will be applied via KV file
-        
-    def get_chat_screen(self):
-        """Get reference to chat screen"""
-        return self.root.get_screen('chat')
-    
-    def get_settings_screen(self):
-        """Get reference to settings screen"""
-        return self.root.get_screen('settings')
-    
-    def get_history_screen(self):
-        """Get reference to history screen"""
-        return self.root.get_screen('history')
-    
-    def on_stop(self):
-        """Save data when app closes"""
-        self.storage_service.save_settings(self.settings)
-        self.storage_service.save_stats(self.stats)
-
-
-if __name__ == '__main__':
-    JarvisApp().run()
+"""
+J.A.R.V.I.S Mobile App - Main Entry Point
+==========================================
+A Kivy-based mobile application that connects to the J.A.R.V.I.S backend.
+
+Set JARVIS_PROFILE_STARTUP=1 to print how long each startup phase takes.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """
+    Times startup phases when JARVIS_PROFILE_STARTUP is set
+    
+    Phases are printed once the first frame is drawn; phases that run
+    later (e.g. screens built on first use) are printed as they finish.
+    """
+    
+    def __init__(self):
+        self.enabled = bool(os.environ.get('JARVIS_PROFILE_STARTUP'))
+        self._origin = time.perf_counter()
+        self._phases = []
+        self._reported = False
+    
+    @contextmanager
+    def phase(self, name):
+        """Time the body of a with block as one phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.enabled:
+                elapsed = (time.perf_counter() - start) * 1000
+                if self._reported:
+                    print(f"[startup] {name:<16} {elapsed:8.1f} ms")
+                else:
+                    self._phases.append((name, elapsed))
+    
+    def report(self):
+        """Print the recorded phases and the time to the first frame"""
+        if not self.enabled or self._reported:
+            return
+        self._reported = True
+        
+        for name, elapsed in self._phases:
+            print(f"[startup] {name:<16} {elapsed:8.1f} ms")
+        total = (time.perf_counter() - self._origin) * 1000
+        print(f"[startup] {'first frame':<16} {total:8.1f} ms after launch")
+
+
+profiler = StartupProfiler()
+
+with profiler.phase('kivy imports'):
+    from kivy.app import App
+    from kivy.clock import Clock
+    from kivy.lang import Builder
+    from kivy.uix.screenmanager import ScreenManager
+    from kivy.core.window import Window
+    from kivy.utils import platform
+
+# Set window size for desktop testing
+if platform != 'android':
+    Window.size = (400, 700)
+
+with profiler.phase('app imports'):
+    # Settings and History screens, and the services the first frame does
+    # not need, are imported on first use through their packages
+    import screens
+    import services
+    from screens.chat_screen import ChatScreen
+    from services.api_service import APIService
+    from services.async_api_service import AsyncAPIService
+    
+    try:
+        # Indexed sessions/messages; falls back to JSON files without sqlite3
+        from services.sqlite_storage_service import SQLiteStorageService as StorageService
+    except ImportError:
+        from services.storage_service import StorageService
+
+
+class JarvisApp(App):
+    """
+    Main Application Class
+    Manages screens, services, and app lifecycle
+    """
+    
+    # Seconds between attempts to send queued messages
+    OUTBOX_RETRY_INTERVAL = 15
+    
+    # Screens built the first time they are opened:
+    # name -> (class name in screens, KV file relative to main.py)
+    LAZY_SCREENS = {
+        'settings': ('SettingsScreen', 'kv/settings.kv'),
+        'history': ('HistoryScreen', 'kv/history.kv'),
+    }
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        
+        with profiler.phase('services'):
+            # Initialize services
+            self.api_service = APIService()
+            self.async_api = AsyncAPIService(self.api_service)
+            self.api_service.breaker.add_listener(self._on_connection_change)
+            self.storage_service = StorageService()
+            
+            # Voice, search, the outbox and the health monitor are created
+            # on first use (see the properties below)
+            self._health_monitor = None
+            self._voice_service = None
+            self._search_index = None
+            self._outbox = None
+            
+            # App state
+            self.session_id = None
+            self.current_mode = 'general'  # 'general' or 'realtime'
+            self.settings = self.storage_service.load_settings()
+            self.stats = self.storage_service.load_stats()
+    
+    @property
+    def health_monitor(self):
+        """Backend health probes, created on first use"""
+        if self._health_monitor is None:
+            self._health_monitor = services.HealthMonitor(self.api_service)
+        return self._health_monitor
+    
+    @property
+    def voice_service(self):
+        """Speech input and output, created on first use"""
+        if self._voice_service is None:
+            self._voice_service = services.VoiceService()
+        return self._voice_service
+    
+    @property
+    def search_index(self):
+        """Full-text index of stored messages, created on first use"""
+        if self._search_index is None:
+            self._search_index = services.SearchIndex(self.storage_service)
+        return self._search_index
+    
+    @property
+    def outbox(self):
+        """Messages waiting to be sent, created on first use"""
+        if self._outbox is None:
+            self._outbox = services.OutboxService(self.api_service, self.storage_service)
+            self._outbox.on_result = self._on_outbox_result
+        return self._outbox
+    
+    def load_kv(self, filename=None):
+        """Load jarvis.kv (shared rules and the chat screen)"""
+        with profiler.phase('kv parse'):
+            return super().load_kv(filename)
+    
+    def build(self):
+        """
+        Build the app UI
+        Returns: ScreenManager with the chat screen; the others are
+        added by get_screen when first opened
+        """
+        with profiler.phase('build'):
+            self.title = 'J.A.R.V.I.S'
+            
+            # Point the API client at the saved backend
+            self.api_service.set_base_url(self.settings.get('api_url', 'http://localhost:8000'))
+            
+            # Create screen manager
+            sm = ScreenManager()
+            sm.add_widget(ChatScreen(name='chat'))
+            
+            # Apply saved theme
+            self.apply_theme()
+            
+            # Send messages queued while offline once the server is reachable
+            Clock.schedule_interval(self.drain_outbox, self.OUTBOX_RETRY_INTERVAL)
+        
+        return sm
+    
+    def get_screen(self, name):
+        """
+        Get a screen by name, building it on first use
+        
+        Lazy screens have their KV rules loaded and their module imported
+        only when they are first needed.
+        """
+        sm = self.root
+        if not sm.has_screen(name):
+            class_name, kv_file = self.LAZY_SCREENS[name]
+            with profiler.phase(f'{name} screen'):
+                Builder.load_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), kv_file))
+                screen_class = getattr(screens, class_name)
+                sm.add_widget(screen_class(name=name))
+        return sm.get_screen(name)
+    
+    def show_screen(self, name):
+        """Switch to a screen, building it on first use"""
+        self.get_screen(name)
+        self.root.current = name
+    
+    def apply_theme(self):
+        """Apply theme settings from storage"""
+        theme = self.settings.get('theme', 'dark')
+        # Theme will be applied via KV file
+        
+    def on_start(self):
+        """Called once the UI is built"""
+        # Load voice engines only after the first frame is on screen
+        Window.bind(on_flip=self._after_first_frame)
+    
+    def _after_first_frame(self, *args):
+        """Warm up services that should not delay the first frame"""
+        Window.unbind(on_flip=self._after_first_frame)
+        profiler.report()
+        
+        # Probe the backend (this also imports requests and pre-opens a
+        # connection) and load voice
+        self.health_monitor.start()
+        self.drain_outbox()
+        self.voice_service.set_persistent_mic(self.settings.get('persistent_mic', False))
+        self.voice_service.set_speech_backend(self.settings.get('speech_backend', 'vosk'))
+        self.voice_service.warm_up()
+    
+    def get_chat_screen(self):
+        """Get reference to chat screen"""
+        return self.root.get_screen('chat')
+    
+    def get_settings_screen(self):
+        """Get reference to settings screen"""
+        return self.get_screen('settings')
+    
+    def get_history_screen(self):
+        """Get reference to history screen"""
+        return self.get_screen('history')
+    
+    def on_pause(self):
+        """Allow the app to be paused on Android"""
+        # Android may kill a paused app without calling on_stop
+        self.storage_service.save_stats(self.stats)
+        self.storage_service.flush()
+        if self._health_monitor is not None:
+            self._health_monitor.stop()
+        return True
+    
+    def on_resume(self):
+        """Reconnect after returning to the foreground"""
+        # The network may have changed while paused, so start a fresh pool
+        self.api_service.reset_session()
+        self.health_monitor.start()
+        self.drain_outbox()
+    
+    def drain_outbox(self, *args):
+        """Try to send queued messages in the background"""
+        if self.outbox.has_pending():
+            self.async_api.submit(self.outbox.drain)
+    
+    def _on_connection_change(self, status):
+        """Show the backend's status and send queued messages on reconnect (any thread)"""
+        def update(dt):
+            self.get_chat_screen().connection_state = status
+            if status == 'online':
+                self.drain_outbox()
+        
+        Clock.schedule_once(update, 0)
+    
+    def _on_outbox_result(self, item, result):
+        """Hand a reply to a queued message to the chat screen (any thread)"""
+        Clock.schedule_once(
+            lambda dt: self.get_chat_screen().on_outbox_result(item, result), 0
+        )
+    
+    def on_stop(self):
+        """Save data when app closes"""
+        self.storage_service.save_settings(self.settings)
+        self.storage_service.save_stats(self.stats)
+        self.storage_service.flush()
+        if self._health_monitor is not None:
+            self._health_monitor.stop()
+        self.async_api.stop()
+
+
+if __name__ == '__main__':
+    JarvisApp().run()
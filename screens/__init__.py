@@ -1,6 +1,18 @@
-# Screens package
-from .chat_screen import ChatScreen
-from .settings_screen import SettingsScreen
-from .history_screen import HistoryScreen
-
-__all__ = ['ChatScreen', 'SettingsScreen', 'HistoryScreen']
+# Screens package
+# Screens are imported on first access so startup only loads what it uses
+import importlib
+
+_MODULES = {
+    'ChatScreen': '.chat_screen',
+    'SettingsScreen': '.settings_screen',
+    'HistoryScreen': '.history_screen',
+}
+
+
+def __getattr__(name):
+    if name in _MODULES:
+        return getattr(importlib.import_module(_MODULES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ['ChatScreen', 'SettingsScreen', 'HistoryScreen']
@@ -1,215 +1,797 @@
-"""
-Chat Screen - Main chat interface
-"""
-
-from kivy.uix.screenmanager import Screen
-from kivy.uix.boxlayout import BoxLayout
-from kivy.uix.label import Label
-from kivy.uix.scrollview import ScrollView
-from kivy.clock import Clock
-from kivy.properties import StringProperty, BooleanProperty
-from kivy.utils import get_color_from_hex
-from datetime import datetime
-import threading
-
-
-class MessageBubble(BoxLayout):
-    """A single message bubble in the chat"""
-    is_user = BooleanProperty(False)
-    message_text = StringProperty('')
-    timestamp = StringProperty('')
-    
-    def __init__(self, text, is_user=False, **kwargs):
-        super().__init__(**kwargs)
-        self.is_user = is_user
-        self.message_text = text
-        self.timestamp = datetime.now().strftime('%I:%M %p')
-        
-        # Set colors based on sender
-        if is_user:
-            self.canvas.before.children[0].rgba = get_color_from_hex('#667eea')
-        else:
-            self.canvas.before.children[0].rgba = get_color_from_hex('#1a1a2e')
-
-
-class ChatScreen(Screen):
-    """
-    Main chat screen with message input and display
-    """
-    
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.messages = []
-        self.is_processing = False
-        
-    def on_enter(self):
-        """Called when screen becomes active"""
-        # Load any saved session
-        app = self.get_app()
-        if app.session_id:
-            self.load_session(app.session_id)
-    
-    def get_app(self):
-        """Get the main app instance"""
-        from kivy.app import App
-        return App.get_running_app()
-    
-    def set_mode(self, mode):
-        """Set chat mode (general or realtime)"""
-        app = self.get_app()
-        app.current_mode = mode
-        self.ids.general_mode.state = 'down' if mode == 'general' else 'normal'
-        self.ids.realtime_mode.state = 'down' if mode == 'realtime' else 'normal'
-    
-    def send_message(self):
-        """Send a message to the AI"""
-        if self.is_processing:
-            return
-            
-        input_field = self.ids.message_input
-        message = input_field.text.strip()
-        
-        if not message:
-            return
-        
-        # Clear input
-        input_field.text = ''
-        
-        # Add user message to UI
-        self.add_message(message, is_user=True)
-        
-        # Process in background
-        self.is_processing = True
-        self.ids.send_btn.disabled = True
-        self.ids.send_btn.text = '...'
-        
-        thread = threading.Thread(target=self._process_message, args=(message,))
-        thread.daemon = True
-        thread.start()
-    
-    def _process_message(self, message):
-        """Process message in background thread"""
-        try:
-            app = self.get_app()
-            
-            # Call API
-            response = app.api_service.send_message(
-                message=message,
-                session_id=app.session_id,
-                mode=app.current_mode
-            )
-            
-            # Update session ID if new
-            if response.get('session_id'):
-                app.session_id = response['session_id']
-            
-            # Get AI response
-            ai_response = response.get('response', 'Sorry, I could not process that.')
-            
-            # Update UI on main thread
-            Clock.schedule_once(lambda dt: self._handle_response(ai_response), 0)
-            
-        except Exception as e:
-            error_msg = f"Error: {str(e)}"
-            Clock.schedule_once(lambda dt: self._handle_response(error_msg), 0)
-    
-    def _handle_response(self, response):
-        """Handle AI response on main thread"""
-        self.add_message(response, is_user=False)
-        self.is_processing = False
-        self.ids.send_btn.disabled = False
-        self.ids.send_btn.text = 'Send'
-        
-        # Speak response if TTS enabled
-        app = self.get_app()
-        if app.settings.get('tts', False):
-            app.voice_service.speak(response)
-        
-        # Update stats
-        app.stats['total_messages'] = app.stats.get('total_messages', 0) + 2
-        app.storage_service.save_stats(app.stats)
-    
-    def add_message(self, text, is_user=False):
-        """Add a message bubble to the chat"""
-        container = self.ids.messages_container
-        
-        # Create message bubble
-        bubble = MessageBubble(text=text, is_user=is_user)
-        bubble.size_hint_x = 0.85 if not is_user else 0.85
-        bubble.pos_hint = {'right': 1} if is_user else {'x': 0}
-        
-        container.add_widget(bubble)
-        
-        # Store message
-        self.messages.append({
-            'text': text,
-            'is_user': is_user,
-            'timestamp': datetime.now().isoformat()
-        })
-        
-        # Scroll to bottom
-        Clock.schedule_once(lambda dt: self._scroll_to_bottom(), 0.1)
-    
-    def _scroll_to_bottom(self):
-        """Scroll the message view to the bottom"""
-        scroll_view = self.ids.scroll_view
-        scroll_view.scroll_y = 0
-    
-    def toggle_voice(self):
-        """Toggle voice input"""
-        app = self.get_app()
-        
-        if app.voice_service.is_listening:
-            app.voice_service.stop_listening()
-            self.ids.voice_btn.text = '🎤'
-        else:
-            app.voice_service.start_listening(self._on_voice_result)
-            self.ids.voice_btn.text = '🔴'
-    
-    def _on_voice_result(self, text):
-        """Callback when voice input is received"""
-        self.ids.message_input.text = text
-        self.ids.voice_btn.text = '🎤'
-    
-    def open_settings(self):
-        """Open settings screen"""
-        self.manager.current = 'settings'
-    
-    def open_history(self):
-        """Open history screen"""
-        self.manager.current = 'history'
-    
-    def load_session(self, session_id):
-        """Load a previous chat session"""
-        app = self.get_app()
-        
-        try:
-            history = app.api_service.get_history(session_id)
-            
-            # Clear current messages
-            self.clear_messages()
-            
-            # Add historical messages
-            for msg in history.get('messages', []):
-                self.add_message(
-                    msg.get('content', ''),
-                    is_user=msg.get('role') == 'user'
-                )
-        except Exception as e:
-            print(f"Error loading session: {e}")
-    
-    def clear_messages(self):
-        """Clear all messages from the chat"""
-        container = self.ids.messages_container
-        
-        # Keep only the welcome label
-        while len(container.children) > 1:
-            container.remove_widget(container.children[0])
-        
-        self.messages = []
-    
-    def new_chat(self):
-        """Start a new chat session"""
-        app = self.get_app()
-        app.session_id = None
-        self.clear_messages()
+"""
+Chat Screen - Main chat interface
+"""
+
+from kivy.uix.screenmanager import Screen
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.clock import Clock
+from kivy.properties import StringProperty, BooleanProperty, NumericProperty
+import time
+from datetime import datetime
+
+from services.api_service import RETRYABLE_ERRORS
+# Registers MessageText for the MessageBubble rule in jarvis.kv
+from screens.message_text import MessageText
+
+
+class MessageBubble(RecycleDataViewBehavior, BoxLayout):
+    """
+    A single message bubble in the chat
+    
+    Bubbles are recycled by the transcript RecycleView, so one instance
+    shows many messages over its lifetime.
+    """
+    index = NumericProperty(-1)
+    is_user = BooleanProperty(False)
+    is_pending = BooleanProperty(False)
+    message_text = StringProperty('')
+    timestamp = StringProperty('')
+    status = StringProperty('')
+    
+    _rv = None
+    
+    def refresh_view_attrs(self, rv, index, data):
+        """Bind this view to the transcript entry at index"""
+        self._rv = rv
+        self.index = index
+        return super().refresh_view_attrs(rv, index, data)
+    
+    def on_height(self, instance, height):
+        """Cache the laid-out height on the entry so it is not measured again"""
+        rv = self._rv
+        if rv is not None and 0 <= self.index < len(rv.data):
+            rv.data[self.index]['height'] = height
+
+
+class ChatScreen(Screen):
+    """
+    Main chat screen with message input and display
+    """
+    
+    # Transcript entries follow the welcome label in the RecycleView data
+    TRANSCRIPT_OFFSET = 1
+    
+    # Messages per history page
+    PAGE_SIZE = 50
+    # Seconds before retrying an older page that failed to load
+    PAGE_RETRY_DELAY = 5
+    
+    # Bulk loads add messages in batches of HYDRATE_BATCH, spending at
+    # most HYDRATE_BUDGET seconds per frame (RecycleView refresh included)
+    HYDRATE_BATCH = 25
+    HYDRATE_BUDGET = 0.008
+    
+    # Backend status from APIService's circuit breaker: 'online',
+    # 'connecting' or 'offline'
+    connection_state = StringProperty('connecting')
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.messages = []
+        self.is_processing = False
+        self._requests = []
+        self._history = None
+        # Session whose transcript is on screen (None for a new chat until
+        # the server names it)
+        self._session_id = None
+        # Outbox item id -> (sent record, reply record) for queued messages
+        self._queued = {}
+        # Groups the messages of a new chat until the server names the session
+        self._local_group = None
+        # Scheduled event of a bulk load still adding older messages
+        self._hydration = None
+        # Seconds per row the last transcript refresh took
+        self._row_refresh_cost = 20e-6
+        self._scroll_trigger = Clock.create_trigger(
+            lambda dt: self._scroll_to_bottom(), 0.1
+        )
+        
+    def on_enter(self):
+        """Called when screen becomes active"""
+        # Load any saved session
+        app = self.get_app()
+        if app.session_id:
+            self.load_session(app.session_id)
+    
+    def get_app(self):
+        """Get the main app instance"""
+        from kivy.app import App
+        return App.get_running_app()
+    
+    def set_mode(self, mode):
+        """Set chat mode (general or realtime)"""
+        app = self.get_app()
+        app.current_mode = mode
+        self.ids.general_mode.state = 'down' if mode == 'general' else 'normal'
+        self.ids.realtime_mode.state = 'down' if mode == 'realtime' else 'normal'
+    
+    def send_message(self):
+        """Send a message to the AI"""
+        if self.is_processing:
+            return
+            
+        input_field = self.ids.message_input
+        message = input_field.text.strip()
+        
+        if not message:
+            return
+        
+        # Clear input
+        input_field.text = ''
+        
+        # A new message interrupts the previous reply being read out
+        app = self.get_app()
+        app.voice_service.stop_speaking()
+        
+        # Add user message to UI
+        sent = self.add_message(message, is_user=True)
+        
+        # The idempotency key makes a resend after a failure safe
+        item = app.outbox.create(
+            message, app.session_id, app.current_mode, group=self._local_group
+        )
+        if not app.session_id:
+            self._local_group = item['group']
+        
+        # Keep the conversation in order behind messages already queued
+        if app.outbox.has_pending(item['group']):
+            self._queue_message(item, sent)
+            return
+        
+        # Process in background
+        self.is_processing = True
+        self.ids.send_btn.disabled = True
+        self.ids.send_btn.text = '...'
+        
+        # When streaming, the reply bubble is created up front and filled in
+        reply = None
+        if app.settings.get('stream_responses', True):
+            reply = self.add_message('', is_user=False, is_pending=True)
+        
+        if reply is not None:
+            request = app.async_api.send_message_stream(
+                message=message,
+                session_id=app.session_id,
+                mode=app.current_mode,
+                idempotency_key=item['id'],
+                on_chunk=lambda chunk: self._append_chunk(reply, chunk),
+                callback=lambda response: self._handle_response(response, reply, sent, item),
+                on_error=lambda e: self._handle_response({'response': f"Error: {str(e)}"}, reply)
+            )
+        else:
+            request = app.async_api.send_message(
+                message=message,
+                session_id=app.session_id,
+                mode=app.current_mode,
+                idempotency_key=item['id'],
+                callback=lambda response: self._handle_response(response, sent=sent, item=item),
+                on_error=lambda e: self._handle_response({'response': f"Error: {str(e)}"})
+            )
+        self._track_request(request)
+    
+    def _track_request(self, request):
+        """Remember an in-flight request so a context switch can cancel it"""
+        self._requests = [r for r in self._requests if not r.done()]
+        self._requests.append(request)
+    
+    def _cancel_requests(self):
+        """Abort in-flight requests belonging to the current conversation"""
+        for request in self._requests:
+            request.cancel()
+        self._requests = []
+        
+        self.is_processing = False
+        self.ids.send_btn.disabled = False
+        self.ids.send_btn.text = 'Send'
+    
+    def _append_chunk(self, reply, chunk):
+        """Append a streamed chunk to the reply bubble on main thread"""
+        text = chunk if reply.get('is_pending') else reply['text'] + chunk
+        self.update_message(reply, text)
+        self._scroll_trigger()
+    
+    def _handle_response(self, result, reply=None, sent=None, item=None):
+        """
+        Handle AI response on main thread
+        
+        Args:
+            result: Dict from APIService with response and session_id
+            reply: Record of the streaming reply bubble, if any
+            sent: Record of the user message this answers
+            item: Outbox item of the message, queued if sending failed
+        """
+        if (item is not None and result.get('error') in RETRYABLE_ERRORS
+                and not result.get('partial')):
+            self._queue_message(item, sent, reply)
+            return
+        
+        self._apply_reply(result, reply, sent)
+        
+        self.is_processing = False
+        self.ids.send_btn.disabled = False
+        self.ids.send_btn.text = 'Send'
+        
+        if not result.get('error'):
+            # The server is reachable, so anything queued can go now
+            self.get_app().drain_outbox()
+    
+    def _apply_reply(self, result, reply=None, sent=None):
+        """Show a reply, speak it, save the exchange and count it"""
+        app = self.get_app()
+        
+        # Update session ID if new
+        if result.get('session_id'):
+            app.session_id = result['session_id']
+            self._session_id = app.session_id
+        
+        response = result.get('response', 'Sorry, I could not process that.')
+        
+        if reply is None:
+            reply = self.add_message(response, is_user=False)
+        else:
+            # Replace streamed text with the final reply
+            self.update_message(reply, response)
+            self._scroll_trigger()
+        
+        # Speak response if TTS enabled
+        if app.settings.get('tts', False):
+            app.voice_service.speak(response)
+        
+        # Keep a local copy of the exchange
+        if sent is not None and app.session_id and app.settings.get('auto_save', True):
+            self._save_exchange(app.session_id, [sent, reply])
+        
+        # Update stats
+        app.stats['total_messages'] = app.stats.get('total_messages', 0) + 2
+        app.storage_service.save_stats(app.stats)
+    
+    def _queue_message(self, item, sent, reply=None):
+        """Put a message in the outbox and show it as waiting"""
+        app = self.get_app()
+        app.outbox.enqueue(item)
+        
+        if reply is None:
+            reply = self.add_message('', is_user=False, is_pending=True)
+        else:
+            self.update_message(reply, '', is_pending=True)
+        
+        self.set_status(sent, 'Queued')
+        self._queued[item['id']] = (sent, reply)
+        
+        self.is_processing = False
+        self.ids.send_btn.disabled = False
+        self.ids.send_btn.text = 'Send'
+    
+    def on_outbox_result(self, item, result):
+        """Match a reply to a queued message back to its bubbles"""
+        sent, reply = self._queued.pop(item['id'], (None, None))
+        
+        if reply is not None and self._index_of(reply) is not None:
+            self.set_status(sent, '')
+            self._apply_reply(result, reply, sent)
+            return
+        
+        # The conversation is no longer on screen; just keep a local copy
+        app = self.get_app()
+        session_id = result.get('session_id') or item['session_id']
+        if session_id and not result.get('error') and app.settings.get('auto_save', True):
+            self._save_exchange(session_id, [
+                {'text': item['message'], 'is_user': True, 'timestamp': item['created']},
+                {
+                    'text': result.get('response', ''),
+                    'is_user': False,
+                    'timestamp': datetime.now().isoformat()
+                }
+            ], on_screen=False)
+    
+    def _save_exchange(self, session_id, records, on_screen=True):
+        """Append messages to local storage and refresh the session entry"""
+        app = self.get_app()
+        storage = app.storage_service
+        
+        messages = [
+            {
+                'role': 'user' if record['is_user'] else 'assistant',
+                'content': record['text'],
+                'timestamp': record['timestamp']
+            }
+            for record in records
+        ]
+        if on_screen:
+            first = next((m for m in self.messages if m['is_user']), records[0])
+        else:
+            first = records[0]
+        session = {
+            'session_id': session_id,
+            'preview': first['text'][:100],
+            'timestamp': datetime.now().isoformat()
+        }
+        
+        def save():
+            for message in messages:
+                storage.append_message(session_id, message)
+            storage.save_session(session)
+        
+        # Disk work happens on the storage writer thread
+        storage.defer(save)
+        
+        # Keep the loaded session's cache in step so paging never drops these
+        if self._history is not None and self._history['session_id'] == session_id:
+            self._history['cached'] = self._history['cached'] + messages
+        
+        for message in messages:
+            app.search_index.add_message(session_id, message)
+    
+    def add_message(self, text, is_user=False, is_pending=False):
+        """
+        Add a message bubble to the chat
+        
+        Args:
+            text: Message text
+            is_user: True for the user's own messages
+            is_pending: Show a placeholder until the text arrives
+        
+        Returns:
+            The stored message record, usable with update_message
+        """
+        now = datetime.now()
+        record = {
+            'text': text,
+            'is_user': is_user,
+            'timestamp': now.isoformat()
+        }
+        if is_pending:
+            record['is_pending'] = True
+        
+        self.messages.append(record)
+        self.ids.scroll_view.data.append(self._view_data(record, now))
+        
+        # Scroll to bottom
+        self._scroll_trigger()
+        
+        return record
+    
+    def update_message(self, record, text, is_pending=False):
+        """
+        Change a message's text in place, e.g. while a reply streams in
+        
+        Args:
+            record: Record returned by add_message
+            text: New text
+            is_pending: Whether to keep showing the placeholder
+        """
+        index = self._index_of(record)
+        if index is None:
+            return
+        
+        record['text'] = text
+        record.pop('is_pending', None)
+        if is_pending:
+            record['is_pending'] = True
+        
+        self._patch_view(index, message_text=text, is_pending=is_pending)
+    
+    def set_status(self, record, status):
+        """
+        Show a short delivery status (e.g. 'Queued') under a message
+        
+        Args:
+            record: Record returned by add_message
+            status: Status text, or '' to clear it
+        """
+        index = self._index_of(record)
+        if index is None:
+            return
+        
+        record.pop('status', None)
+        if status:
+            record['status'] = status
+        
+        self._patch_view(index, status=status)
+    
+    def _patch_view(self, index, **attrs):
+        """Update a transcript entry and its visible view, if any"""
+        # Patch the entry in place rather than reassigning the data list,
+        # which would re-measure the whole transcript
+        rv = self.ids.scroll_view
+        data_index = index + self.TRANSCRIPT_OFFSET
+        rv.data[data_index].update(attrs)
+        
+        view = rv.view_adapter.get_visible_view(data_index)
+        if view is not None:
+            for name, value in attrs.items():
+                setattr(view, name, value)
+    
+    def _index_of(self, record):
+        """Find a record in self.messages (searching from the newest end)"""
+        for index in range(len(self.messages) - 1, -1, -1):
+            if self.messages[index] is record:
+                return index
+        return None
+    
+    def _view_data(self, record, when=None):
+        """Build the RecycleView entry for a message record"""
+        if when is None:
+            when = self._record_time(record)
+        
+        is_user = record['is_user']
+        return {
+            'message_text': record['text'],
+            'is_user': is_user,
+            'is_pending': record.get('is_pending', False),
+            'status': record.get('status', ''),
+            'timestamp': when.strftime('%I:%M %p'),
+            'size_hint_x': 0.85,
+            'pos_hint': {'right': 1} if is_user else {'x': 0}
+        }
+    
+    def _record_time(self, record):
+        """Local time a message was sent, or now if the record has none"""
+        try:
+            when = datetime.fromisoformat(record['timestamp'])
+        except (KeyError, TypeError, ValueError):
+            return datetime.now()
+        
+        if when.tzinfo is not None:
+            when = when.astimezone().replace(tzinfo=None)
+        return when
+    
+    def _set_messages(self, records):
+        """Replace the transcript with records"""
+        self._cancel_hydration()
+        self.messages = []
+        self.ids.scroll_view.data = [self._welcome_data()]
+        self.add_messages(records)
+    
+    def add_messages(self, records):
+        """
+        Append many message records, a frame's worth at a time
+        
+        The newest messages are shown at once and older ones are
+        inserted above them over the following frames. Each frame builds
+        entries and refreshes the RecycleView within HYDRATE_BUDGET,
+        allowing for the refresh from the cost measured last time, as it
+        grows with the length of the transcript. Once a refresh alone
+        takes longer than the budget, batches are at least as large as
+        the transcript so far, so a load takes a few long frames rather
+        than many. The view is scrolled to the bottom once.
+        
+        Args:
+            records: Message records, oldest first
+        """
+        records = list(records)
+        if not records:
+            return
+        
+        self._hydrate(len(self.messages), records)
+        self._scroll_trigger()
+    
+    def _hydrate(self, index, records):
+        """Insert the newest of records at index within one frame's budget"""
+        self._hydration = None
+        rv = self.ids.scroll_view
+        deadline = time.perf_counter() + self.HYDRATE_BUDGET
+        
+        def refresh_cost(added):
+            return self._row_refresh_cost * (len(rv.data) + added)
+        
+        minimum = self.HYDRATE_BATCH
+        if refresh_cost(0) >= self.HYDRATE_BUDGET:
+            minimum = max(minimum, len(rv.data))
+        
+        end = start = len(records)
+        chunks = []
+        while start and (
+            end - start < minimum
+            or time.perf_counter() + refresh_cost(end - start) < deadline
+        ):
+            batch_end = start
+            start = max(batch_end - self.HYDRATE_BATCH, 0)
+            chunks.append([self._view_data(record) for record in records[start:batch_end]])
+        
+        self.messages[index:index] = records[start:]
+        self._insert_views(
+            self.TRANSCRIPT_OFFSET + index,
+            [view for chunk in reversed(chunks) for view in chunk]
+        )
+        
+        # Refresh now rather than at the end of the frame, to measure it
+        refresh_start = time.perf_counter()
+        rv.refresh_views()
+        self._row_refresh_cost = (time.perf_counter() - refresh_start) / len(rv.data)
+        
+        if start:
+            # Older messages go above these on the next frame
+            self._hydration = Clock.schedule_once(
+                lambda dt: self._hydrate(index, records[:start]), 0
+            )
+    
+    def _insert_views(self, position, views):
+        """
+        Insert RecycleView entries at position
+        
+        Kivy reports a slice insertion into data as an in-place change,
+        which leaves the layout out of step with the data, so the list is
+        replaced instead. Cached row heights keep the refresh cheap.
+        """
+        data = self.ids.scroll_view.data
+        self.ids.scroll_view.data = data[:position] + views + data[position:]
+    
+    def _cancel_hydration(self):
+        """Stop a bulk load that is still adding messages"""
+        if self._hydration is not None:
+            self._hydration.cancel()
+            self._hydration = None
+    
+    def _welcome_data(self):
+        """RecycleView entry for the welcome label at the top"""
+        return {'viewclass': 'WelcomeLabel'}
+    
+    def _scroll_to_bottom(self):
+        """Scroll the message view to the bottom"""
+        scroll_view = self.ids.scroll_view
+        scroll_view.scroll_y = 0
+    
+    def toggle_voice(self):
+        """Toggle voice input"""
+        app = self.get_app()
+        
+        if app.voice_service.is_listening:
+            app.voice_service.stop_listening()
+            self.ids.voice_btn.text = '🎤'
+        else:
+            # Barge-in: stop reading out the reply before listening
+            app.voice_service.stop_speaking()
+            app.voice_service.start_listening(
+                self._on_voice_result,
+                on_partial=self._on_voice_partial
+            )
+            if app.voice_service.recognizer_ready:
+                self.ids.voice_btn.text = '🔴'
+            else:
+                # First use: the recognizer is still loading
+                self.ids.voice_btn.text = '⏳'
+                app.voice_service.bind(recognizer_ready=self._on_voice_ready)
+    
+    def _on_voice_ready(self, voice_service, ready):
+        """Switch the voice button to recording once the recognizer loaded"""
+        voice_service.unbind(recognizer_ready=self._on_voice_ready)
+        if voice_service.is_listening:
+            self.ids.voice_btn.text = '🔴'
+    
+    def _on_voice_partial(self, text):
+        """Show the words recognized so far while the user speaks"""
+        self.ids.message_input.text = text
+    
+    def _on_voice_result(self, text):
+        """Callback when voice input is received"""
+        self.ids.message_input.text = text
+        self.ids.voice_btn.text = '🎤'
+    
+    def open_settings(self):
+        """Open settings screen"""
+        self.get_app().show_screen('settings')
+    
+    def open_history(self):
+        """Open history screen"""
+        self.get_app().show_screen('history')
+    
+    def load_session(self, session_id):
+        """
+        Load a previous chat session
+        
+        The newest page of the cached copy is shown right away, then
+        revalidated with a conditional GET and replaced only if the server
+        has changes. Older pages load as the user scrolls up.
+        """
+        app = self.get_app()
+        storage = app.storage_service
+        
+        # Already on screen (e.g. back from Settings); reloading would drop
+        # a reply that is still arriving
+        if session_id == self._session_id:
+            return
+        
+        # Drop anything still in flight for the previous conversation
+        self._cancel_requests()
+        self._session_id = session_id
+        self._local_group = None
+        
+        cached = storage.load_messages(session_id)
+        meta = storage.load_history_meta(session_id) if cached else {}
+        self._history = {
+            'session_id': session_id,
+            # Every known message, oldest first; cached[:hidden] is not shown
+            'cached': cached,
+            'hidden': max(len(cached) - self.PAGE_SIZE, 0),
+            'etag': meta.get('etag'),
+            'last_modified': meta.get('last_modified'),
+            # Cursor for the server page before cached[0]
+            'before': meta.get('before'),
+            'has_more': meta.get('has_more', False),
+            'loading': False,
+            'retry_at': 0
+        }
+        self._show_history({'messages': cached[self._history['hidden']:]})
+        
+        self._track_request(app.async_api.get_history(
+            session_id,
+            limit=self.PAGE_SIZE,
+            etag=self._history['etag'],
+            last_modified=self._history['last_modified'],
+            callback=lambda page: self._revalidate_history(session_id, page),
+            on_error=lambda e: print(f"Error loading session: {e}")
+        ))
+    
+    def _revalidate_history(self, session_id, page):
+        """Apply a revalidated newest page and update the cache"""
+        if page.get('not_modified'):
+            return
+        
+        if page.get('error'):
+            # Offline: keep showing the cached copy
+            return
+        
+        history = self._history
+        messages = page.get('messages', [])
+        start = self._find_page_start(history['cached'], messages)
+        
+        if start is None:
+            # The cache no longer lines up with the server; start over
+            cached = messages
+            history['before'] = page.get('before')
+            history['has_more'] = page.get('has_more', False)
+        else:
+            cached = history['cached'][:start] + messages
+        
+        history['etag'] = page.get('etag')
+        history['last_modified'] = page.get('last_modified')
+        
+        if cached != history['cached']:
+            history['cached'] = cached
+            history['hidden'] = max(len(cached) - self.PAGE_SIZE, 0)
+            self._show_history({'messages': cached[history['hidden']:]})
+            self.get_app().search_index.schedule_session(session_id, cached)
+        
+        self._save_history_cache(history)
+    
+    def _find_page_start(self, cached, page):
+        """Index in cached where page begins, or None if they do not overlap"""
+        if not page:
+            return None
+        
+        for index in range(len(cached) - 1, -1, -1):
+            if cached[index] == page[0]:
+                return index
+        return None
+    
+    def _save_history_cache(self, history):
+        """Write a session's cached messages and validators on the writer thread"""
+        storage = self.get_app().storage_service
+        session_id = history['session_id']
+        messages = list(history['cached'])
+        meta = {
+            key: history[key]
+            for key in ('etag', 'last_modified', 'before', 'has_more')
+        }
+        
+        def save():
+            storage.save_messages(session_id, messages)
+            storage.save_history_meta(session_id, meta)
+        
+        storage.defer(save, key=f'history:{session_id}')
+    
+    def _on_transcript_scroll(self, scroll_y):
+        """Load the previous page when the transcript nears the top"""
+        history = self._history
+        if history is None or history['loading'] or self._hydration is not None:
+            return
+        if self._scroll_trigger.is_triggered:
+            # A fresh transcript is about to jump to the bottom
+            return
+        if not history['hidden'] and not history['has_more']:
+            return
+        
+        rv = self.ids.scroll_view
+        scrollable = max(self.ids.messages_container.height - rv.height, 0)
+        if (1 - scroll_y) * scrollable < rv.height:
+            self._load_older()
+    
+    def _load_older(self):
+        """Show the previous page, from the cache or the server"""
+        history = self._history
+        
+        if history['hidden']:
+            end = history['hidden']
+            history['hidden'] = max(end - self.PAGE_SIZE, 0)
+            self._prepend_messages(history['cached'][history['hidden']:end])
+            return
+        
+        if time.monotonic() < history['retry_at']:
+            return
+        
+        history['loading'] = True
+        self._track_request(self.get_app().async_api.get_history(
+            history['session_id'],
+            limit=self.PAGE_SIZE,
+            before=history['before'],
+            callback=lambda page: self._show_older(history, page)
+        ))
+    
+    def _show_older(self, history, page):
+        """Prepend an older page fetched from the server"""
+        if history is not self._history:
+            return
+        history['loading'] = False
+        
+        if page.get('error'):
+            history['retry_at'] = time.monotonic() + self.PAGE_RETRY_DELAY
+            return
+        
+        messages = page.get('messages', [])
+        history['cached'] = messages + history['cached']
+        history['before'] = page.get('before')
+        history['has_more'] = bool(messages) and page.get('has_more', False)
+        
+        self._prepend_messages(messages)
+        self.get_app().search_index.schedule_session(history['session_id'], history['cached'])
+        self._save_history_cache(history)
+    
+    def _prepend_messages(self, messages):
+        """Insert older messages above the transcript without moving the view"""
+        if not messages:
+            return
+        
+        rv = self.ids.scroll_view
+        container = self.ids.messages_container
+        
+        # Rows are added above, so keep the distance from the bottom fixed
+        from_bottom = rv.scroll_y * max(container.height - rv.height, 0)
+        
+        records = self._history_records(messages)
+        self.messages[0:0] = records
+        self._insert_views(
+            self.TRANSCRIPT_OFFSET,
+            [self._view_data(record) for record in records]
+        )
+        
+        def restore(*args):
+            scrollable = container.height - rv.height
+            if scrollable > 0:
+                rv.scroll_y = min(1, from_bottom / scrollable)
+        
+        # Heights settle over the next frames as new rows are measured
+        container.bind(height=restore)
+        Clock.schedule_once(lambda dt: container.unbind(height=restore), 0.5)
+    
+    def _show_history(self, history):
+        """Render a loaded session on main thread"""
+        # Replace current messages with the historical ones
+        self._set_messages(self._history_records(history.get('messages', [])))
+    
+    def _history_records(self, messages):
+        """Turn stored/server messages into transcript records"""
+        return [
+            {
+                'text': msg.get('content', ''),
+                'is_user': msg.get('role') == 'user',
+                'timestamp': msg.get('timestamp') or datetime.now().isoformat()
+            }
+            for msg in messages
+        ]
+    
+    def clear_messages(self):
+        """Clear all messages from the chat"""
+        # Keep only the welcome label
+        self._set_messages([])
+    
+    def new_chat(self):
+        """Start a new chat session"""
+        app = self.get_app()
+        self._cancel_requests()
+        app.session_id = None
+        self._session_id = None
+        self._history = None
+        self._local_group = None
+        self.clear_messages()
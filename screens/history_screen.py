@@ -1,179 +1,307 @@
-"""
-History Screen - Chat history management
-"""
-
-from kivy.uix.screenmanager import Screen
-from kivy.uix.boxlayout import BoxLayout
-from kivy.uix.label import Label
-from kivy.uix.button import Button
-from kivy.app import App
-from kivy.properties import StringProperty
-from datetime import datetime
-import os
-import json
-
-
-class HistoryItem(BoxLayout):
-    """A single history item in the list"""
-    session_id = StringProperty('')
-    preview = StringProperty('')
-    date_str = StringProperty('')
-    
-    def __init__(self, session_id, preview, date_str, on_select=None, **kwargs):
-        super().__init__(**kwargs)
-        self.session_id = session_id
-        self.preview = preview
-        self.date_str = date_str
-        self.on_select = on_select
-        
-        # Add touch handling
-        self.bind(on_touch_down=self._on_touch)
-    
-    def _on_touch(self, instance, touch):
-        if self.collide_point(*touch.pos):
-            if self.on_select:
-                self.on_select(self.session_id)
-            return True
-        return False
-
-
-class HistoryScreen(Screen):
-    """
-    Screen for viewing and managing chat history
-    """
-    
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.history_data = []
-    
-    def on_enter(self):
-        """Called when screen becomes active"""
-        self._load_history()
-    
-    def _load_history(self):
-        """Load chat history from storage"""
-        app = App.get_running_app()
-        
-        # Try to load from API first
-        try:
-            sessions = app.api_service.get_all_sessions()
-            self._display_sessions(sessions)
-        except Exception as e:
-            print(f"Error loading from API: {e}")
-            # Fall back to local storage
-            self._load_local_history()
-    
-    def _load_local_history(self):
-        """Load history from local storage"""
-        app = App.get_running_app()
-        sessions = app.storage_service.load_sessions()
-        self._display_sessions(sessions)
-    
-    def _display_sessions(self, sessions):
-        """Display sessions in the history list"""
-        container = self.ids.history_container
-        
-        # Clear existing items
-        container.clear_widgets()
-        
-        if not sessions:
-            # Show empty state
-            empty_label = Label(
-                text='No chat history yet',
-                size_hint_y=None,
-                height='100dp',
-                color=get_color_from_hex('#888888')
-            )
-            container.add_widget(empty_label)
-            return
-        
-        # Add session items
-        for session in sessions:
-            item = HistoryItem(
-                session_id=session.get('session_id', ''),
-                preview=session.get('preview', 'No preview'),
-                date_str=self._format_date(session.get('timestamp')),
-                on_select=self._on_session_select
-            )
-            container.add_widget(item)
-    
-    def _format_date(self, timestamp):
-        """Format timestamp for display"""
-        if not timestamp:
-            return 'Unknown'
-        
-        try:
-            if isinstance(timestamp, str):
-                dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-            else:
-                dt = datetime.fromtimestamp(timestamp)
-            
-            now = datetime.now()
-            diff = now - dt
-            
-            if diff.days == 0:
-                return 'Today'
-            elif diff.days == 1:
-                return 'Yesterday'
-            elif diff.days < 7:
-                return f'{diff.days} days ago'
-            else:
-                return dt.strftime('%b %d, %Y')
-        except:
-            return 'Unknown'
-    
-    def _on_session_select(self, session_id):
-        """Handle session selection"""
-        app = App.get_running_app()
-        app.session_id = session_id
-        
-        # Go back to chat and load session
-        self.manager.current = 'chat'
-        chat_screen = self.manager.get_screen('chat')
-        chat_screen.load_session(session_id)
-    
-    def search_history(self, query):
-        """Search through chat history"""
-        query = query.lower().strip()
-        
-        if not query:
-            self._load_history()
-            return
-        
-        # Filter sessions
-        filtered = []
-        for session in self.history_data:
-            preview = session.get('preview', '').lower()
-            if query in preview:
-                filtered.append(session)
-        
-        self._display_sessions(filtered)
-    
-    def new_chat(self):
-        """Start a new chat session"""
-        app = App.get_running_app()
-        app.session_id = None
-        
-        # Go to chat screen
-        self.manager.current = 'chat'
-        chat_screen = self.manager.get_screen('chat')
-        chat_screen.new_chat()
-    
-    def go_back(self):
-        """Return to chat screen"""
-        self.manager.current = 'chat'
-    
-    def delete_session(self, session_id):
-        """Delete a chat session"""
-        app = App.get_running_app()
-        
-        try:
-            app.api_service.delete_session(session_id)
-        except:
-            pass
-        
-        # Remove from local storage
-        app.storage_service.delete_session(session_id)
-        
-        # Refresh the list
-        self._load_history()
+"""
+History Screen - Chat history management
+"""
+
+from kivy.uix.screenmanager import Screen
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.app import App
+from kivy.clock import Clock
+from kivy.properties import StringProperty, BooleanProperty
+from datetime import datetime
+
+
+class HistoryItem(RecycleDataViewBehavior, BoxLayout):
+    """A single history item in the list (recycled by the RecycleView)"""
+    session_id = StringProperty('')
+    preview = StringProperty('')
+    date_str = StringProperty('')
+    on_select = None
+    
+    def on_touch_down(self, touch):
+        if self.collide_point(*touch.pos):
+            if self.on_select:
+                self.on_select(self.session_id)
+            return True
+        return super().on_touch_down(touch)
+
+
+class HistoryScreen(Screen):
+    """
+    Screen for viewing and managing chat history
+    """
+    
+    # Section titles in display order
+    SECTIONS = ('Today', 'Yesterday', 'Older')
+    
+    # Seconds to wait after the last keystroke before searching
+    SEARCH_DELAY = 0.25
+    
+    # True while the session list is being fetched from the server
+    is_refreshing = BooleanProperty(False)
+    # Shown under the search box, e.g. 'Updated 09:41 AM'
+    refresh_status = StringProperty('')
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.history_data = []
+        self._parsed_dates = {}
+        self._last_refresh = None
+        self._refresh_request = None
+        self._search_query = ''
+        self._search_request = None
+        self._search_trigger = Clock.create_trigger(self._run_search, self.SEARCH_DELAY)
+    
+    def on_enter(self):
+        """Called when screen becomes active"""
+        # Saved sessions render immediately; the server list follows
+        self._load_local_history()
+        self._refresh_history()
+        
+        # Build the search index in the background before the first query
+        app = App.get_running_app()
+        if not app.search_index.is_built:
+            app.async_api.submit(app.search_index.ensure_built, executor=app.search_index.executor)
+    
+    def _load_local_history(self):
+        """Load history from local storage"""
+        app = App.get_running_app()
+        sessions = app.storage_service.load_sessions()
+        self._show_sessions(sessions)
+    
+    def _refresh_history(self):
+        """Fetch the session list from the server in the background"""
+        if self._refresh_request is not None and not self._refresh_request.done():
+            return
+        
+        app = App.get_running_app()
+        self.is_refreshing = True
+        self._refresh_request = app.async_api.get_all_sessions(
+            callback=self._merge_sessions,
+            on_error=lambda e: self._merge_sessions(None)
+        )
+    
+    def _merge_sessions(self, sessions):
+        """Apply the server's session list and save it locally"""
+        self.is_refreshing = False
+        
+        if sessions is None:
+            # Offline or server error: keep showing the saved list
+            if self._last_refresh:
+                self.refresh_status = f"Offline - updated {self._last_refresh.strftime('%I:%M %p')}"
+            else:
+                self.refresh_status = 'Offline - showing saved history'
+            return
+        
+        self._last_refresh = datetime.now()
+        self.refresh_status = f"Updated {self._last_refresh.strftime('%I:%M %p')}"
+        
+        # The server is authoritative; fill gaps from what is stored locally
+        local = {s.get('session_id'): s for s in self.history_data}
+        merged = [
+            dict(local.get(session.get('session_id'), {}), **session)
+            for session in sessions
+        ]
+        
+        if merged == self.history_data:
+            return
+        
+        self._show_sessions(merged)
+        
+        storage = App.get_running_app().storage_service
+        storage.defer(lambda: storage.save_sessions(merged), key='sessions')
+    
+    def _show_sessions(self, sessions):
+        """Remember sessions and display them unless a search is showing"""
+        self.history_data = sessions
+        if not self._search_query:
+            self._display_sessions(sessions)
+    
+    def _display_sessions(self, sessions):
+        """Display sessions in the history list"""
+        rv = self.ids.history_list
+        
+        if not sessions:
+            # Show empty state
+            rv.data = [{'viewclass': 'HistoryEmptyLabel', 'text': 'No chat history yet'}]
+            return
+        
+        rv.data = self._build_rows(sessions)
+    
+    def _build_rows(self, sessions):
+        """
+        Turn sessions into RecycleView rows grouped under section headers
+        
+        Every timestamp is parsed and labelled once here, so scrolling
+        and recycling rows does no date work.
+        
+        Returns:
+            List of RecycleView data dicts
+        """
+        today = datetime.now().date()
+        buckets = {name: [] for name in self.SECTIONS}
+        
+        for session in sessions:
+            dt = self._parse_date(session.get('timestamp'))
+            if dt is None:
+                days = None
+                bucket = 'Older'
+            else:
+                days = (today - dt.date()).days
+                bucket = 'Today' if days <= 0 else 'Yesterday' if days == 1 else 'Older'
+            
+            buckets[bucket].append((dt, days, session))
+        
+        rows = []
+        for name in self.SECTIONS:
+            entries = buckets[name]
+            if not entries:
+                continue
+            
+            # Newest first; sessions without a date go last
+            entries.sort(key=lambda e: e[0] or datetime.min, reverse=True)
+            
+            rows.append({'viewclass': 'HistorySection', 'text': name})
+            for dt, days, session in entries:
+                rows.append({
+                    'viewclass': 'HistoryItem',
+                    'session_id': session.get('session_id', ''),
+                    'preview': session.get('preview', 'No preview'),
+                    'date_str': self._format_date(dt, days),
+                    'on_select': self._on_session_select
+                })
+        
+        return rows
+    
+    def _parse_date(self, timestamp):
+        """Parse a session timestamp into a local naive datetime (memoized)"""
+        if not timestamp:
+            return None
+        
+        if timestamp in self._parsed_dates:
+            return self._parsed_dates[timestamp]
+        
+        try:
+            if isinstance(timestamp, str):
+                dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+            else:
+                dt = datetime.fromtimestamp(timestamp)
+            
+            if dt.tzinfo is not None:
+                dt = dt.astimezone().replace(tzinfo=None)
+        except (ValueError, TypeError, OverflowError, OSError):
+            dt = None
+        
+        self._parsed_dates[timestamp] = dt
+        return dt
+    
+    def _format_date(self, dt, days):
+        """Format a parsed session date for display"""
+        if dt is None:
+            return 'Unknown'
+        
+        if days <= 1:
+            # The section header already says Today/Yesterday
+            return dt.strftime('%I:%M %p')
+        elif days < 7:
+            return f'{days} days ago'
+        else:
+            return dt.strftime('%b %d, %Y')
+    
+    def _on_session_select(self, session_id):
+        """Handle session selection"""
+        app = App.get_running_app()
+        app.session_id = session_id
+        
+        # Go back to chat and load session
+        self.manager.current = 'chat'
+        chat_screen = self.manager.get_screen('chat')
+        chat_screen.load_session(session_id)
+    
+    def search_history(self, query):
+        """Search all stored messages (debounced while typing)"""
+        self._search_query = query.strip()
+        self._search_trigger()
+    
+    def _run_search(self, dt):
+        """Run the pending query on a background thread"""
+        if self._search_request is not None:
+            self._search_request.cancel()
+            self._search_request = None
+        
+        query = self._search_query
+        if not query:
+            self._display_sessions(self.history_data)
+            return
+        
+        app = App.get_running_app()
+        # On the index's own thread: a search waits for a build in progress,
+        # which must not tie up the workers that send messages
+        self._search_request = app.async_api.submit(
+            app.search_index.search,
+            query,
+            callback=lambda results: self._show_results(query, results),
+            executor=app.search_index.executor
+        )
+    
+    def _show_results(self, query, results):
+        """Display search results, best match first"""
+        if query != self._search_query:
+            return
+        
+        rv = self.ids.history_list
+        
+        if not results:
+            rv.data = [{'viewclass': 'HistoryEmptyLabel', 'text': 'No matches'}]
+            return
+        
+        today = datetime.now().date()
+        sessions = {s.get('session_id'): s for s in self.history_data}
+        
+        rows = [{
+            'viewclass': 'HistorySection',
+            'text': f"{len(results)} result{'s' if len(results) != 1 else ''}"
+        }]
+        for result in results:
+            session = sessions.get(result['session_id'], {})
+            dt = self._parse_date(session.get('timestamp'))
+            days = None if dt is None else (today - dt.date()).days
+            
+            rows.append({
+                'viewclass': 'HistoryItem',
+                'session_id': result['session_id'],
+                'preview': result['snippet'],
+                'date_str': self._format_date(dt, days),
+                'on_select': self._on_session_select
+            })
+        
+        rv.data = rows
+    
+    def new_chat(self):
+        """Start a new chat session"""
+        app = App.get_running_app()
+        app.session_id = None
+        
+        # Go to chat screen
+        self.manager.current = 'chat'
+        chat_screen = self.manager.get_screen('chat')
+        chat_screen.new_chat()
+    
+    def go_back(self):
+        """Return to chat screen"""
+        self.manager.current = 'chat'
+    
+    def delete_session(self, session_id):
+        """Delete a chat session"""
+        app = App.get_running_app()
+        app.async_api.delete_session(session_id)
+        
+        # Remove from local storage on the background writer
+        storage = app.storage_service
+        storage.defer(lambda: storage.delete_session(session_id))
+        app.search_index.remove_session(session_id)
+        
+        # Refresh the list
+        self._show_sessions([
+            s for s in self.history_data if s.get('session_id') != session_id
+        ])
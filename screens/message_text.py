@@ -0,0 +1,226 @@
+"""
+Message Text - Cached text rendering for chat bubbles
+"""
+
+import re
+from collections import OrderedDict
+
+from kivy.uix.widget import Widget
+from kivy.clock import Clock
+from kivy.core.text import Label as CoreLabel
+from kivy.core.text.markup import MarkupLabel
+from kivy.graphics import Color, Rectangle
+from kivy.properties import StringProperty, NumericProperty, BooleanProperty, ColorProperty
+
+
+# Longest piece of text rendered into one texture. Long replies are split
+# at line breaks so no texture comes near the GPU size limit (often 4096
+# px on phones) and unchanged pieces of a streaming reply stay cached.
+CHUNK_CHARS = 1000
+
+# Kivy markup tags; [anchor] has no closing tag
+MARKUP_TAG = re.compile(
+    r'\[(/?)(b|i|u|s|sub|sup|size|color|font|font_context|font_family|'
+    r'font_features|text_language|ref|anchor)(=[^\]]*)?\]'
+)
+
+
+def split_text(text, limit=CHUNK_CHARS, markup=False):
+    """
+    Split text into pieces of at most limit characters
+    
+    Pieces end at line breaks where possible, then at spaces. Earlier
+    pieces do not change when text is appended. With markup, pieces are
+    never cut inside a tag, and tags still open at the end of a piece are
+    closed there and reopened at the start of the next.
+    """
+    chunks = []
+    current = []
+    length = 0
+    
+    for line in text.split('\n'):
+        while len(line) > limit:
+            # One huge line: cut it at a space
+            if current:
+                chunks.append('\n'.join(current))
+                current = []
+                length = 0
+            cut = line.rfind(' ', 0, limit)
+            if cut <= 0:
+                cut = limit
+            if markup:
+                cut = _cut_outside_tags(line, cut)
+            chunks.append(line[:cut])
+            line = line[cut:].lstrip(' ')
+        
+        if current and length + len(line) + 1 > limit:
+            chunks.append('\n'.join(current))
+            current = []
+            length = 0
+        current.append(line)
+        length += len(line) + 1
+    
+    if current:
+        chunks.append('\n'.join(current))
+    if markup and len(chunks) > 1:
+        chunks = _balance_tags(chunks)
+    return chunks
+
+
+def _cut_outside_tags(line, cut):
+    """Move a cut that falls inside a markup tag to one side of the tag"""
+    for match in MARKUP_TAG.finditer(line, max(0, cut - 64), cut + 64):
+        if match.start() < cut < match.end():
+            # A tag at the very start of the line stays with that piece
+            return match.start() or match.end()
+    return cut
+
+
+def _balance_tags(chunks):
+    """Close the tags each piece leaves open and reopen them in the next"""
+    balanced = []
+    # Open tags in order: (name, tag as written)
+    open_tags = []
+    
+    for chunk in chunks:
+        prefix = ''.join(tag for _, tag in open_tags)
+        for match in MARKUP_TAG.finditer(chunk):
+            closing, name = match.group(1), match.group(2)
+            if name == 'anchor':
+                continue
+            if not closing:
+                open_tags.append((name, match.group(0)))
+                continue
+            # [/name] closes the innermost open tag of that name
+            for i in range(len(open_tags) - 1, -1, -1):
+                if open_tags[i][0] == name:
+                    del open_tags[i]
+                    break
+        suffix = ''.join(f'[/{name}]' for name, _ in reversed(open_tags))
+        balanced.append(prefix + chunk + suffix)
+    return balanced
+
+
+class TextLayoutCache:
+    """
+    LRU cache of rendered text, bounded by texture memory
+    
+    Keys describe everything that changes the rendering (text, wrap
+    width, font and color); values are core labels, which keep their
+    texture and re-render it if the GL context is lost.
+    """
+    
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+    
+    def get(self, key, create):
+        """Return the cached label for key, calling create() on a miss"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+        
+        self.misses += 1
+        label = create()
+        width, height = label.texture.size
+        size = width * height * 4
+        self._entries[key] = (label, size)
+        self._bytes += size
+        
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+        return label
+    
+    def clear(self):
+        """Drop every cached texture"""
+        self._entries.clear()
+        self._bytes = 0
+
+
+# Shared by every bubble; about 32 MB of textures
+text_cache = TextLayoutCache(32 * 1024 * 1024)
+
+
+class MessageText(Widget):
+    """
+    Wrapped message text drawn from cached textures
+    
+    Replaces a Label inside MessageBubble. Rendering the same message at
+    the same width again (recycled bubbles, rebuilt transcripts, reloaded
+    sessions, rotating back) reuses the cached textures, and long text is
+    drawn as a stack of smaller textures.
+    """
+    
+    text = StringProperty('')
+    font_size = NumericProperty('15sp')
+    font_name = StringProperty('Roboto')
+    color = ColorProperty([1, 1, 1, 1])
+    markup = BooleanProperty(False)
+    
+    # Space left and right of the text, and above and below it (px)
+    PADDING_X = 12
+    PADDING_Y = 10
+    
+    def __init__(self, **kwargs):
+        self._labels = []
+        self._rects = []
+        self._render_trigger = Clock.create_trigger(self._render, -1)
+        super().__init__(**kwargs)
+        
+        for name in ('text', 'width', 'font_size', 'font_name', 'color', 'markup'):
+            self.fbind(name, self._render_trigger)
+        self.fbind('pos', self._place)
+        self._render_trigger()
+    
+    def _render(self, *args):
+        """Fetch (or lay out) the textures for the current text and width"""
+        width = int(self.width - 2 * self.PADDING_X)
+        if width <= 0 or not self.text:
+            self._labels = []
+        else:
+            theme = (self.font_name, tuple(self.color), self.markup)
+            self._labels = [
+                text_cache.get(
+                    (chunk, width, self.font_size, theme),
+                    lambda chunk=chunk: self._layout(chunk, width)
+                )
+                for chunk in split_text(self.text, markup=self.markup)
+            ]
+        
+        self.canvas.clear()
+        self._rects = []
+        with self.canvas:
+            Color(1, 1, 1, 1)
+            for label in self._labels:
+                self._rects.append(Rectangle(texture=label.texture, size=label.texture.size))
+        
+        self.height = sum(rect.size[1] for rect in self._rects) + 2 * self.PADDING_Y
+        self._place()
+    
+    def _layout(self, text, width):
+        """Lay out and rasterize one piece of text"""
+        label_class = MarkupLabel if self.markup else CoreLabel
+        label = label_class(
+            text=text,
+            font_size=self.font_size,
+            font_name=self.font_name,
+            color=tuple(self.color),
+            text_size=(width, None),
+            halign='left',
+            valign='top'
+        )
+        label.refresh()
+        return label
+    
+    def _place(self, *args):
+        """Stack the textures top to bottom inside the padding"""
+        top = self.top - self.PADDING_Y
+        for rect in self._rects:
+            top -= rect.size[1]
+            rect.pos = (self.x + self.PADDING_X, top)
@@ -1,6 +1,25 @@
-# Services package
-from .api_service import APIService
-from .voice_service import VoiceService
-from .storage_service import StorageService
-
-__all__ = ['APIService', 'VoiceService', 'StorageService']
+# Services package
+# Services are imported on first access so startup only loads what it uses
+import importlib
+
+_MODULES = {
+    'APIService': '.api_service',
+    'AsyncAPIService': '.async_api_service',
+    'HealthMonitor': '.health_monitor',
+    'OutboxService': '.outbox_service',
+    'SearchIndex': '.search_index',
+    'VoiceService': '.voice_service',
+    'StorageService': '.storage_service',
+}
+
+
+def __getattr__(name):
+    if name in _MODULES:
+        return getattr(importlib.import_module(_MODULES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = [
+    'APIService', 'AsyncAPIService', 'HealthMonitor', 'OutboxService',
+    'SearchIndex', 'VoiceService', 'StorageService'
+]
@@ -0,0 +1,57 @@
+"""
+Adaptive Timeout - Read timeouts that follow observed response times
+"""
+
+import threading
+
+
+class AdaptiveTimeout:
+    """
+    Timeout estimated from recent response times, like TCP's RTO
+    
+    Keeps a smoothed mean and mean deviation of observed durations
+    (RFC 6298); the timeout is mean + 4 * deviation, but never below the
+    floor or above the configured timeout (the ceiling). Until enough
+    samples are in, the ceiling is used. Each timeout doubles the value
+    until the next response arrives, so a backend that has become slower
+    is not cut off on every request.
+    """
+    
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+    K = 4
+    
+    # Samples needed before the estimate replaces the ceiling
+    MIN_SAMPLES = 5
+    
+    def __init__(self, floor: float):
+        self.floor = floor
+        self.samples = 0
+        self.mean = 0.0
+        self.deviation = 0.0
+        self._backoff = 1
+        self._lock = threading.Lock()
+    
+    def observe(self, seconds: float):
+        """Record how long a response took"""
+        with self._lock:
+            if self.samples == 0:
+                self.mean = seconds
+                self.deviation = seconds / 2
+            else:
+                self.deviation += self.BETA * (abs(self.mean - seconds) - self.deviation)
+                self.mean += self.ALPHA * (seconds - self.mean)
+            self.samples += 1
+            self._backoff = 1
+    
+    def expired(self):
+        """Record that a request timed out"""
+        with self._lock:
+            self._backoff = min(self._backoff * 2, 64)
+    
+    def value(self, ceiling: float) -> float:
+        """Current timeout in seconds"""
+        if self.samples < self.MIN_SAMPLES:
+            return ceiling
+        estimate = (self.mean + self.K * self.deviation) * self._backoff
+        return min(max(estimate, self.floor), ceiling)
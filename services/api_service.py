@@ -1,175 +1,830 @@
-"""
-API Service - Backend communication
-"""
-
-import requests
-import json
-from typing import Optional, Dict, Any, List
-
-
-class APIService:
-    """
-    Handles all API communication with the J.A.R.V.I.S backend
-    """
-    
-    def __init__(self, base_url: str = 'http://localhost:8000'):
-        self.base_url = base_url
-        self.timeout = 60  # seconds
-        
-    def set_base_url(self, url: str):
-        """Update the base URL"""
-        self.base_url = url.rstrip('/')
-    
-    def _get_url(self, endpoint: str) -> str:
-        """Get full URL for an endpoint"""
-        return f"{self.base_url}{endpoint}"
-    
-    def send_message(
-        self,
-        message: str,
-        session_id: Optional[str] = None,
-        mode: str = 'general'
-    ) -> Dict[str, Any]:
-        """
-        Send a message to the AI
-        
-        Args:
-            message: The user's message
-            session_id: Optional session ID for conversation continuity
-            mode: 'general' or 'realtime'
-        
-        Returns:
-            Dict with response and session_id
-        """
-        endpoint = '/chat' if mode == 'general' else '/chat/realtime'
-        
-        payload = {
-            'message': message
-        }
-        
-        if session_id:
-            payload['session_id'] = session_id
-        
-        try:
-            response = requests.post(
-                self._get_url(endpoint),
-                json=payload,
-                timeout=self.timeout
-            )
-            
-            response.raise_for_status()
-            return response.json()
-            
-        except requests.exceptions.Timeout:
-            return {
-                'response': 'Sorry, the request timed out. Please try again.',
-                'session_id': session_id
-            }
-        except requests.exceptions.ConnectionError:
-            return {
-                'response': 'Cannot connect to the server. Please check your connection.',
-                'session_id': session_id
-            }
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 429:
-                return {
-                    'response': "You've reached your daily API limit. Please try again later.",
-                    'session_id': session_id
-                }
-            return {
-                'response': f'Server error: {e.response.status_code}',
-                'session_id': session_id
-            }
-        except Exception as e:
-            return {
-                'response': f'An error occurred: {str(e)}',
-                'session_id': session_id
-            }
-    
-    def get_history(self, session_id: str) -> Dict[str, Any]:
-        """
-        Get chat history for a session
-        
-        Args:
-            session_id: The session ID
-        
-        Returns:
-            Dict with messages list
-        """
-        try:
-            response = requests.get(
-                self._get_url(f'/chat/history/{session_id}'),
-                timeout=self.timeout
-            )
-            
-            response.raise_for_status()
-            return response.json()
-            
-        except Exception as e:
-            print(f"Error getting history: {e}")
-            return {'messages': []}
-    
-    def get_all_sessions(self) -> List[Dict[str, Any]]:
-        """
-        Get all chat sessions
-        
-        Returns:
-            List of session objects
-        """
-        try:
-            response = requests.get(
-                self._get_url('/chat/sessions'),
-                timeout=self.timeout
-            )
-            
-            response.raise_for_status()
-            return response.json().get('sessions', [])
-            
-        except Exception as e:
-            print(f"Error getting sessions: {e}")
-            return []
-    
-    def delete_session(self, session_id: str) -> bool:
-        """
-        Delete a chat session
-        
-        Args:
-            session_id: The session ID to delete
-        
-        Returns:
-            True if successful
-        """
-        try:
-            response = requests.delete(
-                self._get_url(f'/chat/session/{session_id}'),
-                timeout=self.timeout
-            )
-            
-            response.raise_for_status()
-            return True
-            
-        except Exception as e:
-            print(f"Error deleting session: {e}")
-            return False
-    
-    def health_check(self) -> Dict[str, Any]:
-        """
-        Check server health status
-        
-        Returns:
-            Health status dict
-        """
-        try:
-            response = requests.get(
-                self._get_url('/health'),
-                timeout=10
-            )
-            
-            response.raise_for_status()
-            return response.json()
-            
-        except Exception as e:
-            return {
-                'status': 'error',
-                'message': str(e)
-            }
+"""
+API Service - Backend communication
+"""
+
+import json
+import random
+import threading
+import time
+from typing import Optional, Dict, Any, List, Callable, Iterator, Tuple, TYPE_CHECKING
+
+from .adaptive_timeout import AdaptiveTimeout
+from .circuit_breaker import CircuitBreaker
+from . import payload_codec
+from .latency_tracer import LatencyTracer, create_tracing_adapter
+from .response_cache import ResponseCache
+
+if TYPE_CHECKING:
+    import requests
+
+
+# (connect, read) timeouts in seconds for each kind of endpoint. Read
+# timeouts adapt to observed response times; these are the upper bounds
+DEFAULT_TIMEOUTS = {
+    'chat': (5, 60),
+    'chat_realtime': (5, 90),
+    'history': (5, 20),
+    'sessions': (5, 15),
+    'delete': (5, 15),
+    'health': (3, 7)
+}
+
+# Lowest adapted read timeout for each kind of endpoint (seconds)
+READ_TIMEOUT_FLOORS = {
+    'chat': 10,
+    'chat_realtime': 30,
+    'history': 3,
+    'sessions': 3,
+    'delete': 3,
+    'health': 2
+}
+
+# Seconds a successful read is served from the cache; sending a message
+# or deleting a session drops the reads it makes stale right away
+DEFAULT_CACHE_TTLS = {
+    'history': 30,
+    'sessions': 30,
+    'health': 10
+}
+
+# Methods that are safe to retry without side effects on the server
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+
+# Transient gateway errors worth retrying for idempotent requests
+RETRY_STATUSES = (502, 503, 504)
+
+# Error kinds (the 'error' key of failed chat replies) that may succeed
+# if the same message is sent again later
+RETRYABLE_ERRORS = ('connection', 'timeout', 'server')
+
+
+class APIService:
+    """
+    Handles all API communication with the J.A.R.V.I.S backend
+    
+    Requests share one pooled keep-alive session, so repeated calls reuse
+    the same TCP/TLS connection instead of opening a new one each time.
+    Reads (history, sessions, health) go through a short-lived cache, and
+    identical reads made at the same time share one request. While the
+    backend is unreachable a circuit breaker makes requests fail at once
+    instead of waiting for their timeouts.
+    """
+    
+    def __init__(
+        self,
+        base_url: str = 'http://localhost:8000',
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0
+    ):
+        self.base_url = base_url.rstrip('/')
+        self.timeouts: Dict[str, Tuple[float, float]] = dict(DEFAULT_TIMEOUTS)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        
+        self._session = None
+        self._session_lock = threading.Lock()
+        
+        # Timings of every request, per endpoint
+        self.tracer = LatencyTracer()
+        
+        # Recent read responses
+        self.cache = ResponseCache()
+        self.cache_ttls: Dict[str, float] = dict(DEFAULT_CACHE_TTLS)
+        
+        # Whether the backend is reachable
+        self.breaker = CircuitBreaker()
+        
+        # Read timeouts per timeout key (streams separately, as their
+        # headers arrive long before the reply is complete)
+        self.adaptive_timeouts = True
+        self._read_timeouts: Dict[str, AdaptiveTimeout] = {}
+        
+        # Ask for MessagePack on bulk reads (if msgpack is installed), and
+        # compress request bodies once the server says it accepts that
+        self.binary_payloads = True
+        self.compress_requests = True
+        self._request_encoding: Optional[str] = None
+        
+    def set_base_url(self, url: str):
+        """Update the base URL, rebuilding the connection pool if it changed"""
+        url = url.rstrip('/')
+        if url == self.base_url:
+            return
+        
+        self.base_url = url
+        self.cache.clear()
+        self.breaker.reset()
+        self._read_timeouts.clear()
+        self._request_encoding = None
+        self.reset_session()
+    
+    def _get_url(self, endpoint: str) -> str:
+        """Get full URL for an endpoint"""
+        return f"{self.base_url}{endpoint}"
+    
+    # Connection pool
+    def _create_session(self) -> 'requests.Session':
+        """Create a pooled HTTP session"""
+        # requests is imported on first use so it stays off the startup path
+        import requests
+        
+        session = requests.Session()
+        
+        # Retries are handled in _request so backoff can be jittered; the
+        # adapter records connect time and time to first byte
+        adapter = create_tracing_adapter(pool_connections=2, pool_maxsize=4, max_retries=0)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        
+        return session
+    
+    def _get_session(self) -> 'requests.Session':
+        """Get the shared session, creating it on first use"""
+        with self._session_lock:
+            if self._session is None:
+                self._session = self._create_session()
+            return self._session
+    
+    def reset_session(self):
+        """Close pooled connections; the next request opens a fresh pool"""
+        with self._session_lock:
+            session = self._session
+            self._session = None
+        
+        if session is not None:
+            session.close()
+    
+    def _backoff_delay(self, attempt: int, response=None) -> float:
+        """Full-jitter exponential backoff, honouring Retry-After if present"""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
+    
+    def _timeout(self, timeout_key: str, stream: bool) -> Tuple[float, float]:
+        """(connect, read) timeout for a request, with the read timeout adapted"""
+        connect, read = self.timeouts[timeout_key]
+        if self.adaptive_timeouts:
+            read = self._read_timeout(timeout_key, stream).value(read)
+        return connect, read
+    
+    def _read_timeout(self, timeout_key: str, stream: bool) -> AdaptiveTimeout:
+        """Response time estimate for a kind of request"""
+        key = f'{timeout_key}:stream' if stream else timeout_key
+        estimate = self._read_timeouts.get(key)
+        if estimate is None:
+            estimate = self._read_timeouts.setdefault(
+                key, AdaptiveTimeout(READ_TIMEOUT_FLOORS.get(timeout_key, 3))
+            )
+        return estimate
+    
+    def _request(
+        self,
+        method: str,
+        endpoint: str,
+        timeout_key: str,
+        retry: Optional[bool] = None,
+        probe: bool = False,
+        **kwargs
+    ) -> 'requests.Response':
+        """
+        Send a request through the pooled session
+        
+        Idempotent requests are retried on connection failures and
+        gateway errors with jittered exponential backoff. The request is
+        traced in self.tracer; a streamed response's trace completes when
+        it is closed. Outcomes feed the circuit breaker; while it is open
+        the request fails immediately with a ConnectionError. A json=
+        body is compressed if the server accepts compressed requests.
+        
+        Args:
+            method: HTTP method
+            endpoint: Endpoint path, e.g. '/chat'
+            timeout_key: Key into self.timeouts
+            retry: Override whether the request may be retried
+            probe: Send even if the circuit is open (health probes)
+            **kwargs: Passed through to requests
+        
+        Returns:
+            The response (status is not checked)
+        """
+        import requests
+        
+        if not probe and not self.breaker.allow_request():
+            # Known to be down: fail now rather than after a timeout
+            raise requests.exceptions.ConnectionError(
+                f'Backend unavailable, next attempt in {self.breaker.retry_in():.0f} s'
+            )
+        
+        if retry is None:
+            retry = method.upper() in IDEMPOTENT_METHODS
+        attempts = self.max_retries + 1 if retry else 1
+        stream = bool(kwargs.get('stream'))
+        read_timeout = self._read_timeout(timeout_key, stream)
+        has_body = 'json' in kwargs
+        payload = kwargs.pop('json', None)
+        headers = dict(kwargs.pop('headers', None) or {})
+        
+        def send(encoding):
+            if has_body:
+                kwargs['data'], body_headers = payload_codec.encode_json(payload, encoding)
+                headers.pop('Content-Encoding', None)
+                headers.update(body_headers)
+            return self._get_session().request(
+                method,
+                self._get_url(endpoint),
+                timeout=self._timeout(timeout_key, stream),
+                headers=headers,
+                **kwargs
+            )
+        
+        trace = self.tracer.begin(method, endpoint)
+        
+        try:
+            for attempt in range(attempts):
+                # Stop retrying once other requests have opened the circuit
+                last_attempt = attempt == attempts - 1 or (
+                    not probe and self.breaker.status == 'offline'
+                )
+                
+                try:
+                    encoding = self._request_encoding if self.compress_requests else None
+                    response = send(encoding)
+                    self._note_request_encoding(response)
+                    
+                    if response.status_code == 415 and 'Content-Encoding' in headers:
+                        # Compressed bodies are not accepted after all
+                        response.content
+                        self._request_encoding = None
+                        response = send(None)
+                except requests.exceptions.ReadTimeout:
+                    read_timeout.expired()
+                    if method.upper() in IDEMPOTENT_METHODS:
+                        self.breaker.record_failure()
+                    else:
+                        # The backend took the message and is still working
+                        # on it, which does not show that it is down
+                        self.breaker.record_slow_reply()
+                    raise
+                except requests.exceptions.ConnectionError:
+                    # Covers connect timeouts too; read timeouts are not retried
+                    self.breaker.record_failure()
+                    if last_attempt:
+                        raise
+                    time.sleep(self._backoff_delay(attempt))
+                    continue
+                
+                if response.status_code in RETRY_STATUSES:
+                    self.breaker.record_failure()
+                    if not last_attempt:
+                        delay = self._backoff_delay(attempt, response)
+                        # Read the error body so the connection can be reused
+                        response.content
+                        time.sleep(delay)
+                        continue
+                elif probe and not response.ok:
+                    # A health probe needs a healthy answer
+                    self.breaker.record_failure()
+                else:
+                    # Any other answer, errors included, shows the backend is up
+                    self.breaker.record_success()
+                    read_timeout.observe(response.elapsed.total_seconds())
+                
+                if kwargs.get('stream'):
+                    self._trace_on_close(response, trace)
+                else:
+                    self.tracer.finish(trace, response)
+                return response
+        except Exception as e:
+            self.tracer.finish(trace, error=e)
+            raise
+        finally:
+            self.tracer.detach()
+    
+    def _note_request_encoding(self, response: 'requests.Response'):
+        """Remember which request codings the server accepts (RFC 7694)"""
+        accept_encoding = response.headers.get('Accept-Encoding')
+        if accept_encoding is not None:
+            self._request_encoding = payload_codec.request_encoding(accept_encoding)
+    
+    def _decode(self, response: 'requests.Response') -> Any:
+        """Parse a JSON or MessagePack response body"""
+        return payload_codec.decode(
+            response.content,
+            response.headers.get('Content-Type', '')
+        )
+    
+    def _trace_on_close(self, response: 'requests.Response', trace):
+        """Complete a streamed request's trace once its body is closed"""
+        close = response.close
+        
+        def close_and_finish():
+            close()
+            self.tracer.finish(trace, response)
+        
+        response.close = close_and_finish
+    
+    def _invalidate_session(self, session_id: Optional[str]):
+        """Drop cached reads that a write to a session makes stale"""
+        tags = ['sessions']
+        if session_id:
+            tags.append(f'history:{session_id}')
+        self.cache.invalidate(*tags)
+    
+    def _chat_endpoint(self, mode: str) -> Tuple[str, str]:
+        """
+        Endpoint and timeout key for a chat mode
+        
+        Realtime replies involve a web search and take much longer, so
+        they get their own read timeout estimate.
+        """
+        if mode == 'general':
+            return '/chat', 'chat'
+        return '/chat/realtime', 'chat_realtime'
+    
+    def send_message(
+        self,
+        message: str,
+        session_id: Optional[str] = None,
+        mode: str = 'general',
+        idempotency_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Send a message to the AI
+        
+        Args:
+            message: The user's message
+            session_id: Optional session ID for conversation continuity
+            mode: 'general' or 'realtime'
+            idempotency_key: Client-generated key sent as Idempotency-Key;
+                with a key the request is retried like an idempotent one
+        
+        Returns:
+            Dict with response and session_id, plus 'error' on failure
+        """
+        endpoint, timeout_key = self._chat_endpoint(mode)
+        
+        payload = {
+            'message': message
+        }
+        
+        if session_id:
+            payload['session_id'] = session_id
+        
+        headers = {}
+        if idempotency_key:
+            headers['Idempotency-Key'] = idempotency_key
+        
+        try:
+            response = self._request(
+                'POST',
+                endpoint,
+                timeout_key,
+                retry=bool(idempotency_key),
+                json=payload,
+                headers=headers
+            )
+            
+            response.raise_for_status()
+            return response.json()
+            
+        except Exception as e:
+            return self._error_response(e, session_id)
+        
+        finally:
+            # Even a failed send may have reached the server
+            self._invalidate_session(session_id)
+    
+    def send_message_stream(
+        self,
+        message: str,
+        session_id: Optional[str] = None,
+        mode: str = 'general',
+        on_chunk: Optional[Callable[[str], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+        idempotency_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Send a message to the AI and stream the reply as it is generated
+        
+        The server may answer with server-sent events, a chunked plain
+        text body, or a regular JSON body (delivered as a single chunk).
+        
+        Args:
+            message: The user's message
+            session_id: Optional session ID for conversation continuity
+            mode: 'general' or 'realtime'
+            on_chunk: Called on the calling thread with each text chunk
+            cancel_event: When set, the stream is closed and the text so
+                far is returned with 'cancelled': True
+            idempotency_key: Client-generated key sent as Idempotency-Key
+        
+        Returns:
+            Dict with the full response and session_id, like send_message
+        """
+        endpoint, timeout_key = self._chat_endpoint(mode)
+        
+        payload = {
+            'message': message,
+            'stream': True
+        }
+        
+        if session_id:
+            payload['session_id'] = session_id
+        
+        headers = {'Accept': 'text/event-stream, text/plain, application/json'}
+        if idempotency_key:
+            headers['Idempotency-Key'] = idempotency_key
+        
+        parts = []
+        
+        try:
+            with self._request(
+                'POST',
+                endpoint,
+                timeout_key,
+                retry=bool(idempotency_key),
+                json=payload,
+                headers=headers,
+                stream=True
+            ) as response:
+                response.raise_for_status()
+                
+                content_type = response.headers.get('Content-Type', '')
+                if 'application/json' in content_type:
+                    # Server does not stream; hand over the whole reply at once
+                    data = response.json()
+                    if on_chunk and data.get('response'):
+                        on_chunk(data['response'])
+                    return data
+                
+                for event in self._iter_stream_events(response):
+                    if cancel_event is not None and cancel_event.is_set():
+                        # Leaving the block closes the connection mid-stream
+                        return {
+                            'response': ''.join(parts),
+                            'session_id': session_id,
+                            'cancelled': True
+                        }
+                    
+                    if event.get('session_id'):
+                        session_id = event['session_id']
+                    
+                    chunk = event.get('chunk')
+                    if chunk:
+                        parts.append(chunk)
+                        if on_chunk:
+                            on_chunk(chunk)
+            
+            return {
+                'response': ''.join(parts),
+                'session_id': session_id
+            }
+            
+        except Exception as e:
+            result = self._error_response(e, session_id)
+            if parts:
+                # Keep what already arrived and note the interruption
+                result['response'] = ''.join(parts) + '\n\n' + result['response']
+                result['partial'] = True
+            return result
+        
+        finally:
+            self._invalidate_session(payload.get('session_id'))
+    
+    def _iter_stream_events(self, response) -> Iterator[Dict[str, Any]]:
+        """
+        Parse a streamed chat response into events
+        
+        Args:
+            response: A requests response opened with stream=True
+        
+        Yields:
+            Dicts with an optional 'chunk' of text and optional 'session_id'
+        """
+        content_type = response.headers.get('Content-Type', '')
+        if 'charset' not in content_type:
+            response.encoding = 'utf-8'
+        
+        if 'text/event-stream' not in content_type:
+            # Plain chunked transfer: every chunk is reply text
+            for text in response.iter_content(chunk_size=None, decode_unicode=True):
+                if text:
+                    yield {'chunk': text}
+            return
+        
+        # Keep reading after the end marker so the body is fully consumed
+        # and the connection can go back to the pool
+        done = False
+        data_lines = []
+        for line in response.iter_lines(decode_unicode=True):
+            if done:
+                continue
+            
+            if line == '':
+                # A blank line terminates an SSE event
+                if data_lines:
+                    event = self._parse_stream_data('\n'.join(data_lines))
+                    data_lines = []
+                    if event is None:
+                        done = True
+                    else:
+                        yield event
+            elif line.startswith('data:'):
+                data = line[5:]
+                data_lines.append(data[1:] if data.startswith(' ') else data)
+        
+        if data_lines and not done:
+            event = self._parse_stream_data('\n'.join(data_lines))
+            if event is not None:
+                yield event
+    
+    def _parse_stream_data(self, data: str) -> Optional[Dict[str, Any]]:
+        """
+        Convert one SSE data payload into an event
+        
+        Returns:
+            Event dict, or None when the server signals the end of the reply
+        """
+        if data.strip() == '[DONE]':
+            return None
+        
+        try:
+            parsed = json.loads(data)
+        except ValueError:
+            return {'chunk': data}
+        
+        if not isinstance(parsed, dict):
+            return {'chunk': str(parsed)}
+        
+        if parsed.get('done'):
+            return {'session_id': parsed.get('session_id')}
+        
+        return {
+            'chunk': parsed.get('chunk') or parsed.get('token') or parsed.get('delta') or '',
+            'session_id': parsed.get('session_id')
+        }
+    
+    def _error_response(self, error: Exception, session_id: Optional[str]) -> Dict[str, Any]:
+        """
+        Build the reply shown to the user when a chat request fails
+        
+        Args:
+            error: The exception raised by the request
+            session_id: Session ID to echo back
+        
+        Returns:
+            Dict with a user-facing response, session_id and the error
+            kind ('timeout', 'connection', 'rate_limited', 'server',
+            'http' or 'unknown')
+        """
+        import requests
+        
+        if isinstance(error, requests.exceptions.Timeout):
+            kind = 'timeout'
+            message = 'Sorry, the request timed out. Please try again.'
+        elif isinstance(error, requests.exceptions.ConnectionError):
+            kind = 'connection'
+            message = 'Cannot connect to the server. Please check your connection.'
+        elif isinstance(error, requests.exceptions.HTTPError):
+            status = error.response.status_code
+            if status == 429:
+                kind = 'rate_limited'
+                message = "You've reached your daily API limit. Please try again later."
+            else:
+                kind = 'server' if status >= 500 else 'http'
+                message = f'Server error: {status}'
+        else:
+            kind = 'unknown'
+            message = f'An error occurred: {str(error)}'
+        
+        return {
+            'response': message,
+            'session_id': session_id,
+            'error': kind
+        }
+    
+    def get_history(
+        self,
+        session_id: str,
+        limit: Optional[int] = None,
+        before: Optional[str] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Get chat history for a session
+        
+        With a limit, one page of the newest messages (or the messages
+        older than `before`) is returned. Passing the validators from a
+        cached copy makes this a conditional GET; an unchanged history
+        costs one empty 304 response, or no request at all if the same
+        page was fetched or revalidated within the cache TTL.
+        
+        Args:
+            session_id: The session ID
+            limit: Maximum number of messages to return
+            before: Cursor from a previous page, to get older messages
+            etag: ETag of the cached copy (sent as If-None-Match)
+            last_modified: Last-Modified of the cached copy
+                (sent as If-Modified-Since)
+        
+        Returns:
+            Dict with messages list (oldest first), has_more and the
+            `before` cursor for the next older page, plus the response's
+            etag and last_modified; {'not_modified': True} if the cached
+            copy is current, or a dict with 'error' on failure
+        """
+        key = ('history', session_id, limit, before)
+        cached = self.cache.get(key)
+        
+        if cached is not None:
+            if cached.get('not_modified'):
+                # Only the validators that were last confirmed are known
+                if (etag, last_modified) == (cached['etag'], cached['last_modified']):
+                    return {'messages': [], 'not_modified': True}
+            elif etag and etag == cached.get('etag'):
+                return {'messages': [], 'not_modified': True}
+            else:
+                return cached
+        
+        return self.cache.fetch(
+            key,
+            lambda: self._fetch_history(session_id, limit, before, etag, last_modified),
+            self.cache_ttls['history'],
+            tags=(f'history:{session_id}',),
+            cacheable=lambda history: not history.get('error'),
+            flight_key=key + (etag, last_modified)
+        )
+    
+    def _fetch_history(
+        self,
+        session_id: str,
+        limit: Optional[int],
+        before: Optional[str],
+        etag: Optional[str],
+        last_modified: Optional[str]
+    ) -> Dict[str, Any]:
+        """Request one history page (see get_history)"""
+        params = {}
+        if limit is not None:
+            params['limit'] = limit
+        if before is not None:
+            params['before'] = before
+        
+        headers = {'Accept': payload_codec.accept_header(self.binary_payloads)}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        
+        try:
+            response = self._request(
+                'GET',
+                f'/chat/history/{session_id}',
+                'history',
+                params=params,
+                headers=headers
+            )
+            
+            if response.status_code == 304:
+                # The validators are kept so the cache can answer repeats
+                return {
+                    'messages': [],
+                    'not_modified': True,
+                    'etag': etag,
+                    'last_modified': last_modified
+                }
+            
+            response.raise_for_status()
+            history = self._decode(response)
+            history['etag'] = response.headers.get('ETag')
+            history['last_modified'] = response.headers.get('Last-Modified')
+            
+            # Servers without pagination return everything in one page
+            messages = history.setdefault('messages', [])
+            history['has_more'] = bool(history.get('has_more')) and bool(messages)
+            if history['has_more'] and not history.get('before'):
+                oldest = messages[0]
+                history['before'] = oldest.get('id') or oldest.get('timestamp')
+            
+            return history
+            
+        except Exception as e:
+            print(f"Error getting history: {e}")
+            return {'messages': [], 'error': str(e)}
+    
+    def get_all_sessions(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get all chat sessions
+        
+        Returns:
+            List of session objects, or None if the request failed
+        """
+        cached = self.cache.get(('sessions',))
+        if cached is not None:
+            return cached
+        
+        return self.cache.fetch(
+            ('sessions',),
+            self._fetch_sessions,
+            self.cache_ttls['sessions'],
+            tags=('sessions',),
+            cacheable=lambda sessions: sessions is not None
+        )
+    
+    def _fetch_sessions(self) -> Optional[List[Dict[str, Any]]]:
+        """Request the session list (see get_all_sessions)"""
+        try:
+            response = self._request(
+                'GET',
+                '/chat/sessions',
+                'sessions',
+                headers={'Accept': payload_codec.accept_header(self.binary_payloads)}
+            )
+            
+            response.raise_for_status()
+            return self._decode(response).get('sessions', [])
+            
+        except Exception as e:
+            print(f"Error getting sessions: {e}")
+            return None
+    
+    def delete_session(self, session_id: str) -> bool:
+        """
+        Delete a chat session
+        
+        Args:
+            session_id: The session ID to delete
+        
+        Returns:
+            True if successful
+        """
+        try:
+            response = self._request('DELETE', f'/chat/session/{session_id}', 'delete')
+            
+            response.raise_for_status()
+            return True
+            
+        except Exception as e:
+            print(f"Error deleting session: {e}")
+            return False
+        
+        finally:
+            self._invalidate_session(session_id)
+    
+    def health_check(self) -> Dict[str, Any]:
+        """
+        Check server health status
+        
+        Returns:
+            Health status dict
+        """
+        cached = self.cache.get(('health',))
+        if cached is not None:
+            return cached
+        
+        return self.cache.fetch(
+            ('health',),
+            self._fetch_health,
+            self.cache_ttls['health'],
+            cacheable=lambda health: health.get('status') != 'error'
+        )
+    
+    def _fetch_health(self) -> Dict[str, Any]:
+        """Request the server status (see health_check)"""
+        try:
+            response = self._request('GET', '/health', 'health', retry=False)
+            
+            response.raise_for_status()
+            return response.json()
+            
+        except Exception as e:
+            return {
+                'status': 'error',
+                'message': str(e)
+            }
+    
+    def ping(self) -> bool:
+        """
+        Probe /health, bypassing the cache and the circuit breaker
+        
+        Used by HealthMonitor. _request records the outcome with the
+        breaker once: a successful probe closes the circuit, a failed one
+        counts as a failure without restarting the cooldown.
+        
+        Returns:
+            Whether the backend answered healthy
+        """
+        try:
+            response = self._request('GET', '/health', 'health', retry=False, probe=True)
+            # Reading the body returns the connection to the pool
+            response.content
+            return response.ok
+        except Exception:
+            return False
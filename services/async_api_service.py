@@ -0,0 +1,214 @@
+"""
+Async API Service - Cancellable backend calls on a shared event loop
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from functools import partial
+from typing import Optional, Callable, Any
+
+from kivy.clock import Clock
+
+
+class APIRequest:
+    """
+    Handle for an in-flight API call
+    
+    Cancelling drops the result (the callback never runs) and signals
+    streaming calls to abort their connection.
+    """
+    
+    def __init__(self):
+        self.future: Optional[Future] = None
+        self.cancel_event = threading.Event()
+    
+    def cancel(self):
+        """Cancel the request; safe to call more than once"""
+        self.cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+    
+    def cancelled(self) -> bool:
+        """True once cancel() has been called"""
+        return self.cancel_event.is_set()
+    
+    def done(self) -> bool:
+        """True when the request finished, failed or was cancelled"""
+        return self.future is not None and self.future.done()
+
+
+class AsyncAPIService:
+    """
+    Runs APIService calls on one long-lived asyncio event loop thread
+    
+    Each method mirrors APIService but returns an APIRequest right away.
+    Results are handed to `callback` on the Kivy main thread via Clock.
+    The requests library is blocking, so the loop awaits calls on a small
+    shared worker pool instead of starting a thread per request.
+    """
+    
+    def __init__(self, api_service, max_workers: int = 4):
+        self.api = api_service
+        self._max_workers = max_workers
+        self._loop = None
+        self._thread = None
+        self._executor = None
+        self._lock = threading.Lock()
+    
+    def start(self):
+        """Start the event loop thread if it is not running"""
+        with self._lock:
+            if self._loop is not None:
+                return
+            
+            self._loop = asyncio.new_event_loop()
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_workers,
+                thread_name_prefix='jarvis-api'
+            )
+            self._loop.set_default_executor(self._executor)
+            
+            self._thread = threading.Thread(
+                target=self._run_loop,
+                name='jarvis-api-loop'
+            )
+            self._thread.daemon = True
+            self._thread.start()
+    
+    def _run_loop(self):
+        """Event loop thread body"""
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+    
+    def stop(self):
+        """Stop the event loop thread"""
+        with self._lock:
+            loop, thread, executor = self._loop, self._thread, self._executor
+            self._loop = self._thread = self._executor = None
+        
+        if loop is None:
+            return
+        
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=1)
+        executor.shutdown(wait=False)
+    
+    def submit(
+        self,
+        func: Callable,
+        *args,
+        callback: Optional[Callable[[Any], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+        request: Optional[APIRequest] = None,
+        executor: Optional[Executor] = None,
+        **kwargs
+    ) -> APIRequest:
+        """
+        Run a blocking call on the event loop
+        
+        Args:
+            func: Function to call
+            callback: Called on the main thread with the result
+            on_error: Called on the main thread if func raises
+            request: Existing handle to use (created if omitted)
+            executor: Run func here instead of the shared worker pool,
+                e.g. for work that may block for a long time
+        
+        Returns:
+            APIRequest handle that can be cancelled
+        """
+        self.start()
+        
+        if request is None:
+            request = APIRequest()
+        
+        request.future = asyncio.run_coroutine_threadsafe(
+            self._call(func, args, kwargs, executor),
+            self._loop
+        )
+        request.future.add_done_callback(
+            lambda future: self._deliver(request, callback, on_error)
+        )
+        
+        return request
+    
+    async def _call(self, func, args, kwargs, executor=None):
+        """Await a blocking call on the worker pool (or executor)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, partial(func, *args, **kwargs))
+    
+    def _deliver(self, request, callback, on_error):
+        """Pass a finished request's outcome to the main thread"""
+        if request.cancelled() or request.future.cancelled():
+            return
+        
+        error = request.future.exception()
+        
+        def dispatch(dt):
+            # The request may have been cancelled while this was queued
+            if request.cancelled():
+                return
+            if error is not None:
+                if on_error:
+                    on_error(error)
+                else:
+                    print(f"API request failed: {error}")
+            elif callback:
+                callback(request.future.result())
+        
+        Clock.schedule_once(dispatch, 0)
+    
+    # APIService mirrors
+    def send_message(self, message, session_id=None, mode='general', **kwargs) -> APIRequest:
+        """Async APIService.send_message"""
+        return self.submit(self.api.send_message, message, session_id, mode, **kwargs)
+    
+    def send_message_stream(
+        self,
+        message,
+        session_id=None,
+        mode='general',
+        on_chunk: Optional[Callable[[str], None]] = None,
+        **kwargs
+    ) -> APIRequest:
+        """
+        Async APIService.send_message_stream
+        
+        on_chunk is called on the main thread and stops firing once the
+        request is cancelled; cancelling also closes the stream.
+        """
+        request = APIRequest()
+        
+        def deliver_chunk(chunk):
+            if not request.cancelled() and on_chunk:
+                Clock.schedule_once(
+                    lambda dt: None if request.cancelled() else on_chunk(chunk), 0
+                )
+        
+        return self.submit(
+            self.api.send_message_stream,
+            message,
+            session_id,
+            mode,
+            on_chunk=deliver_chunk,
+            cancel_event=request.cancel_event,
+            request=request,
+            **kwargs
+        )
+    
+    def get_history(self, session_id, **kwargs) -> APIRequest:
+        """Async APIService.get_history"""
+        return self.submit(self.api.get_history, session_id, **kwargs)
+    
+    def get_all_sessions(self, **kwargs) -> APIRequest:
+        """Async APIService.get_all_sessions"""
+        return self.submit(self.api.get_all_sessions, **kwargs)
+    
+    def delete_session(self, session_id, **kwargs) -> APIRequest:
+        """Async APIService.delete_session"""
+        return self.submit(self.api.delete_session, session_id, **kwargs)
+    
+    def health_check(self, **kwargs) -> APIRequest:
+        """Async APIService.health_check"""
+        return self.submit(self.api.health_check, **kwargs)
@@ -0,0 +1,152 @@
+"""
+Circuit Breaker - Fail fast while the backend is unreachable
+"""
+
+import threading
+import time
+from typing import Callable, List
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """
+    Tracks whether requests to the backend are getting through
+    
+    After FAILURE_THRESHOLD failures in a row (connection errors,
+    timeouts, gateway errors) the circuit opens and requests are refused
+    right away instead of each waiting for its timeout. Once the
+    cooldown has passed one trial request is let through (half open):
+    success closes the circuit, failure opens it again with twice the
+    cooldown.
+    
+    Listeners are called with the connection status ('online',
+    'connecting' or 'offline') whenever it changes, on the thread that
+    recorded the outcome.
+    """
+    
+    FAILURE_THRESHOLD = 3
+    
+    # Seconds before the first trial request, doubling up to MAX_COOLDOWN
+    COOLDOWN = 5.0
+    MAX_COOLDOWN = 60.0
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[str], None]] = []
+        self._status = 'connecting'
+        self.reset()
+    
+    def reset(self):
+        """Forget all outcomes, e.g. after switching to another backend"""
+        def change():
+            self.state = CLOSED
+            self.failures = 0
+            self.cooldown = self.COOLDOWN
+            self.opened_at = 0.0
+            self.last_success = None
+            self._trial = False
+            self._last_outcome_ok = None
+        self._update(change)
+    
+    @property
+    def status(self) -> str:
+        """'online', 'connecting' (unknown or recovering) or 'offline'"""
+        return self._status
+    
+    def _compute_status(self):
+        if self.state == OPEN:
+            return 'offline'
+        if self.state == CLOSED and self._last_outcome_ok:
+            return 'online'
+        return 'connecting'
+    
+    def add_listener(self, listener: Callable[[str], None]):
+        self._listeners.append(listener)
+    
+    def remove_listener(self, listener: Callable[[str], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    def _notify(self, old_status):
+        if old_status == self._status:
+            return
+        for listener in list(self._listeners):
+            try:
+                listener(self._status)
+            except Exception as e:
+                print(f"Connection listener failed: {e}")
+    
+    def _update(self, change):
+        """Apply change() under the lock, then report a status change"""
+        with self._lock:
+            old = self._status
+            change()
+            self._status = self._compute_status()
+        self._notify(old)
+    
+    def allow_request(self) -> bool:
+        """
+        Whether a request may be sent now
+        
+        While half open only the single trial request is allowed.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.cooldown:
+                    return False
+                self.state = HALF_OPEN
+                self._trial = False
+            if self._trial:
+                return False
+            self._trial = True
+            return True
+    
+    def retry_in(self) -> float:
+        """Seconds until a trial request will be allowed"""
+        if self.state != OPEN:
+            return 0.0
+        return max(self.cooldown - (time.monotonic() - self.opened_at), 0.0)
+    
+    def record_success(self):
+        """The backend answered"""
+        def change():
+            self.state = CLOSED
+            self.failures = 0
+            self.cooldown = self.COOLDOWN
+            self.last_success = time.monotonic()
+            self._trial = False
+            self._last_outcome_ok = True
+        self._update(change)
+    
+    def record_failure(self):
+        """A request failed because the backend did not answer properly"""
+        def change():
+            self.failures += 1
+            self._last_outcome_ok = False
+            if self.state == HALF_OPEN:
+                self._open(self.cooldown * 2)
+            elif self.state == CLOSED and self.failures >= self.FAILURE_THRESHOLD:
+                self._open(self.cooldown)
+        self._update(change)
+    
+    def record_slow_reply(self):
+        """
+        A request was accepted but its reply did not arrive in time
+        
+        The backend is reachable but busy, so this only counts as a
+        failure for the trial request, which must settle the circuit.
+        """
+        if self.state == HALF_OPEN:
+            self.record_failure()
+    
+    def _open(self, cooldown):
+        """Refuse requests for cooldown seconds (caller holds _lock)"""
+        self.state = OPEN
+        self.cooldown = min(cooldown, self.MAX_COOLDOWN)
+        self.opened_at = time.monotonic()
+        self._trial = False
@@ -0,0 +1,89 @@
+"""
+Health Monitor - Background checks of the backend's availability
+"""
+
+import random
+import threading
+import time
+
+
+class HealthMonitor:
+    """
+    Probes /health on a background thread and feeds APIService's breaker
+    
+    While the backend is online a probe is only sent when no request has
+    succeeded for HEALTHY_INTERVAL seconds; normal traffic already shows
+    it is up. Once requests start failing, probes begin MIN_INTERVAL
+    seconds apart and back off (with jitter) to MAX_INTERVAL, so the
+    app notices recovery quickly without hammering a dead backend. The
+    first successful probe closes the circuit.
+    """
+    
+    HEALTHY_INTERVAL = 30.0
+    MIN_INTERVAL = 2.0
+    MAX_INTERVAL = 30.0
+    
+    def __init__(self, api_service):
+        self.api = api_service
+        self._wake = threading.Event()
+        self._stop_event = None
+        self._thread = None
+        self.api.breaker.add_listener(self._on_status)
+    
+    def start(self):
+        """Start probing (the first probe is sent right away)"""
+        if self._thread is not None:
+            self.check_now()
+            return
+        
+        self._stop_event = threading.Event()
+        self._wake.set()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(self._stop_event,),
+            name='jarvis-health'
+        )
+        self._thread.daemon = True
+        self._thread.start()
+    
+    def stop(self):
+        """Stop probing, e.g. while the app is paused"""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._wake.set()
+        self._thread = None
+    
+    def check_now(self):
+        """Send a probe as soon as possible"""
+        self._wake.set()
+    
+    def _on_status(self, status):
+        # Start the fast probe schedule as soon as a request fails; the
+        # monitor's own probes reschedule themselves
+        if status != 'online' and threading.current_thread() is not self._thread:
+            self._wake.set()
+    
+    def _run(self, stop_event):
+        """Monitor thread body"""
+        interval = self.MIN_INTERVAL
+        
+        while not stop_event.is_set():
+            self._wake.clear()
+            breaker = self.api.breaker
+            
+            if breaker.status == 'online':
+                interval = self.MIN_INTERVAL
+                idle = time.monotonic() - (breaker.last_success or 0)
+                if idle >= self.HEALTHY_INTERVAL:
+                    self.api.ping()
+                    idle = 0
+                delay = self.HEALTHY_INTERVAL - idle
+            elif self.api.ping():
+                interval = self.MIN_INTERVAL
+                delay = self.HEALTHY_INTERVAL
+            else:
+                delay = interval * random.uniform(0.8, 1.2)
+                interval = min(interval * 2, self.MAX_INTERVAL)
+            
+            self._wake.wait(delay)
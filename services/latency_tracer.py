@@ -0,0 +1,251 @@
+"""
+Latency Tracer - Per-request network timings for APIService
+"""
+
+import json
+import math
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+# The trace being recorded on this thread; the adapter and connection
+# classes below add their timings to it
+_local = threading.local()
+
+# Concrete IDs in paths are grouped under one endpoint name
+ID_SEGMENT = re.compile(r'/(history|session)/[^/?]+')
+
+
+def endpoint_name(method: str, endpoint: str) -> str:
+    """Group a request under its route, e.g. 'GET /chat/history/{id}'"""
+    route = ID_SEGMENT.sub(r'/\1/{id}', endpoint)
+    return f"{method.upper()} {route}"
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of values (None if empty)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100.0 * len(ordered))
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+class LatencyTracer:
+    """
+    Bounded in-memory store of request traces
+    
+    Each trace records connect time (DNS, TCP and TLS; 0 when a pooled
+    connection was reused), time to first byte, total time, bytes sent
+    and received, the HTTP status and any error. The last MAX_SAMPLES
+    traces are kept per endpoint for percentiles.
+    """
+    
+    MAX_SAMPLES = 500
+    
+    # Traces kept for export, across all endpoints
+    MAX_RECENT = 200
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples: Dict[str, deque] = {}
+        self._recent = deque(maxlen=self.MAX_RECENT)
+        self.enabled = True
+    
+    def begin(self, method: str, endpoint: str) -> Optional[Dict[str, Any]]:
+        """Start tracing a request made on this thread"""
+        if not self.enabled:
+            return None
+        
+        trace = {
+            'endpoint': endpoint_name(method, endpoint),
+            'time': datetime.now().isoformat(),
+            'start': time.perf_counter(),
+            'connect_ms': 0.0,
+            'ttfb_ms': None,
+            'total_ms': None,
+            'bytes_sent': 0,
+            'bytes_received': 0,
+            'status': None,
+            'attempts': 0,
+            'reused': True,
+            'error': None
+        }
+        _local.trace = trace
+        return trace
+    
+    def detach(self):
+        """Stop attributing network activity on this thread to a trace"""
+        _local.trace = None
+    
+    def finish(self, trace: Optional[Dict[str, Any]], response=None, error: Optional[Exception] = None):
+        """Complete a trace once the response body has been read"""
+        if trace is None or trace['total_ms'] is not None:
+            return
+        
+        trace['total_ms'] = (time.perf_counter() - trace.pop('start')) * 1000
+        
+        if response is not None:
+            trace['status'] = response.status_code
+            trace['bytes_received'] = self._bytes_received(response)
+            if response.status_code >= 400:
+                trace['error'] = f'HTTP {response.status_code}'
+        
+        if error is not None:
+            trace['error'] = type(error).__name__
+        
+        with self._lock:
+            samples = self._samples.get(trace['endpoint'])
+            if samples is None:
+                samples = self._samples[trace['endpoint']] = deque(maxlen=self.MAX_SAMPLES)
+            samples.append(trace)
+            self._recent.append(trace)
+    
+    def _bytes_received(self, response) -> Optional[int]:
+        """Body size off the wire, or None if unknown (chunked streams)"""
+        try:
+            # Counts bytes read before decompression
+            received = response.raw.tell()
+        except Exception:
+            received = 0
+        
+        if not received and isinstance(getattr(response, '_content', None), bytes):
+            received = len(response._content)
+        return received or None
+    
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Percentiles per endpoint (milliseconds)"""
+        with self._lock:
+            snapshot = {name: list(samples) for name, samples in self._samples.items()}
+        
+        result = {}
+        for name, traces in sorted(snapshot.items()):
+            ok = [t for t in traces if not t['error']]
+            total = [t['total_ms'] for t in ok]
+            ttfb = [t['ttfb_ms'] for t in ok if t['ttfb_ms'] is not None]
+            connect = [t['connect_ms'] for t in ok if not t['reused']]
+            received = [t['bytes_received'] for t in traces if t['bytes_received'] is not None]
+            
+            result[name] = {
+                'count': len(traces),
+                'errors': len(traces) - len(ok),
+                'p50_ms': percentile(total, 50),
+                'p95_ms': percentile(total, 95),
+                'p99_ms': percentile(total, 99),
+                'ttfb_p50_ms': percentile(ttfb, 50),
+                'ttfb_p95_ms': percentile(ttfb, 95),
+                'connect_p50_ms': percentile(connect, 50),
+                'new_connections': len(connect),
+                'avg_bytes_sent': sum(t['bytes_sent'] for t in traces) // len(traces),
+                'avg_bytes_received': sum(received) // len(received) if received else None
+            }
+        return result
+    
+    def format_summary(self) -> str:
+        """Short text table of the summary for display"""
+        lines = []
+        for name, stats in self.summary().items():
+            def ms(value):
+                return '-' if value is None else f'{value:.0f}'
+            
+            lines.append(
+                f"{name}  n={stats['count']} err={stats['errors']}\n"
+                f"  p50 {ms(stats['p50_ms'])}  p95 {ms(stats['p95_ms'])}  "
+                f"ttfb {ms(stats['ttfb_p50_ms'])}  connect {ms(stats['connect_p50_ms'])} ms"
+            )
+        return '\n'.join(lines) or 'No requests recorded yet'
+    
+    def export(self) -> Dict[str, Any]:
+        """Summary plus the most recent traces, ready for json.dumps"""
+        with self._lock:
+            recent = [dict(trace) for trace in self._recent]
+        return {
+            'exported': datetime.now().isoformat(),
+            'summary': self.summary(),
+            'recent': recent
+        }
+    
+    def export_json(self) -> str:
+        """export() as a JSON string"""
+        return json.dumps(self.export(), indent=2)
+    
+    def reset(self):
+        """Drop all recorded traces"""
+        with self._lock:
+            self._samples.clear()
+            self._recent.clear()
+
+
+_adapter_class = None
+
+
+def create_tracing_adapter(**kwargs):
+    """
+    Build an HTTPAdapter that records timings into the current trace
+    
+    Connections are made with a connection class whose connect() is
+    timed, so DNS, TCP and TLS setup show up as connect_ms; the time
+    until response headers arrive is recorded as ttfb_ms.
+    """
+    global _adapter_class
+    
+    if _adapter_class is None:
+        # requests and urllib3 are imported on first use, like in APIService
+        from requests.adapters import HTTPAdapter
+        from urllib3.connection import HTTPConnection, HTTPSConnection
+        from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+        
+        def timed_connect(connect):
+            def wrapper(self):
+                start = time.perf_counter()
+                try:
+                    return connect(self)
+                finally:
+                    trace = getattr(_local, 'trace', None)
+                    if trace is not None:
+                        trace['connect_ms'] += (time.perf_counter() - start) * 1000
+                        trace['reused'] = False
+            return wrapper
+        
+        class TracedHTTPConnection(HTTPConnection):
+            connect = timed_connect(HTTPConnection.connect)
+        
+        class TracedHTTPSConnection(HTTPSConnection):
+            connect = timed_connect(HTTPSConnection.connect)
+        
+        class TracedHTTPConnectionPool(HTTPConnectionPool):
+            ConnectionCls = TracedHTTPConnection
+        
+        class TracedHTTPSConnectionPool(HTTPSConnectionPool):
+            ConnectionCls = TracedHTTPSConnection
+        
+        class TracingAdapter(HTTPAdapter):
+            def init_poolmanager(self, *args, **kwargs):
+                super().init_poolmanager(*args, **kwargs)
+                self.poolmanager.pool_classes_by_scheme = {
+                    'http': TracedHTTPConnectionPool,
+                    'https': TracedHTTPSConnectionPool
+                }
+            
+            def send(self, request, *args, **kwargs):
+                trace = getattr(_local, 'trace', None)
+                if trace is None:
+                    return super().send(request, *args, **kwargs)
+                
+                body = request.body or b''
+                trace['bytes_sent'] += len(body.encode('utf-8') if isinstance(body, str) else body)
+                trace['attempts'] += 1
+                
+                start = time.perf_counter()
+                response = super().send(request, *args, **kwargs)
+                # The body has not been read yet, so this is up to the
+                # response headers of this attempt
+                trace['ttfb_ms'] = (time.perf_counter() - start) * 1000
+                return response
+        
+        _adapter_class = TracingAdapter
+    
+    return _adapter_class(**kwargs)
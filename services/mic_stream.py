@@ -0,0 +1,216 @@
+"""
+Mic Stream - Always-open microphone with a pre-roll buffer and energy VAD
+"""
+
+import queue
+import threading
+from array import array
+from collections import deque
+from typing import Optional
+
+try:
+    import audioop
+except ImportError:  # removed from the standard library in Python 3.13
+    audioop = None
+
+
+def frame_energy(frame: bytes, sample_width: int) -> float:
+    """RMS energy of a chunk of little-endian PCM audio"""
+    if audioop is not None:
+        return audioop.rms(frame, sample_width)
+    
+    # sr.Microphone records 16-bit samples
+    samples = array('h', frame[:len(frame) - len(frame) % 2])
+    if not samples:
+        return 0.0
+    return (sum(s * s for s in samples) / len(samples)) ** 0.5
+
+
+class MicStream:
+    """
+    Keeps one microphone stream open on a background thread
+    
+    The last PRE_ROLL seconds of audio are kept in a ring buffer, so
+    speech that starts just before capture() is called is not cut off.
+    Speech is detected by comparing frame energy with a noise floor that
+    is tracked continuously between captures, which replaces the
+    per-query ambient noise calibration. Without a seeded floor, the
+    first NOISE_SEED seconds of audio set it.
+    """
+    
+    # Seconds of audio kept from before capture() is called
+    PRE_ROLL = 0.5
+    
+    # Seconds of silence that end an utterance
+    END_SILENCE = 0.5
+    
+    # Speech is louder than the noise floor by this factor (about 10 dB)
+    SPEECH_RATIO = 3.0
+    MIN_THRESHOLD = 150
+    
+    # Weight of each quiet frame in the noise floor average
+    NOISE_ADAPT_RATE = 0.05
+    
+    # Seconds of audio that set an unknown noise floor (their median
+    # energy, so a word spoken meanwhile does not skew it)
+    NOISE_SEED = 1.0
+    
+    def __init__(self):
+        self.sample_rate = None
+        self.sample_width = None
+        self.noise_floor = None
+        self._frame_seconds = 0.0
+        self._ring = deque()
+        self._capture: Optional[queue.Queue] = None
+        self._lock = threading.Lock()
+        self._started = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.is_running = False
+    
+    @property
+    def threshold(self) -> float:
+        """Energy above which a frame counts as speech"""
+        if self.noise_floor is None:
+            return self.MIN_THRESHOLD
+        return max(self.noise_floor * self.SPEECH_RATIO, self.MIN_THRESHOLD)
+    
+    def start(self):
+        """Open the microphone on a background thread"""
+        if self._thread is not None:
+            return
+        
+        self._stop.clear()
+        self._started.clear()
+        self._thread = threading.Thread(target=self._run, name='jarvis-mic')
+        self._thread.daemon = True
+        self._thread.start()
+    
+    def stop(self):
+        """Close the microphone (the thread exits after its current read)"""
+        self._stop.set()
+        self._thread = None
+    
+    def _run(self):
+        """Read frames into the ring buffer until stopped"""
+        try:
+            import speech_recognition as sr
+            
+            with sr.Microphone() as source:
+                self.sample_rate = source.SAMPLE_RATE
+                self.sample_width = source.SAMPLE_WIDTH
+                self._frame_seconds = source.CHUNK / source.SAMPLE_RATE
+                self._ring = deque(maxlen=max(1, round(self.PRE_ROLL / self._frame_seconds)))
+                seed_frames = max(1, round(self.NOISE_SEED / self._frame_seconds))
+                seed = []
+                self.is_running = True
+                self._started.set()
+                
+                while not self._stop.is_set():
+                    frame = source.stream.read(source.CHUNK)
+                    energy = frame_energy(frame, self.sample_width)
+                    
+                    with self._lock:
+                        self._ring.append((frame, energy))
+                        capture = self._capture
+                    
+                    if self.noise_floor is None:
+                        # Only frames below the threshold update the floor,
+                        # so without one a noisy room would never get one
+                        seed.append(energy)
+                        if len(seed) >= seed_frames:
+                            self.noise_floor = sorted(seed)[len(seed) // 2]
+                    elif capture is None and energy < self.threshold:
+                        self._update_noise_floor(energy)
+                    
+                    if capture is not None:
+                        capture.put((frame, energy))
+        except Exception as e:
+            print(f"Microphone stream error: {e}")
+        finally:
+            self.is_running = False
+            self._started.set()
+    
+    def _update_noise_floor(self, energy):
+        """Fold a quiet frame into the running noise estimate"""
+        self.noise_floor += (energy - self.noise_floor) * self.NOISE_ADAPT_RATE
+    
+    def capture(
+        self,
+        timeout: float = 5,
+        phrase_time_limit: float = 10,
+        on_frame=None,
+        cancel: Optional[threading.Event] = None
+    ):
+        """
+        Record the next utterance (blocking)
+        
+        Args:
+            timeout: Seconds to wait for speech to start
+            phrase_time_limit: Maximum length of the utterance in seconds
+            on_frame: Called with each frame of the utterance as it arrives
+            cancel: Event that makes the capture return None once set,
+                including if it was set before the call
+        
+        Returns:
+            sr.AudioData, or None on timeout, cancel or a closed stream
+        """
+        if cancel is None:
+            cancel = threading.Event()
+        
+        if not self._started.wait(timeout) or not self.is_running or cancel.is_set():
+            return None
+        
+        import speech_recognition as sr
+        
+        live = queue.Queue()
+        with self._lock:
+            # Start with the buffered audio from just before the call
+            buffered = deque(self._ring)
+            self._capture = live
+        
+        try:
+            frames = deque(maxlen=self._ring.maxlen)
+            speaking = False
+            waited = spoken = silence = 0.0
+            
+            while not cancel.is_set() and not self._stop.is_set():
+                if buffered:
+                    frame, energy = buffered.popleft()
+                else:
+                    try:
+                        frame, energy = live.get(timeout=0.5)
+                    except queue.Empty:
+                        if not self.is_running:
+                            return None
+                        continue
+                    waited += self._frame_seconds
+                
+                is_speech = energy >= self.threshold
+                
+                if not speaking:
+                    # Keep only the pre-roll until speech starts
+                    frames.append(frame)
+                    if is_speech:
+                        speaking = True
+                        frames = list(frames)
+                        if on_frame:
+                            for buffered_frame in frames:
+                                on_frame(buffered_frame)
+                    elif waited >= timeout:
+                        return None
+                    continue
+                
+                frames.append(frame)
+                if on_frame:
+                    on_frame(frame)
+                spoken += self._frame_seconds
+                silence = 0.0 if is_speech else silence + self._frame_seconds
+                
+                if silence >= self.END_SILENCE or spoken >= phrase_time_limit:
+                    return sr.AudioData(b''.join(frames), self.sample_rate, self.sample_width)
+            
+            return None
+        finally:
+            with self._lock:
+                self._capture = None
@@ -0,0 +1,149 @@
+"""
+Outbox Service - Durable queue for chat messages that could not be sent
+"""
+
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable
+
+from .api_service import RETRYABLE_ERRORS
+
+
+class OutboxService:
+    """
+    Persistent outbound message queue
+    
+    Messages that fail with a retryable error (or are typed while older
+    messages are still queued) are stored with a client-generated
+    idempotency key. drain() sends them in order per conversation once
+    the health check passes; the server uses the key to ignore duplicates,
+    so a message whose reply was lost can safely be sent again.
+    """
+    
+    def __init__(self, api_service, storage_service):
+        self.api = api_service
+        self.storage = storage_service
+        self._lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+        self._items: List[Dict[str, Any]] = storage_service.load_outbox()
+        
+        # Called as on_result(item, result) after each queued message is
+        # answered or rejected (on the draining thread)
+        self.on_result: Optional[Callable[[Dict[str, Any], Dict[str, Any]], None]] = None
+    
+    def create(
+        self,
+        message: str,
+        session_id: Optional[str],
+        mode: str,
+        group: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Build an outbox item for a new message (not queued yet)
+        
+        Args:
+            message: The user's message
+            session_id: Server session ID, or None for a new chat
+            mode: 'general' or 'realtime'
+            group: Local conversation key for a chat without a session ID
+        
+        Returns:
+            Item dict; item['id'] is the idempotency key
+        """
+        key = uuid.uuid4().hex
+        return {
+            'id': key,
+            'message': message,
+            'session_id': session_id,
+            'mode': mode,
+            'group': session_id or group or key,
+            'created': datetime.now().isoformat()
+        }
+    
+    def enqueue(self, item: Dict[str, Any]):
+        """Queue an item behind others of the same conversation"""
+        with self._lock:
+            self._items.append(item)
+            self._save()
+    
+    def pending(self, group: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Queued items, optionally only those of one conversation"""
+        with self._lock:
+            return [i for i in self._items if group is None or i['group'] == group]
+    
+    def has_pending(self, group: Optional[str] = None) -> bool:
+        """True if anything (for the conversation) is waiting to be sent"""
+        return bool(self.pending(group))
+    
+    def _save(self):
+        """Persist the queue (caller holds _lock)"""
+        self.storage.save_outbox(list(self._items))
+    
+    def _remove(self, item: Dict[str, Any]):
+        """Drop a sent item from the queue"""
+        with self._lock:
+            self._items = [i for i in self._items if i['id'] != item['id']]
+            self._save()
+    
+    def _assign_session(self, group: str, session_id: str):
+        """Give queued items of a new chat the session ID the server chose"""
+        with self._lock:
+            for item in self._items:
+                if item['group'] == group and not item['session_id']:
+                    item['session_id'] = session_id
+            self._save()
+    
+    def drain(self) -> int:
+        """
+        Send queued messages if the server is reachable (blocking)
+        
+        Conversations are sent one message at a time in queue order. A
+        retryable failure stops that conversation until the next drain;
+        any other failure drops the item and reports the error.
+        
+        Returns:
+            Number of items sent or dropped
+        """
+        if not self._drain_lock.acquire(blocking=False):
+            # Another drain is already running
+            return 0
+        
+        try:
+            if not self.has_pending():
+                return 0
+            
+            # health_check() reports failures as {'status': 'error'}
+            if self.api.health_check().get('status') == 'error':
+                return 0
+            
+            handled = 0
+            blocked = set()
+            
+            for item in self.pending():
+                if item['group'] in blocked:
+                    continue
+                
+                result = self.api.send_message(
+                    item['message'],
+                    item['session_id'],
+                    item['mode'],
+                    idempotency_key=item['id']
+                )
+                
+                if result.get('error') in RETRYABLE_ERRORS:
+                    blocked.add(item['group'])
+                    continue
+                
+                self._remove(item)
+                handled += 1
+                
+                if result.get('session_id') and not item['session_id']:
+                    self._assign_session(item['group'], result['session_id'])
+                
+                if self.on_result:
+                    self.on_result(item, result)
+            
+            return handled
+        finally:
+            self._drain_lock.release()
@@ -0,0 +1,113 @@
+"""
+Payload Codec - Body formats and compression for API requests
+
+Response compression (gzip/deflate) is negotiated by requests itself,
+which sends Accept-Encoding and decodes the body. This module adds:
+
+- MessagePack for bulk reads when the msgpack package is installed;
+  servers that do not support it answer JSON as before
+- gzip/deflate request bodies for servers that list the coding in an
+  Accept-Encoding response header (RFC 7694)
+"""
+
+import gzip
+import json
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+JSON = 'application/json'
+MSGPACK = 'application/msgpack'
+
+# Content types servers use for MessagePack
+MSGPACK_TYPES = ('application/msgpack', 'application/x-msgpack', 'application/vnd.msgpack')
+
+# Request codings we can produce, in order of preference
+REQUEST_ENCODINGS = ('gzip', 'deflate')
+
+# Bodies smaller than this gain nothing from compression
+MIN_COMPRESS_BYTES = 1024
+
+_msgpack = None
+
+
+def msgpack_module():
+    """The msgpack module, or None if it is not installed"""
+    global _msgpack
+    if _msgpack is None:
+        try:
+            import msgpack
+            _msgpack = msgpack
+        except ImportError:
+            _msgpack = False
+    return _msgpack or None
+
+
+def accept_header(binary: bool = True) -> str:
+    """Accept header for a read, preferring MessagePack when available"""
+    if binary and msgpack_module() is not None:
+        return f'{MSGPACK}, {JSON};q=0.9'
+    return JSON
+
+
+def decode(content: bytes, content_type: str) -> Any:
+    """Parse a (decompressed) response body according to its Content-Type"""
+    media_type = content_type.split(';', 1)[0].strip().lower()
+    if media_type in MSGPACK_TYPES:
+        msgpack = msgpack_module()
+        if msgpack is None:
+            raise ValueError(f'Cannot decode {media_type} without the msgpack package')
+        return msgpack.unpackb(content, raw=False)
+    return json.loads(content)
+
+
+def request_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Request coding to use given a server's Accept-Encoding header
+    
+    Returns:
+        'gzip', 'deflate' or None if the server accepts neither
+    """
+    if not accept_encoding:
+        return None
+    
+    accepted = set()
+    for item in accept_encoding.lower().split(','):
+        coding, _, params = item.partition(';')
+        params = params.replace(' ', '')
+        try:
+            weight = float(params[2:]) if params.startswith('q=') else 1.0
+        except ValueError:
+            weight = 0.0
+        if weight > 0:
+            accepted.add(coding.strip())
+    
+    for coding in REQUEST_ENCODINGS:
+        if coding in accepted:
+            return coding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a body with 'gzip' or 'deflate' (zlib format, as in HTTP)"""
+    if encoding == 'gzip':
+        # mtime=0 keeps identical bodies byte-identical
+        return gzip.compress(body, compresslevel=6, mtime=0)
+    if encoding == 'deflate':
+        return zlib.compress(body, 6)
+    raise ValueError(f'Unknown content coding {encoding!r}')
+
+
+def encode_json(payload: Any, encoding: Optional[str]) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Serialize a request payload, compressed if worthwhile
+    
+    Returns:
+        (body, headers) where headers are the Content-Type and, if the
+        body was compressed, Content-Encoding
+    """
+    body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    headers = {'Content-Type': JSON}
+    if encoding and len(body) >= MIN_COMPRESS_BYTES:
+        body = compress(body, encoding)
+        headers['Content-Encoding'] = encoding
+    return body, headers
@@ -0,0 +1,255 @@
+"""
+Recognizers - Speech-to-text backends for voice input
+
+Desktop backends share one interface so VoiceService can try them in
+order of preference: an offline Vosk model first (if installed), then
+Google's web API. Streaming backends produce partial text while audio is
+still being fed to them.
+"""
+
+import json
+import os
+from typing import Optional
+
+# Vosk model directory (download one from https://alphacephei.com/vosk/models)
+VOSK_MODEL_PATH = os.environ.get(
+    'JARVIS_VOSK_MODEL',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models', 'vosk')
+)
+
+
+class RecognitionError(Exception):
+    """The backend failed (e.g. no network); another backend may still work"""
+
+
+class RecognizerBackend:
+    """
+    Base class for speech-to-text backends
+    
+    load() is called once on a background thread; a backend whose load()
+    returns False is not used.
+    """
+    
+    name = ''
+    
+    # True if start_stream() is supported
+    streaming = False
+    
+    def load(self) -> bool:
+        """Prepare the backend (blocking); False if it cannot be used"""
+        return True
+    
+    def transcribe(self, audio) -> str:
+        """
+        Recognize a captured utterance
+        
+        Args:
+            audio: speech_recognition.AudioData
+        
+        Returns:
+            Recognized text, or '' if nothing was understood
+        
+        Raises:
+            RecognitionError: If the backend could not be used
+        """
+        raise NotImplementedError
+    
+    def start_stream(self, sample_rate: int):
+        """Begin recognizing 16-bit mono audio fed frame by frame"""
+        raise NotImplementedError
+
+
+class GoogleRecognizer(RecognizerBackend):
+    """Google Web Speech API (needs a network connection)"""
+    
+    name = 'google'
+    
+    def __init__(self):
+        self._recognizer = None
+    
+    def load(self) -> bool:
+        try:
+            import speech_recognition as sr
+            self._recognizer = sr.Recognizer()
+            return True
+        except Exception as e:
+            print(f"Google recognizer unavailable: {e}")
+            return False
+    
+    def transcribe(self, audio) -> str:
+        import speech_recognition as sr
+        
+        try:
+            return self._recognizer.recognize_google(audio)
+        except sr.UnknownValueError:
+            return ''
+        except sr.RequestError as e:
+            raise RecognitionError(str(e))
+
+
+class VoskStream:
+    """One utterance being recognized by Vosk"""
+    
+    def __init__(self, recognizer):
+        self._recognizer = recognizer
+        self._segments = []
+        self._text = ''
+    
+    def feed(self, frame: bytes) -> Optional[str]:
+        """Add audio; returns the text so far if it changed, else None"""
+        if self._recognizer.AcceptWaveform(frame):
+            # Vosk detected a pause and finalized a segment
+            segment = json.loads(self._recognizer.Result()).get('text', '')
+            if segment:
+                self._segments.append(segment)
+            partial = ''
+        else:
+            partial = json.loads(self._recognizer.PartialResult()).get('partial', '')
+        
+        text = ' '.join(self._segments + ([partial] if partial else []))
+        if text == self._text:
+            return None
+        self._text = text
+        return text
+    
+    def finish(self) -> str:
+        """Final text of the utterance"""
+        segment = json.loads(self._recognizer.FinalResult()).get('text', '')
+        return ' '.join(self._segments + ([segment] if segment else []))
+
+
+class VoskRecognizer(RecognizerBackend):
+    """Offline recognition with a local Vosk model"""
+    
+    name = 'vosk'
+    streaming = True
+    
+    # Bytes fed per call when transcribing captured audio
+    CHUNK_BYTES = 8000
+    
+    def __init__(self, model_path: str = VOSK_MODEL_PATH):
+        self.model_path = model_path
+        self._model = None
+    
+    def load(self) -> bool:
+        if not os.path.isdir(self.model_path):
+            return False
+        
+        try:
+            import vosk
+            vosk.SetLogLevel(-1)
+            self._model = vosk.Model(self.model_path)
+            return True
+        except Exception as e:
+            print(f"Vosk recognizer unavailable: {e}")
+            return False
+    
+    def start_stream(self, sample_rate: int) -> VoskStream:
+        import vosk
+        return VoskStream(vosk.KaldiRecognizer(self._model, sample_rate))
+    
+    def transcribe(self, audio) -> str:
+        stream = self.start_stream(audio.sample_rate)
+        raw = audio.get_raw_data(convert_width=2)
+        for start in range(0, len(raw), self.CHUNK_BYTES):
+            stream.feed(raw[start:start + self.CHUNK_BYTES])
+        return stream.finish()
+
+
+# Desktop backends by setting name, in default order of preference
+BACKENDS = {
+    'vosk': VoskRecognizer,
+    'google': GoogleRecognizer,
+}
+
+
+def load_backends(preferred: str = 'vosk'):
+    """
+    Create and load every available backend (blocking)
+    
+    Returns:
+        Loaded backends, the preferred one first
+    """
+    names = sorted(BACKENDS, key=lambda name: name != preferred)
+    backends = []
+    for name in names:
+        backend = BACKENDS[name]()
+        if backend.load():
+            backends.append(backend)
+    return backends
+
+
+_android_listener_class = None
+
+
+def android_listener(on_partial, on_final, on_error):
+    """
+    Create an android.speech.RecognitionListener
+    
+    The callbacks run on the Android UI thread with the best hypothesis
+    (on_partial/on_final) or the SpeechRecognizer error code (on_error).
+    """
+    global _android_listener_class
+    
+    if _android_listener_class is None:
+        from jnius import PythonJavaClass, java_method, autoclass
+        
+        SpeechRecognizer = autoclass('android.speech.SpeechRecognizer')
+        
+        def best(bundle):
+            results = bundle.getStringArrayList(SpeechRecognizer.RESULTS_RECOGNITION)
+            if results is None or results.size() == 0:
+                return ''
+            return results.get(0)
+        
+        class Listener(PythonJavaClass):
+            __javainterfaces__ = ['android/speech/RecognitionListener']
+            __javacontext__ = 'app'
+            
+            def __init__(self, on_partial, on_final, on_error):
+                super().__init__()
+                self.on_partial = on_partial
+                self.on_final = on_final
+                self.on_error = on_error
+            
+            @java_method('(Landroid/os/Bundle;)V')
+            def onReadyForSpeech(self, params):
+                pass
+            
+            @java_method('()V')
+            def onBeginningOfSpeech(self):
+                pass
+            
+            @java_method('(F)V')
+            def onRmsChanged(self, rms):
+                pass
+            
+            @java_method('([B)V')
+            def onBufferReceived(self, buffer):
+                pass
+            
+            @java_method('()V')
+            def onEndOfSpeech(self):
+                pass
+            
+            @java_method('(I)V')
+            def onError(self, error):
+                self.on_error(error)
+            
+            @java_method('(Landroid/os/Bundle;)V')
+            def onResults(self, results):
+                self.on_final(best(results))
+            
+            @java_method('(Landroid/os/Bundle;)V')
+            def onPartialResults(self, results):
+                text = best(results)
+                if text:
+                    self.on_partial(text)
+            
+            @java_method('(ILandroid/os/Bundle;)V')
+            def onEvent(self, event_type, params):
+                pass
+        
+        _android_listener_class = Listener
+    
+    return _android_listener_class(on_partial, on_final, on_error)
@@ -0,0 +1,183 @@
+"""
+Response Cache - Read-through cache for APIService read endpoints
+"""
+
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+
+class _Flight:
+    """A fetch in progress that other callers can wait for"""
+    
+    def __init__(self, tags):
+        self.tags = tags
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResponseCache:
+    """
+    Parsed responses kept for a limited time, bounded by size
+    
+    Entries expire after their TTL and the least recently used ones are
+    evicted once the total (JSON) size passes max_bytes. Entries carry
+    tags, e.g. 'history:<session id>', so a write can drop everything it
+    makes stale. Identical requests made while one is already in flight
+    wait for it and share its result instead of going to the network.
+    
+    Values are copied on the way in and out, so callers may modify what
+    they get back.
+    """
+    
+    def __init__(self, max_bytes: int = 2 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        
+        self._lock = threading.Lock()
+        # key -> (value, size, expires, tags)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._flights: Dict[Hashable, _Flight] = {}
+        # Bumped by every invalidation; fetches that started before one
+        # do not store their (possibly stale) result
+        self._generation = 0
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Fresh cached value for key, or None"""
+        if not self.enabled:
+            return None
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= time.monotonic():
+                self._remove(key)
+                entry = None
+            
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[0]
+        return copy.deepcopy(value)
+    
+    def fetch(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Any],
+        ttl: float,
+        tags: Iterable[str] = (),
+        cacheable: Callable[[Any], bool] = lambda value: True,
+        flight_key: Optional[Hashable] = None
+    ) -> Any:
+        """
+        Call fetch(), sharing the call with identical concurrent ones
+        
+        The result is stored under key if cacheable(result) is true and
+        nothing was invalidated while it was being fetched.
+        
+        Args:
+            key: Cache key for the result
+            fetch: Blocking call producing the value
+            ttl: Seconds the result stays fresh
+            tags: Tags for invalidate()
+            cacheable: Whether a result may be stored (e.g. not errors)
+            flight_key: Key identifying identical requests (default key)
+        """
+        if not self.enabled:
+            return fetch()
+        
+        flight_key = key if flight_key is None else flight_key
+        tags = tuple(tags)
+        
+        with self._lock:
+            flight = self._flights.get(flight_key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[flight_key] = _Flight(tags)
+                generation = self._generation
+            else:
+                self.shared += 1
+        
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.value)
+        
+        try:
+            value = fetch()
+            # Private copy for waiting callers and the cache; the caller
+            # gets the original
+            flight.value = copy.deepcopy(value)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(flight_key) is flight:
+                    del self._flights[flight_key]
+            flight.done.set()
+        
+        if ttl > 0 and cacheable(value):
+            self._store(key, flight.value, ttl, tags, generation)
+        return value
+    
+    def _store(self, key, value, ttl, tags, generation):
+        """Add an entry and evict least recently used ones over max_bytes"""
+        try:
+            size = len(json.dumps(value, default=str))
+        except (TypeError, ValueError):
+            return
+        if size > self.max_bytes:
+            return
+        
+        with self._lock:
+            if generation != self._generation:
+                return
+            
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic() + ttl, tags)
+            self._bytes += size
+            
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+    
+    def _remove(self, key):
+        """Drop one entry (caller holds _lock)"""
+        _, size, _, _ = self._entries.pop(key)
+        self._bytes -= size
+    
+    def invalidate(self, *tags: str):
+        """
+        Drop every entry carrying any of tags
+        
+        Requests already in flight for those tags are left to finish,
+        but later identical requests no longer wait for them.
+        """
+        tags = set(tags)
+        with self._lock:
+            self._generation += 1
+            stale = [key for key, entry in self._entries.items() if tags & set(entry[3])]
+            for key in stale:
+                self._remove(key)
+            for key in [key for key, flight in self._flights.items() if tags & set(flight.tags)]:
+                del self._flights[key]
+    
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._flights.clear()
+            self._bytes = 0
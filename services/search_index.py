@@ -0,0 +1,315 @@
+"""
+Search Index - Full-text search over stored conversations
+"""
+
+import bisect
+import heapq
+import math
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Tuple
+
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens"""
+    return TOKEN_RE.findall(text.lower())
+
+
+class SearchIndex:
+    """
+    Inverted index over every message in StorageService
+    
+    The index is built once from storage (off the UI thread) and then kept
+    up to date with add_message/index_session/remove_session, or
+    schedule_session to re-index a session on the index's own thread.
+    Builds and searches should run on that thread too (see executor), as
+    they can wait a long time for each other.
+    Query terms match whole words or word prefixes; sessions are ranked
+    by TF-IDF of their best matching message.
+    """
+    
+    # Limits keep very short prefixes (e.g. 'a') from scanning everything
+    MAX_PREFIX_EXPANSION = 200
+    SNIPPET_RADIUS = 40
+    
+    # Damped term frequency weights, 1 + log(tf), capped at tf 63
+    _tf_weights = [0.0] + [1 + math.log(tf) for tf in range(1, 64)]
+    
+    def __init__(self, storage_service):
+        self._storage = storage_service
+        self._lock = threading.RLock()
+        self._built = False
+        self._building = False
+        self._ready = threading.Event()
+        self._backlog: List[Tuple[str, Dict[str, Any]]] = []
+        self._executor = None
+        self._reset()
+    
+    def _reset(self):
+        """Drop all indexed data (caller holds lock)"""
+        # term -> {doc_id: term frequency}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        # Sorted vocabulary for prefix lookups (sorted once after a build)
+        self._terms: List[str] = []
+        # doc_id -> (session_id, text); ids are never reused
+        self._docs: Dict[int, Tuple[str, str]] = {}
+        self._next_doc_id = 0
+        # session_id -> {message key: doc_id}
+        self._session_docs: Dict[str, Dict[tuple, int]] = {}
+    
+    @property
+    def is_built(self) -> bool:
+        """True once the index holds all stored messages"""
+        return self._built
+    
+    def ensure_built(self):
+        """Build the index from storage, or wait for a build in progress"""
+        with self._lock:
+            if self._built:
+                return
+            if self._building:
+                building_elsewhere = True
+            else:
+                building_elsewhere = False
+                self._building = True
+        
+        if building_elsewhere:
+            self._ready.wait()
+            return
+        
+        # Index one session at a time so add_message never waits long
+        for session in self._storage.load_sessions():
+            session_id = session.get('session_id')
+            if not session_id:
+                continue
+            
+            messages = self._storage.load_messages(session_id)
+            with self._lock:
+                for message in messages:
+                    self._add(session_id, message)
+        
+        with self._lock:
+            for session_id, message in self._backlog:
+                self._add(session_id, message)
+            self._backlog = []
+            
+            self._terms = sorted(self._postings)
+            self._built = True
+            self._building = False
+        self._ready.set()
+    
+    def add_message(self, session_id: str, message: Dict[str, Any]):
+        """Index one new message"""
+        with self._lock:
+            if self._building:
+                self._backlog.append((session_id, message))
+            elif self._built:
+                self._add(session_id, message)
+    
+    def index_session(self, session_id: str, messages: List[Dict[str, Any]]):
+        """Replace everything indexed for a session"""
+        keep = {self._message_key(session_id, message) for message in messages}
+        
+        with self._lock:
+            if not self._built:
+                return
+            
+            # Only messages that changed are removed and tokenized again
+            docs = self._session_docs.get(session_id, {})
+            for key in [key for key in docs if key not in keep]:
+                self._remove_doc(docs.pop(key))
+            for message in messages:
+                self._add(session_id, message)
+    
+    def schedule_session(self, session_id: str, messages: List[Dict[str, Any]]):
+        """
+        Run index_session off the calling thread
+        
+        Calls run one at a time in the order they were made, so a later
+        snapshot of a session always wins.
+        """
+        self.executor.submit(self._index_session_logged, session_id, messages)
+    
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """The index's single worker thread, started on first use"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='jarvis-index')
+            return self._executor
+    
+    def _index_session_logged(self, session_id, messages):
+        try:
+            self.index_session(session_id, messages)
+        except Exception as e:
+            print(f"Error indexing session {session_id}: {e}")
+    
+    def remove_session(self, session_id: str):
+        """Remove a session from the index"""
+        with self._lock:
+            self._remove(session_id)
+    
+    def _message_key(self, session_id: str, message: Dict[str, Any]):
+        """Identity used to avoid indexing the same message twice"""
+        return (session_id, message.get('role'), message.get('timestamp'), message.get('content'))
+    
+    def _add(self, session_id: str, message: Dict[str, Any]):
+        """Add a message to the index (caller holds lock)"""
+        text = message.get('content') or ''
+        tokens = tokenize(text)
+        if not tokens:
+            return
+        
+        key = self._message_key(session_id, message)
+        docs = self._session_docs.setdefault(session_id, {})
+        if key in docs:
+            return
+        
+        doc_id = self._next_doc_id
+        self._next_doc_id += 1
+        self._docs[doc_id] = (session_id, text)
+        docs[key] = doc_id
+        
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                if not self._building:
+                    bisect.insort(self._terms, token)
+            postings[doc_id] = postings.get(doc_id, 0) + 1
+    
+    def _remove(self, session_id: str):
+        """Remove a session's messages (caller holds lock)"""
+        for doc_id in self._session_docs.pop(session_id, {}).values():
+            self._remove_doc(doc_id)
+    
+    def _remove_doc(self, doc_id: int):
+        """Remove one message from the postings (caller holds lock)"""
+        _, text = self._docs.pop(doc_id)
+        for token in set(tokenize(text)):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[token]
+                index = bisect.bisect_left(self._terms, token)
+                if index < len(self._terms) and self._terms[index] == token:
+                    del self._terms[index]
+    
+    def _expand(self, term: str) -> List[Tuple[str, float]]:
+        """Terms matching a query term exactly or by prefix, with weights"""
+        matches = []
+        if term in self._postings:
+            matches.append((term, 1.0))
+        
+        start = bisect.bisect_left(self._terms, term)
+        for token in self._terms[start:start + self.MAX_PREFIX_EXPANSION]:
+            if not token.startswith(term):
+                break
+            if token != term:
+                # Prefix matches rank below exact ones
+                matches.append((token, 0.7))
+        
+        return matches
+    
+    def search(self, query: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Search all indexed messages
+        
+        Every query term must match (as a word or word prefix) within the
+        same message.
+        
+        Args:
+            query: Free text query
+            limit: Maximum number of sessions to return
+        
+        Returns:
+            List of dicts with session_id, score, snippet and matches,
+            best first
+        """
+        self.ensure_built()
+        
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        
+        with self._lock:
+            total = max(len(self._docs), 1)
+            
+            # Score per doc for each query term, then intersect
+            per_term = []
+            for term in terms:
+                scores: Dict[int, float] = {}
+                for token, weight in self._expand(term):
+                    postings = self._postings[token]
+                    base = weight * math.log(1 + total / len(postings))
+                    tf_weights = self._tf_weights
+                    if not scores:
+                        scores = {doc_id: base * tf_weights[min(tf, 63)] for doc_id, tf in postings.items()}
+                        continue
+                    for doc_id, tf in postings.items():
+                        score = base * tf_weights[min(tf, 63)]
+                        if score > scores.get(doc_id, 0):
+                            scores[doc_id] = score
+                if not scores:
+                    return []
+                per_term.append(scores)
+            
+            per_term.sort(key=len)
+            doc_scores = per_term[0]
+            for scores in per_term[1:]:
+                doc_scores = {
+                    doc_id: score + scores[doc_id]
+                    for doc_id, score in doc_scores.items()
+                    if doc_id in scores
+                }
+            
+            # Rank sessions by their best message
+            docs = self._docs
+            best: Dict[str, Tuple[float, int]] = {}
+            matches: Dict[str, int] = {}
+            for doc_id, score in doc_scores.items():
+                session_id = docs[doc_id][0]
+                matches[session_id] = matches.get(session_id, 0) + 1
+                current = best.get(session_id)
+                if current is None or score > current[0]:
+                    best[session_id] = (score, doc_id)
+            
+            ranked = heapq.nlargest(limit, best.items(), key=lambda item: item[1][0])
+            
+            return [
+                {
+                    'session_id': session_id,
+                    'score': score,
+                    'matches': matches[session_id],
+                    'snippet': self._snippet(docs[doc_id][1], terms)
+                }
+                for session_id, (score, doc_id) in ranked
+            ]
+    
+    def _snippet(self, text: str, terms: List[str]) -> str:
+        """Cut a window of text around the first matching word"""
+        lowered = text.lower()
+        position = -1
+        for match in TOKEN_RE.finditer(lowered):
+            if any(match.group().startswith(term) for term in terms):
+                position = match.start()
+                break
+        
+        if position < 0:
+            return text[:self.SNIPPET_RADIUS * 2]
+        
+        start = max(0, position - self.SNIPPET_RADIUS)
+        end = min(len(text), position + self.SNIPPET_RADIUS)
+        snippet = ' '.join(text[start:end].split())
+        
+        if start > 0:
+            snippet = '...' + snippet
+        if end < len(text):
+            snippet = snippet + '...'
+        return snippet
@@ -0,0 +1,260 @@
+"""
+SQLite Storage Service - Indexed local persistence for sessions and messages
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Any, List
+
+from .storage_service import StorageService
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_position ON sessions (position);
+
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (session_id, seq)
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class SQLiteStorageService(StorageService):
+    """
+    StorageService backed by SQLite for sessions and messages
+    
+    Settings and stats stay in JSON files. Sessions and messages live in
+    indexed tables, so saving one session or message touches one row
+    instead of rewriting the whole history. Existing JSON sessions and
+    messages are imported once on first start.
+    """
+    
+    DB_FILENAME = 'jarvis.db'
+    
+    def __init__(self):
+        super().__init__()
+        self._db_lock = threading.RLock()
+        self._db = self._connect()
+        self._migrate_json()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create tables"""
+        db = sqlite3.connect(
+            self._get_file_path(self.DB_FILENAME),
+            check_same_thread=False
+        )
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        db.executescript(SCHEMA)
+        return db
+    
+    def _migrate_json(self):
+        """Import sessions.json and messages_*.json once"""
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value FROM meta WHERE key = 'json_migrated'"
+            ).fetchone()
+            if row:
+                return
+            
+            try:
+                with self._db:
+                    sessions = super().load_sessions()
+                    self._replace_sessions(sessions)
+                    
+                    for filename in os.listdir(self._storage_dir):
+                        if filename.startswith('messages_') and filename.endswith('.json'):
+                            session_id = filename[len('messages_'):-len('.json')]
+                            self._replace_messages(session_id, super().load_messages(session_id))
+                    
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', '1')"
+                    )
+            except Exception as e:
+                print(f"Error migrating JSON history: {e}")
+    
+    # Sessions
+    def load_sessions(self) -> List[Dict[str, Any]]:
+        """Load saved chat sessions, most recently added first"""
+        with self._db_lock:
+            rows = self._db.execute(
+                'SELECT data FROM sessions ORDER BY position DESC'
+            ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+    
+    def save_sessions(self, sessions: List[Dict[str, Any]]) -> bool:
+        """Replace all chat sessions"""
+        try:
+            with self._db_lock, self._db:
+                self._replace_sessions(sessions)
+            return True
+        except Exception as e:
+            print(f"Error saving sessions: {e}")
+            return False
+    
+    def _replace_sessions(self, sessions: List[Dict[str, Any]]):
+        """Rewrite the sessions table keeping list order (caller holds lock)"""
+        self._db.execute('DELETE FROM sessions')
+        count = len(sessions)
+        self._db.executemany(
+            'INSERT OR REPLACE INTO sessions (session_id, position, data) VALUES (?, ?, ?)',
+            [
+                (s.get('session_id'), count - i, json.dumps(s, ensure_ascii=False))
+                for i, s in enumerate(sessions)
+            ]
+        )
+    
+    def save_session(self, session: Dict[str, Any]) -> bool:
+        """Save a single session, updating it in place if it exists"""
+        data = json.dumps(session, ensure_ascii=False)
+        
+        try:
+            with self._db_lock, self._db:
+                updated = self._db.execute(
+                    'UPDATE sessions SET data = ? WHERE session_id = ?',
+                    (data, session.get('session_id'))
+                ).rowcount
+                
+                if not updated:
+                    # New sessions go to the top of the list
+                    self._db.execute(
+                        'INSERT INTO sessions (session_id, position, data) '
+                        'VALUES (?, (SELECT COALESCE(MAX(position), 0) + 1 FROM sessions), ?)',
+                        (session.get('session_id'), data)
+                    )
+            return True
+        except Exception as e:
+            print(f"Error saving session: {e}")
+            return False
+    
+    def delete_session(self, session_id: str) -> bool:
+        """Delete a session and its messages"""
+        try:
+            with self._db_lock, self._db:
+                self._db.execute('DELETE FROM sessions WHERE session_id = ?', (session_id,))
+                self._db.execute('DELETE FROM messages WHERE session_id = ?', (session_id,))
+                self._db.execute('DELETE FROM meta WHERE key = ?', (f'history:{session_id}',))
+            return True
+        except Exception as e:
+            print(f"Error deleting session: {e}")
+            return False
+    
+    # Messages
+    def load_messages(self, session_id: str) -> List[Dict[str, Any]]:
+        """Load messages for a session in order"""
+        with self._db_lock:
+            rows = self._db.execute(
+                'SELECT data FROM messages WHERE session_id = ? ORDER BY seq',
+                (session_id,)
+            ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+    
+    def save_messages(self, session_id: str, messages: List[Dict[str, Any]]) -> bool:
+        """
+        Save messages for a session
+        
+        When the stored messages are a prefix of `messages`, only the new
+        tail is inserted; otherwise the session's rows are replaced.
+        """
+        try:
+            with self._db_lock, self._db:
+                count, last = self._db.execute(
+                    'SELECT COUNT(*), (SELECT data FROM messages WHERE session_id = ? '
+                    'ORDER BY seq DESC LIMIT 1) FROM messages WHERE session_id = ?',
+                    (session_id, session_id)
+                ).fetchone()
+                
+                is_prefix = count <= len(messages) and (
+                    count == 0 or json.loads(last) == messages[count - 1]
+                )
+                
+                if is_prefix:
+                    self._insert_messages(session_id, count, messages[count:])
+                else:
+                    self._replace_messages(session_id, messages)
+            return True
+        except Exception as e:
+            print(f"Error saving messages: {e}")
+            return False
+    
+    def append_message(self, session_id: str, message: Dict[str, Any]) -> bool:
+        """Append one message to a session"""
+        try:
+            with self._db_lock, self._db:
+                self._db.execute(
+                    'INSERT INTO messages (session_id, seq, data) VALUES '
+                    '(?, (SELECT COALESCE(MAX(seq), -1) + 1 FROM messages WHERE session_id = ?), ?)',
+                    (session_id, session_id, json.dumps(message, ensure_ascii=False))
+                )
+            return True
+        except Exception as e:
+            print(f"Error appending message: {e}")
+            return False
+    
+    def _insert_messages(self, session_id: str, start: int, messages: List[Dict[str, Any]]):
+        """Insert messages starting at sequence number start (caller holds lock)"""
+        self._db.executemany(
+            'INSERT INTO messages (session_id, seq, data) VALUES (?, ?, ?)',
+            [
+                (session_id, start + i, json.dumps(m, ensure_ascii=False))
+                for i, m in enumerate(messages)
+            ]
+        )
+    
+    def _replace_messages(self, session_id: str, messages: List[Dict[str, Any]]):
+        """Rewrite all messages of a session (caller holds lock)"""
+        self._db.execute('DELETE FROM messages WHERE session_id = ?', (session_id,))
+        self._insert_messages(session_id, 0, messages)
+    
+    # History cache validators
+    def load_history_meta(self, session_id: str) -> Dict[str, Any]:
+        """Load the ETag/Last-Modified of a session's cached messages"""
+        with self._db_lock:
+            row = self._db.execute(
+                'SELECT value FROM meta WHERE key = ?', (f'history:{session_id}',)
+            ).fetchone()
+        return json.loads(row[0]) if row else {}
+    
+    def save_history_meta(self, session_id: str, meta: Dict[str, Any]) -> bool:
+        """Save the ETag/Last-Modified of a session's cached messages"""
+        try:
+            with self._db_lock, self._db:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                    (f'history:{session_id}', json.dumps(meta))
+                )
+            return True
+        except Exception as e:
+            print(f"Error saving history meta: {e}")
+            return False
+    
+    # Clear all data
+    def clear_all(self) -> bool:
+        """Clear all stored data"""
+        # Hold the writer lock throughout so a deferred operation cannot
+        # insert rows between the deletes and dropping the queue
+        with self._io_lock:
+            try:
+                with self._db_lock, self._db:
+                    self._db.execute('DELETE FROM sessions')
+                    self._db.execute('DELETE FROM messages')
+                    self._db.execute("DELETE FROM meta WHERE key LIKE 'history:%'")
+            except Exception as e:
+                print(f"Error clearing database: {e}")
+                return False
+            
+            return super().clear_all()
@@ -1,161 +1,339 @@
-"""
-Storage Service - Local data persistence
-"""
-
-import json
-import os
-from typing import Dict, Any, List
-from kivy.utils import platform
-
-
-class StorageService:
-    """
-    Handles local storage for settings, stats, and sessions
-    Uses JSON files for persistence
-    """
-    
-    def __init__(self):
-        self._storage_dir = self._get_storage_dir()
-        self._ensure_storage_dir()
-    
-    def _get_storage_dir(self) -> str:
-        """Get the appropriate storage directory for the platform"""
-        if platform == 'android':
-            # On Android, use the app's private storage
-            from jnius import autoclass
-            PythonActivity = autoclass('org.kivy.android.PythonActivity')
-            context = PythonActivity.mActivity
-            return context.getFilesDir().getPath()
-        else:
-            # On desktop, use a local directory
-            return os.path.join(os.path.dirname(__file__), '..', 'storage')
-    
-    def _ensure_storage_dir(self):
-        """Ensure the storage directory exists"""
-        if not os.path.exists(self._storage_dir):
-            os.makedirs(self._storage_dir)
-    
-    def _get_file_path(self, filename: str) -> str:
-        """Get full path for a storage file"""
-        return os.path.join(self._storage_dir, filename)
-    
-    def _read_json(self, filename: str) -> Dict[str, Any]:
-        """Read JSON file"""
-        filepath = self._get_file_path(filename)
-        
-        if not os.path.exists(filepath):
-            return {}
-        
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error reading {filename}: {e}")
-            return {}
-    
-    def _write_json(self, filename: str, data: Dict[str, Any]) -> bool:
-        """Write JSON file"""
-        filepath = self._get_file_path(filename)
-        
-        try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            return True
-        except Exception as e:
-            print(f"Error writing {filename}: {e}")
-            return False
-    
-    # Settings
-    def load_settings(self) -> Dict[str, Any]:
-        """Load app settings"""
-        defaults = {
-            'theme': 'dark',
-            'color_scheme': 'purple',
-            'font_size': 'medium',
-            'tts': False,
-            'api_url': 'http://localhost:8000',
-            'notifications': True,
-            'auto_save': True
-        }
-        
-        saved = self._read_json('settings.json')
-        return {**defaults, **saved}
-    
-    def save_settings(self, settings: Dict[str, Any]) -> bool:
-        """Save app settings"""
-        return self._write_json('settings.json', settings)
-    
-    # Stats
-    def load_stats(self) -> Dict[str, Any]:
-        """Load user stats"""
-        defaults = {
-            'total_messages': 0,
-            'exported_count': 0,
-            'last_login': None,
-            'streak': 0,
-            'userName': 'Tony Stark'
-        }
-        
-        saved = self._read_json('stats.json')
-        return {**defaults, **saved}
-    
-    def save_stats(self, stats: Dict[str, Any]) -> bool:
-        """Save user stats"""
-        return self._write_json('stats.json', stats)
-    
-    # Sessions
-    def load_sessions(self) -> List[Dict[str, Any]]:
-        """Load saved chat sessions"""
-        data = self._read_json('sessions.json')
-        return data.get('sessions', [])
-    
-    def save_sessions(self, sessions: List[Dict[str, Any]]) -> bool:
-        """Save chat sessions"""
-        return self._write_json('sessions.json', {'sessions': sessions})
-    
-    def save_session(self, session: Dict[str, Any]) -> bool:
-        """Save a single session"""
-        sessions = self.load_sessions()
-        
-        # Update or add session
-        session_id = session.get('session_id')
-        found = False
-        
-        for i, s in enumerate(sessions):
-            if s.get('session_id') == session_id:
-                sessions[i] = session
-                found = True
-                break
-        
-        if not found:
-            sessions.insert(0, session)
-        
-        return self.save_sessions(sessions)
-    
-    def delete_session(self, session_id: str) -> bool:
-        """Delete a session"""
-        sessions = self.load_sessions()
-        sessions = [s for s in sessions if s.get('session_id') != session_id]
-        return self.save_sessions(sessions)
-    
-    # Messages
-    def load_messages(self, session_id: str) -> List[Dict[str, Any]]:
-        """Load messages for a session"""
-        data = self._read_json(f'messages_{session_id}.json')
-        return data.get('messages', [])
-    
-    def save_messages(self, session_id: str, messages: List[Dict[str, Any]]) -> bool:
-        """Save messages for a session"""
-        return self._write_json(f'messages_{session_id}.json', {'messages': messages})
-    
-    # Clear all data
-    def clear_all(self) -> bool:
-        """Clear all stored data"""
-        try:
-            for filename in os.listdir(self._storage_dir):
-                if filename.endswith('.json'):
-                    os.remove(os.path.join(self._storage_dir, filename))
-            return True
-        except Exception as e:
-            print(f"Error clearing data: {e}")
-            return False
+"""
+Storage Service - Local data persistence
+"""
+
+import itertools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Callable, Optional
+from kivy.utils import platform
+
+
+class StorageService:
+    """
+    Handles local storage for settings, stats, and sessions
+    Uses JSON files for persistence
+    
+    Writes are queued for a background writer thread. Repeated writes to
+    the same file within WRITE_DELAY are merged into one, and each file is
+    replaced atomically (temp file, fsync, rename). Call flush() to write
+    everything synchronously, e.g. when the app stops.
+    """
+    
+    # Seconds the writer waits so repeated writes can be coalesced
+    WRITE_DELAY = 0.3
+    
+    def __init__(self):
+        self._storage_dir = self._get_storage_dir()
+        self._ensure_storage_dir()
+        
+        # key -> (filename or None, payload or None, operation)
+        self._pending = OrderedDict()
+        self._writing = OrderedDict()
+        self._queue_cond = threading.Condition()
+        self._io_lock = threading.RLock()
+        self._rmw_lock = threading.RLock()
+        self._op_ids = itertools.count()
+        self._writer = None
+    
+    def _get_storage_dir(self) -> str:
+        """Get the appropriate storage directory for the platform"""
+        if platform == 'android':
+            # On Android, use the app's private storage
+            from jnius import autoclass
+            PythonActivity = autoclass('org.kivy.android.PythonActivity')
+            context = PythonActivity.mActivity
+            return context.getFilesDir().getPath()
+        else:
+            # On desktop, use a local directory (JARVIS_STORAGE_DIR lets
+            # benchmarks run against a scratch directory)
+            return os.environ.get('JARVIS_STORAGE_DIR') or os.path.join(
+                os.path.dirname(__file__), '..', 'storage'
+            )
+    
+    def _ensure_storage_dir(self):
+        """Ensure the storage directory exists"""
+        if not os.path.exists(self._storage_dir):
+            os.makedirs(self._storage_dir)
+    
+    def _get_file_path(self, filename: str) -> str:
+        """Get full path for a storage file"""
+        return os.path.join(self._storage_dir, filename)
+    
+    def _read_json(self, filename: str) -> Dict[str, Any]:
+        """Read JSON file, seeing writes that are still queued"""
+        with self._queue_cond:
+            for queue in (self._pending, self._writing):
+                entry = queue.get(f'file:{filename}')
+                if entry is not None:
+                    return json.loads(entry[1])
+        
+        filepath = self._get_file_path(filename)
+        
+        if not os.path.exists(filepath):
+            return {}
+        
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error reading {filename}: {e}")
+            return {}
+    
+    def _write_json(self, filename: str, data: Dict[str, Any]) -> bool:
+        """
+        Queue a JSON file write
+        
+        The data is serialized now, so callers may keep mutating it.
+        
+        Returns:
+            True if the write was queued
+        """
+        try:
+            payload = json.dumps(data, indent=2, ensure_ascii=False)
+        except Exception as e:
+            print(f"Error writing {filename}: {e}")
+            return False
+        
+        self._enqueue(
+            f'file:{filename}',
+            (filename, payload, lambda: self._write_file_atomic(filename, payload))
+        )
+        return True
+    
+    def _write_file_atomic(self, filename: str, payload: str):
+        """Write a file via temp file + fsync + rename so it is never truncated"""
+        filepath = self._get_file_path(filename)
+        tmp_path = f'{filepath}.tmp'
+        
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+        
+        # Persist the rename itself where the platform allows it
+        if hasattr(os, 'O_DIRECTORY'):
+            dir_fd = os.open(self._storage_dir, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+    
+    # Background writer
+    def defer(self, operation: Callable[[], Any], key: Optional[str] = None):
+        """
+        Run a storage operation on the background writer
+        
+        Args:
+            operation: Callable doing the disk work
+            key: Operations sharing a key are coalesced (latest wins)
+        """
+        if key is None:
+            key = f'op:{next(self._op_ids)}'
+        self._enqueue(key, (None, None, operation))
+    
+    def _enqueue(self, key: str, entry):
+        """Add or replace a queued write and wake the writer"""
+        with self._queue_cond:
+            self._pending[key] = entry
+            # A replaced write runs after everything queued before it, not
+            # in the old one's place
+            self._pending.move_to_end(key)
+            self._queue_cond.notify()
+            
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._writer_loop, name='jarvis-storage')
+                self._writer.daemon = True
+                self._writer.start()
+    
+    def _writer_loop(self):
+        """Writer thread body"""
+        while True:
+            with self._queue_cond:
+                while not self._pending:
+                    self._queue_cond.wait()
+            
+            # Give repeated writes a moment to coalesce
+            time.sleep(self.WRITE_DELAY)
+            self._write_pending()
+    
+    def _write_pending(self):
+        """Perform all queued writes in order"""
+        with self._io_lock:
+            with self._queue_cond:
+                self._writing, self._pending = self._pending, OrderedDict()
+            
+            for key, (filename, payload, operation) in self._writing.items():
+                try:
+                    operation()
+                except Exception as e:
+                    print(f"Error writing {filename or key}: {e}")
+            
+            with self._queue_cond:
+                self._writing = OrderedDict()
+    
+    def flush(self):
+        """
+        Write everything queued so far before returning
+        
+        Deferred operations queue file writes of their own as they run,
+        so this repeats until nothing is left.
+        """
+        with self._io_lock:
+            while True:
+                with self._queue_cond:
+                    if not self._pending:
+                        return
+                self._write_pending()
+    
+    # Settings
+    def load_settings(self) -> Dict[str, Any]:
+        """Load app settings"""
+        defaults = {
+            'theme': 'dark',
+            'color_scheme': 'purple',
+            'font_size': 'medium',
+            'tts': False,
+            'persistent_mic': False,
+            'speech_backend': 'vosk',
+            'api_url': 'http://localhost:8000',
+            'notifications': True,
+            'auto_save': True,
+            'stream_responses': True
+        }
+        
+        saved = self._read_json('settings.json')
+        return {**defaults, **saved}
+    
+    def save_settings(self, settings: Dict[str, Any]) -> bool:
+        """Save app settings"""
+        return self._write_json('settings.json', settings)
+    
+    # Stats
+    def load_stats(self) -> Dict[str, Any]:
+        """Load user stats"""
+        defaults = {
+            'total_messages': 0,
+            'exported_count': 0,
+            'last_login': None,
+            'streak': 0,
+            'userName': 'Tony Stark'
+        }
+        
+        saved = self._read_json('stats.json')
+        return {**defaults, **saved}
+    
+    def save_stats(self, stats: Dict[str, Any]) -> bool:
+        """Save user stats"""
+        return self._write_json('stats.json', stats)
+    
+    # Sessions
+    def load_sessions(self) -> List[Dict[str, Any]]:
+        """Load saved chat sessions"""
+        data = self._read_json('sessions.json')
+        return data.get('sessions', [])
+    
+    def save_sessions(self, sessions: List[Dict[str, Any]]) -> bool:
+        """Save chat sessions"""
+        return self._write_json('sessions.json', {'sessions': sessions})
+    
+    def save_session(self, session: Dict[str, Any]) -> bool:
+        """Save a single session"""
+        with self._rmw_lock:
+            return self._save_session(session)
+    
+    def _save_session(self, session: Dict[str, Any]) -> bool:
+        """Read-modify-write of sessions.json (caller holds _rmw_lock)"""
+        sessions = self.load_sessions()
+        
+        # Update or add session
+        session_id = session.get('session_id')
+        found = False
+        
+        for i, s in enumerate(sessions):
+            if s.get('session_id') == session_id:
+                sessions[i] = session
+                found = True
+                break
+        
+        if not found:
+            sessions.insert(0, session)
+        
+        return self.save_sessions(sessions)
+    
+    def delete_session(self, session_id: str) -> bool:
+        """Delete a session"""
+        with self._rmw_lock:
+            sessions = self.load_sessions()
+            sessions = [s for s in sessions if s.get('session_id') != session_id]
+            
+            validators = self._read_json('history_meta.json')
+            if validators.pop(session_id, None) is not None:
+                self._write_json('history_meta.json', validators)
+            
+            return self.save_sessions(sessions)
+    
+    # Messages
+    def load_messages(self, session_id: str) -> List[Dict[str, Any]]:
+        """Load messages for a session"""
+        data = self._read_json(f'messages_{session_id}.json')
+        return data.get('messages', [])
+    
+    def save_messages(self, session_id: str, messages: List[Dict[str, Any]]) -> bool:
+        """Save messages for a session"""
+        return self._write_json(f'messages_{session_id}.json', {'messages': messages})
+    
+    def append_message(self, session_id: str, message: Dict[str, Any]) -> bool:
+        """Append one message to a session"""
+        with self._rmw_lock:
+            messages = self.load_messages(session_id)
+            messages.append(message)
+            return self.save_messages(session_id, messages)
+    
+    # Outbox
+    def load_outbox(self) -> List[Dict[str, Any]]:
+        """Load chat messages waiting to be sent"""
+        return self._read_json('outbox.json').get('items', [])
+    
+    def save_outbox(self, items: List[Dict[str, Any]]) -> bool:
+        """Save chat messages waiting to be sent"""
+        return self._write_json('outbox.json', {'items': items})
+    
+    # Diagnostics
+    def save_latency_report(self, report: Dict[str, Any]) -> str:
+        """Save an exported latency report and return the file's path"""
+        self._write_json('latency_report.json', report)
+        return os.path.abspath(self._get_file_path('latency_report.json'))
+    
+    # History cache validators
+    def load_history_meta(self, session_id: str) -> Dict[str, Any]:
+        """Load the ETag/Last-Modified of a session's cached messages"""
+        return self._read_json('history_meta.json').get(session_id, {})
+    
+    def save_history_meta(self, session_id: str, meta: Dict[str, Any]) -> bool:
+        """Save the ETag/Last-Modified of a session's cached messages"""
+        with self._rmw_lock:
+            validators = self._read_json('history_meta.json')
+            validators[session_id] = meta
+            return self._write_json('history_meta.json', validators)
+    
+    # Clear all data
+    def clear_all(self) -> bool:
+        """Clear all stored data"""
+        with self._io_lock:
+            # Drop queued writes so nothing is recreated afterwards
+            with self._queue_cond:
+                self._pending.clear()
+            
+            try:
+                for filename in os.listdir(self._storage_dir):
+                    if filename.endswith('.json'):
+                        os.remove(os.path.join(self._storage_dir, filename))
+                return True
+            except Exception as e:
+                print(f"Error clearing data: {e}")
+                return False
@@ -1,216 +1,599 @@
-"""
-Voice Service - Speech recognition and text-to-speech
-"""
-
-from kivy.utils import platform
-from kivy.clock import Clock
-import threading
-
-
-class VoiceService:
-    """
-    Handles speech recognition and text-to-speech
-    Works on Android and desktop platforms
-    """
-    
-    def __init__(self):
-        self.is_listening = False
-        self._callback = None
-        self._tts_engine = None
-        self._recognizer = None
-        
-        # Initialize platform-specific services
-        self._init_tts()
-        self._init_recognizer()
-    
-    def _init_tts(self):
-        """Initialize text-to-speech engine"""
-        if platform == 'android':
-            self._init_android_tts()
-        else:
-            self._init_desktop_tts()
-    
-    def _init_android_tts(self):
-        """Initialize Android TTS using pyjnius"""
-        try:
-            from jnius import autoclass
-            
-            Locale = autoclass('java.util.Locale')
-            PythonActivity = autoclass('org.kivy.android.PythonActivity')
-            TextToSpeech = autoclass('android.speech.tts.TextToSpeech')
-            
-            self._tts_engine = TextToSpeech(
-                PythonActivity.mActivity,
-                None
-            )
-            self._tts_engine.setLanguage(Locale.US)
-            
-        except Exception as e:
-            print(f"Failed to initialize Android TTS: {e}")
-            self._tts_engine = None
-    
-    def _init_desktop_tts(self):
-        """Initialize desktop TTS using pyttsx3"""
-        try:
-            import pyttsx3
-            self._tts_engine = pyttsx3.init()
-            
-            # Configure voice
-            voices = self._tts_engine.getProperty('voices')
-            if voices:
-                # Try to find a good English voice
-                for voice in voices:
-                    if 'english' in voice.name.lower() or 'en' in voice.id.lower():
-                        self._tts_engine.setProperty('voice', voice.id)
-                        break
-            
-            self._tts_engine.setProperty('rate', 150)
-            
-        except Exception as e:
-            print(f"Failed to initialize desktop TTS: {e}")
-            self._tts_engine = None
-    
-    def _init_recognizer(self):
-        """Initialize speech recognizer"""
-        if platform == 'android':
-            self._init_android_recognizer()
-        else:
-            self._init_desktop_recognizer()
-    
-    def _init_android_recognizer(self):
-        """Initialize Android speech recognizer"""
-        # Android recognizer is initialized on-demand
-        pass
-    
-    def _init_desktop_recognizer(self):
-        """Initialize desktop speech recognizer"""
-        try:
-            import speech_recognition as sr
-            self._recognizer = sr.Recognizer()
-        except Exception as e:
-            print(f"Failed to initialize speech recognizer: {e}")
-            self._recognizer = None
-    
-    def start_listening(self, callback):
-        """
-        Start listening for voice input
-        
-        Args:
-            callback: Function to call with recognized text
-        """
-        self.is_listening = True
-        self._callback = callback
-        
-        if platform == 'android':
-            self._start_android_listening()
-        else:
-            self._start_desktop_listening()
-    
-    def _start_android_listening(self):
-        """Start Android speech recognition"""
-        try:
-            from jnius import autoclass
-            
-            Intent = autoclass('android.content.Intent')
-            RecognizerIntent = autoclass('android.speech.RecognizerIntent')
-            PythonActivity = autoclass('org.kivy.android.PythonActivity')
-            
-            intent = Intent(RecognizerIntent.ACTION_RECOGNIZE_SPEECH)
-            intent.putExtra(RecognizerIntent.EXTRA_LANGUAGE_MODEL, 
-                          RecognizerIntent.LANGUAGE_MODEL_FREE_FORM)
-            intent.putExtra(RecognizerIntent.EXTRA_LANGUAGE, 'en-US')
-            intent.putExtra(RecognizerIntent.EXTRA_PROMPT, 'Speak to J.A.R.V.I.S...')
-            
-            PythonActivity.mActivity.startActivityForResult(intent, 1234)
-            
-        except Exception as e:
-            print(f"Failed to start Android speech recognition: {e}")
-            self.stop_listening()
-    
-    def _start_desktop_listening(self):
-        """Start desktop speech recognition"""
-        if not self._recognizer:
-            self.stop_listening()
-            return
-        
-        def listen_thread():
-            try:
-                import speech_recognition as sr
-                
-                with sr.Microphone() as source:
-                    self._recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                    audio = self._recognizer.listen(source, timeout=5, phrase_time_limit=10)
-                
-                try:
-                    text = self._recognizer.recognize_google(audio)
-                    if self._callback:
-                        Clock.schedule_once(lambda dt: self._callback(text), 0)
-                except sr.UnknownValueError:
-                    print("Could not understand audio")
-                except sr.RequestError as e:
-                    print(f"Speech recognition error: {e}")
-                    
-            except Exception as e:
-                print(f"Listening error: {e}")
-            finally:
-                Clock.schedule_once(lambda dt: self.stop_listening(), 0)
-        
-        thread = threading.Thread(target=listen_thread)
-        thread.daemon = True
-        thread.start()
-    
-    def stop_listening(self):
-        """Stop listening for voice input"""
-        self.is_listening = False
-    
-    def speak(self, text):
-        """
-        Speak text using TTS
-        
-        Args:
-            text: Text to speak
-        """
-        if not self._tts_engine:
-            return
-        
-        if platform == 'android':
-            self._speak_android(text)
-        else:
-            self._speak_desktop(text)
-    
-    def _speak_android(self, text):
-        """Speak using Android TTS"""
-        try:
-            from jnius import autoclass
-            TextToSpeech = autoclass('android.speech.tts.TextToSpeech')
-            
-            if self._tts_engine:
-                self._tts_engine.speak(
-                    text,
-                    TextToSpeech.QUEUE_FLUSH,
-                    None
-                )
-        except Exception as e:
-            print(f"Android TTS error: {e}")
-    
-    def _speak_desktop(self, text):
-        """Speak using desktop TTS"""
-        try:
-            if self._tts_engine:
-                self._tts_engine.say(text)
-                self._tts_engine.runAndWait()
-        except Exception as e:
-            print(f"Desktop TTS error: {e}")
-    
-    def stop_speaking(self):
-        """Stop any ongoing speech"""
-        if platform == 'android' and self._tts_engine:
-            try:
-                self._tts_engine.stop()
-            except:
-                pass
-        elif self._tts_engine:
-            try:
-                self._tts_engine.stop()
-            except:
-                pass
+"""
+Voice Service - Speech recognition and text-to-speech
+"""
+
+from kivy.utils import platform
+from kivy.clock import Clock
+from kivy.event import EventDispatcher
+from kivy.properties import BooleanProperty
+import queue
+import re
+import threading
+import time
+
+
+# Sentence ends: ., ! or ? (optionally followed by quotes/brackets) and
+# whitespace, or a line break
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+|(?<=[.!?]["\')\]])\s+|\n+')
+
+
+def split_sentences(text):
+    """Split text into sentences so speech can start after the first one"""
+    return [part.strip() for part in SENTENCE_END.split(text) if part and part.strip()]
+
+
+class VoiceService(EventDispatcher):
+    """
+    Handles speech recognition and text-to-speech
+    Works on Android and desktop platforms
+    
+    Nothing is loaded in the constructor. The TTS engine and recognizer
+    are created on first use, or earlier by warm_up() on a background
+    thread; tts_ready and recognizer_ready turn True once they exist.
+    """
+    
+    # Ambient noise calibration is reused until it is this old (seconds),
+    # then refreshed in the background after a query
+    CALIBRATION_DURATION = 0.5
+    CALIBRATION_MAX_AGE = 300
+    
+    # Seconds of silence that end an utterance
+    PAUSE_THRESHOLD = 0.5
+    
+    # True once the engine/recognizer has been created (set on main thread)
+    tts_ready = BooleanProperty(False)
+    recognizer_ready = BooleanProperty(False)
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.is_listening = False
+        self._callback = None
+        self._partial_callback = None
+        self._tts_engine = None
+        self._recognizer = None
+        
+        # Desktop speech-to-text backends, preferred first (see recognizers)
+        self.speech_backend = 'vosk'
+        self._backends = []
+        
+        # Android SpeechRecognizer and its listener (created on the UI thread)
+        self._android_recognizer = None
+        self._android_listener = None
+        
+        # Whether initialization has been attempted (it may have failed)
+        self._tts_loaded = False
+        self._recognizer_loaded = False
+        self._tts_lock = threading.Lock()
+        self._recognizer_lock = threading.Lock()
+        
+        # Desktop speech runs on one worker thread that owns the engine.
+        # Queued items are (generation, sentence); stop_speaking bumps the
+        # generation so sentences queued before it are skipped, and the
+        # worker stops the sentence being spoken at its next word.
+        self._speech_queue = queue.Queue()
+        self._speech_generation = 0
+        self._speech_worker = None
+        self._speech_lock = threading.Lock()
+        
+        # Desktop microphone: cached calibration (monotonic time, 0 = never)
+        # or an always-open MicStream
+        self._calibrated_at = 0
+        self._mic_lock = threading.Lock()
+        self._mic_stream = None
+        # Set by stop_listening; each listen gets a fresh one, so a stop
+        # can never be lost or carried over to the next listen
+        self._listen_cancel = threading.Event()
+    
+    def warm_up(self):
+        """Create the recognizer and TTS engine on background threads"""
+        if platform != 'android':
+            # The speech worker creates the engine on its own thread
+            self._start_speech_worker()
+        
+        if self._tts_loaded and self._recognizer_loaded:
+            return
+        
+        def load():
+            self._ensure_recognizer()
+            if platform == 'android':
+                self._ensure_tts()
+            elif self._mic_stream is None:
+                self._calibrate()
+        
+        self._run_in_background(load)
+    
+    def _run_in_background(self, target):
+        """Run target on a daemon thread"""
+        def run():
+            try:
+                target()
+            finally:
+                if platform == 'android':
+                    # Threads that used pyjnius must detach from the JVM
+                    try:
+                        from jnius import detach
+                        detach()
+                    except Exception:
+                        pass
+        
+        thread = threading.Thread(target=run, name='jarvis-voice')
+        thread.daemon = True
+        thread.start()
+    
+    def _ensure_tts(self):
+        """Create the TTS engine once (blocking) and return it"""
+        with self._tts_lock:
+            if not self._tts_loaded:
+                self._init_tts()
+                self._tts_loaded = True
+                if self._tts_engine is not None:
+                    Clock.schedule_once(lambda dt: setattr(self, 'tts_ready', True), 0)
+        return self._tts_engine
+    
+    def _ensure_recognizer(self):
+        """Create the speech recognizer once (blocking) and return it"""
+        with self._recognizer_lock:
+            if not self._recognizer_loaded:
+                self._init_recognizer()
+                self._recognizer_loaded = True
+                if platform == 'android' or self._recognizer is not None:
+                    Clock.schedule_once(lambda dt: setattr(self, 'recognizer_ready', True), 0)
+        return self._recognizer
+    
+    def _init_tts(self):
+        """Initialize text-to-speech engine"""
+        if platform == 'android':
+            self._init_android_tts()
+        else:
+            self._init_desktop_tts()
+    
+    def _init_android_tts(self):
+        """Initialize Android TTS using pyjnius"""
+        try:
+            from jnius import autoclass
+            
+            Locale = autoclass('java.util.Locale')
+            PythonActivity = autoclass('org.kivy.android.PythonActivity')
+            TextToSpeech = autoclass('android.speech.tts.TextToSpeech')
+            
+            self._tts_engine = TextToSpeech(
+                PythonActivity.mActivity,
+                None
+            )
+            self._tts_engine.setLanguage(Locale.US)
+            
+        except Exception as e:
+            print(f"Failed to initialize Android TTS: {e}")
+            self._tts_engine = None
+    
+    def _init_desktop_tts(self):
+        """Initialize desktop TTS using pyttsx3"""
+        try:
+            import pyttsx3
+            self._tts_engine = pyttsx3.init()
+            
+            # Configure voice
+            voices = self._tts_engine.getProperty('voices')
+            if voices:
+                # Try to find a good English voice
+                for voice in voices:
+                    if 'english' in voice.name.lower() or 'en' in voice.id.lower():
+                        self._tts_engine.setProperty('voice', voice.id)
+                        break
+            
+            self._tts_engine.setProperty('rate', 150)
+            
+        except Exception as e:
+            print(f"Failed to initialize desktop TTS: {e}")
+            self._tts_engine = None
+    
+    def _init_recognizer(self):
+        """Initialize speech recognizer"""
+        if platform == 'android':
+            self._init_android_recognizer()
+        else:
+            self._init_desktop_recognizer()
+    
+    def _init_android_recognizer(self):
+        """Initialize Android speech recognizer"""
+        # The SpeechRecognizer must be created on the UI thread, so it is
+        # created when listening starts
+        pass
+    
+    def _init_desktop_recognizer(self):
+        """Initialize desktop speech recognizer"""
+        try:
+            import speech_recognition as sr
+            self._recognizer = sr.Recognizer()
+            self._recognizer.pause_threshold = self.PAUSE_THRESHOLD
+            self._recognizer.non_speaking_duration = self.PAUSE_THRESHOLD
+        except Exception as e:
+            print(f"Failed to initialize speech recognizer: {e}")
+            self._recognizer = None
+            return
+        
+        # Loading an offline model can take a few seconds
+        from .recognizers import load_backends
+        self._backends = load_backends(self.speech_backend)
+        if not self._backends:
+            print("No speech recognition backend available")
+    
+    def set_speech_backend(self, name):
+        """Prefer a desktop backend ('vosk' or 'google'); others are fallbacks"""
+        self.speech_backend = name
+        self._backends.sort(key=lambda backend: backend.name != name)
+    
+    def set_persistent_mic(self, enabled):
+        """
+        Keep the desktop microphone open between queries
+        
+        An open stream removes the per-query microphone setup and keeps a
+        short pre-roll, so speech that starts as the user taps is not lost.
+        """
+        if platform == 'android':
+            return
+        
+        if enabled and self._mic_stream is None:
+            self._mic_stream = self._create_mic_stream()
+            self._mic_stream.start()
+        elif not enabled and self._mic_stream is not None:
+            self._mic_stream.stop()
+            self._mic_stream = None
+    
+    def _create_mic_stream(self):
+        """MicStream starting from the cached calibration, if there is one"""
+        from .mic_stream import MicStream
+        
+        mic_stream = MicStream()
+        if self._calibrated_at:
+            mic_stream.noise_floor = self._recognizer.energy_threshold / MicStream.SPEECH_RATIO
+        return mic_stream
+    
+    def _calibrate(self):
+        """Measure ambient noise for the recognizer's energy threshold (blocking)"""
+        if not self._ensure_recognizer():
+            return
+        
+        try:
+            import speech_recognition as sr
+            
+            with self._mic_lock:
+                with sr.Microphone() as source:
+                    self._recognizer.adjust_for_ambient_noise(
+                        source, duration=self.CALIBRATION_DURATION
+                    )
+            self._calibrated_at = time.monotonic()
+        except Exception as e:
+            print(f"Microphone calibration error: {e}")
+    
+    def start_listening(self, callback, on_partial=None):
+        """
+        Start listening for voice input
+        
+        Args:
+            callback: Function to call with recognized text
+            on_partial: Function to call with the text so far while the
+                user speaks (if the recognizer supports it)
+        """
+        self.is_listening = True
+        self._listen_cancel = threading.Event()
+        self._callback = callback
+        self._partial_callback = on_partial
+        
+        if platform == 'android':
+            self._start_android_listening()
+        else:
+            self._start_desktop_listening()
+    
+    def _start_android_listening(self):
+        """Start Android speech recognition with partial results"""
+        try:
+            from jnius import autoclass
+            from android.permissions import Permission, check_permission, request_permissions
+            from android.runnable import run_on_ui_thread
+            from .recognizers import android_listener
+            
+            if not check_permission(Permission.RECORD_AUDIO):
+                def on_permission(permissions, grants):
+                    if all(grants):
+                        Clock.schedule_once(lambda dt: self._start_android_listening(), 0)
+                    else:
+                        Clock.schedule_once(lambda dt: self.stop_listening(), 0)
+                
+                request_permissions([Permission.RECORD_AUDIO], on_permission)
+                return
+            
+            Intent = autoclass('android.content.Intent')
+            RecognizerIntent = autoclass('android.speech.RecognizerIntent')
+            SpeechRecognizer = autoclass('android.speech.SpeechRecognizer')
+            PythonActivity = autoclass('org.kivy.android.PythonActivity')
+            
+            intent = Intent(RecognizerIntent.ACTION_RECOGNIZE_SPEECH)
+            intent.putExtra(RecognizerIntent.EXTRA_LANGUAGE_MODEL, 
+                          RecognizerIntent.LANGUAGE_MODEL_FREE_FORM)
+            intent.putExtra(RecognizerIntent.EXTRA_LANGUAGE, 'en-US')
+            intent.putExtra(RecognizerIntent.EXTRA_PARTIAL_RESULTS, True)
+            # Use the on-device model when one is installed (Android 6+)
+            intent.putExtra(RecognizerIntent.EXTRA_PREFER_OFFLINE, True)
+            
+            @run_on_ui_thread
+            def start():
+                try:
+                    if self._android_recognizer is None:
+                        self._android_recognizer = SpeechRecognizer.createSpeechRecognizer(
+                            PythonActivity.mActivity
+                        )
+                        # Keep a reference so the listener is not collected
+                        self._android_listener = android_listener(
+                            self._on_android_partial,
+                            self._on_android_result,
+                            self._on_android_error
+                        )
+                        self._android_recognizer.setRecognitionListener(self._android_listener)
+                    self._android_recognizer.startListening(intent)
+                except Exception as e:
+                    print(f"Failed to start Android speech recognition: {e}")
+                    Clock.schedule_once(lambda dt: self.stop_listening(), 0)
+            
+            start()
+            
+        except Exception as e:
+            print(f"Failed to start Android speech recognition: {e}")
+            self.stop_listening()
+    
+    def _on_android_partial(self, text):
+        """Partial hypothesis from Android (UI thread)"""
+        Clock.schedule_once(lambda dt: self._deliver_partial(text), 0)
+    
+    def _on_android_result(self, text):
+        """Final result from Android (UI thread)"""
+        def deliver(dt):
+            if text and self._callback:
+                self._callback(text)
+            self.stop_listening()
+        
+        Clock.schedule_once(deliver, 0)
+    
+    def _on_android_error(self, error):
+        """SpeechRecognizer error code (7 = no match)"""
+        print(f"Speech recognition error: {error}")
+        Clock.schedule_once(lambda dt: self.stop_listening(), 0)
+    
+    def _deliver_partial(self, text):
+        """Pass partial text to the listener while still listening"""
+        if self.is_listening and self._partial_callback:
+            self._partial_callback(text)
+    
+    def _start_desktop_listening(self):
+        """Start desktop speech recognition"""
+        cancel = self._listen_cancel
+        
+        def listen_thread():
+            try:
+                # Waits for the warm-up if it is still running
+                if not self._ensure_recognizer() or not self._backends or cancel.is_set():
+                    return
+                
+                if self._backends[0].streaming:
+                    text = self._listen_streaming(self._backends[0], cancel)
+                else:
+                    mic_stream = self._mic_stream
+                    if mic_stream is not None and mic_stream.is_running:
+                        audio = mic_stream.capture(timeout=5, phrase_time_limit=10, cancel=cancel)
+                    else:
+                        audio = self._listen_once()
+                    if cancel.is_set():
+                        return
+                    text = self._transcribe(audio) if audio is not None else ''
+                
+                if cancel.is_set():
+                    return
+                if not text:
+                    print("Could not understand audio")
+                elif self._callback:
+                    Clock.schedule_once(lambda dt: self._callback(text), 0)
+                    
+            except Exception as e:
+                print(f"Listening error: {e}")
+            finally:
+                Clock.schedule_once(lambda dt: self._end_listen(cancel), 0)
+        
+        self._run_in_background(listen_thread)
+    
+    def _end_listen(self, cancel):
+        """Stop listening unless a newer listen has started since"""
+        if cancel is self._listen_cancel:
+            self.stop_listening()
+    
+    def _transcribe(self, audio):
+        """Recognize captured audio, falling back to the next backend on failure"""
+        from .recognizers import RecognitionError
+        
+        for backend in self._backends:
+            try:
+                return backend.transcribe(audio)
+            except RecognitionError as e:
+                print(f"Speech recognition error ({backend.name}): {e}")
+        return ''
+    
+    def _listen_streaming(self, backend, cancel):
+        """Capture an utterance while a streaming backend recognizes it"""
+        mic_stream = self._mic_stream
+        transient = mic_stream is None or not mic_stream.is_running
+        if transient:
+            # Open the microphone for this query only; start from the
+            # cached calibration instead of measuring the noise again
+            mic_stream = self._create_mic_stream()
+            mic_stream.start()
+        
+        stream = None
+        
+        def on_frame(frame):
+            nonlocal stream
+            if stream is None:
+                stream = backend.start_stream(mic_stream.sample_rate)
+            partial = stream.feed(frame)
+            if partial:
+                Clock.schedule_once(lambda dt: self._deliver_partial(partial), 0)
+        
+        try:
+            audio = mic_stream.capture(
+                timeout=5, phrase_time_limit=10, on_frame=on_frame, cancel=cancel
+            )
+        finally:
+            if transient:
+                mic_stream.stop()
+        
+        if audio is None or stream is None:
+            return ''
+        return stream.finish()
+    
+    def _listen_once(self):
+        """Open the microphone for one utterance using the cached calibration"""
+        import speech_recognition as sr
+        
+        if not self._calibrated_at:
+            # Only if warm_up has not calibrated yet
+            self._calibrate()
+        
+        with self._mic_lock:
+            with sr.Microphone() as source:
+                audio = self._recognizer.listen(source, timeout=5, phrase_time_limit=10)
+        
+        # The recognizer's dynamic threshold tracks slow changes; refresh
+        # the calibration once in a while, after the query is done
+        if time.monotonic() - self._calibrated_at > self.CALIBRATION_MAX_AGE:
+            self._run_in_background(self._calibrate)
+        
+        return audio
+    
+    def stop_listening(self):
+        """Stop listening for voice input"""
+        self.is_listening = False
+        self._listen_cancel.set()
+        
+        if self._android_recognizer is not None:
+            from android.runnable import run_on_ui_thread
+            # Ends the utterance; the final result still arrives
+            run_on_ui_thread(self._android_recognizer.stopListening)()
+    
+    def speak(self, text):
+        """
+        Speak text using TTS without blocking the caller
+        
+        Anything still being spoken is interrupted. The text is split into
+        sentences so the first one starts playing as soon as possible.
+        
+        Args:
+            text: Text to speak
+        """
+        sentences = split_sentences(text)
+        if not sentences:
+            return
+        
+        self.stop_speaking()
+        
+        if platform == 'android':
+            self._speak_android(text, sentences)
+        else:
+            self._speak_desktop(sentences)
+    
+    def _speak_android(self, text, sentences):
+        """Speak using Android TTS (which plays asynchronously)"""
+        if not self._tts_loaded:
+            # Create the engine off the main thread, then speak
+            def load_and_speak():
+                if self._ensure_tts():
+                    Clock.schedule_once(lambda dt: self.speak(text), 0)
+            
+            self._run_in_background(load_and_speak)
+            return
+        
+        if not self._tts_engine:
+            return
+        
+        try:
+            from jnius import autoclass
+            TextToSpeech = autoclass('android.speech.tts.TextToSpeech')
+            
+            # The first sentence replaces anything queued; the rest follow it
+            for i, sentence in enumerate(sentences):
+                self._tts_engine.speak(
+                    sentence,
+                    TextToSpeech.QUEUE_FLUSH if i == 0 else TextToSpeech.QUEUE_ADD,
+                    None
+                )
+        except Exception as e:
+            print(f"Android TTS error: {e}")
+    
+    def _speak_desktop(self, sentences):
+        """Queue sentences for the desktop speech worker"""
+        with self._speech_lock:
+            generation = self._speech_generation
+        
+        for sentence in sentences:
+            self._speech_queue.put((generation, sentence))
+        
+        self._start_speech_worker()
+    
+    def _start_speech_worker(self):
+        """Start the desktop speech thread if it is not running"""
+        with self._speech_lock:
+            if self._speech_worker is not None:
+                return
+            
+            self._speech_worker = threading.Thread(
+                target=self._speech_loop,
+                name='jarvis-tts'
+            )
+            self._speech_worker.daemon = True
+            self._speech_worker.start()
+    
+    def _speech_loop(self):
+        """Desktop speech thread: speak queued sentences one at a time"""
+        engine = self._ensure_tts()
+        speaking = None
+        
+        def interrupt(**kwargs):
+            # pyttsx3 engines are not thread-safe, so stop_speaking only
+            # bumps the generation and the engine is stopped from its own
+            # loop when the next utterance or word starts
+            if speaking != self._speech_generation:
+                engine.stop()
+        
+        if engine is not None:
+            engine.connect('started-utterance', interrupt)
+            engine.connect('started-word', interrupt)
+        
+        while True:
+            generation, sentence = self._speech_queue.get()
+            
+            if engine is None or generation != self._speech_generation:
+                # No engine, or interrupted since this was queued
+                continue
+            
+            speaking = generation
+            try:
+                engine.say(sentence)
+                engine.runAndWait()
+            except Exception as e:
+                print(f"Desktop TTS error: {e}")
+    
+    def stop_speaking(self):
+        """Stop any ongoing speech and drop queued sentences"""
+        with self._speech_lock:
+            self._speech_generation += 1
+        
+        while True:
+            try:
+                self._speech_queue.get_nowait()
+            except queue.Empty:
+                break
+        
+        # The desktop speech worker stops its engine itself (see
+        # _speech_loop); Android's TextToSpeech can be stopped from here
+        if platform == 'android' and self._tts_engine:
+            try:
+                self._tts_engine.stop()
+            except Exception:
+                pass
@@ -0,0 +1,86 @@
+"""
+Tests for OutboxService.drain
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.api_service import APIService
+from services.outbox_service import OutboxService
+
+
+class MemoryStorage:
+    """Just the outbox part of StorageService"""
+    
+    def __init__(self):
+        self.outbox = []
+    
+    def load_outbox(self):
+        return list(self.outbox)
+    
+    def save_outbox(self, items):
+        self.outbox = list(items)
+
+
+class FakeAPI:
+    """APIService stand-in with a switchable server"""
+    
+    def __init__(self, up):
+        self.up = up
+        self.sent = []
+    
+    def health_check(self):
+        if self.up:
+            return {'status': 'ok'}
+        return {'status': 'error', 'message': 'Connection refused'}
+    
+    def send_message(self, message, session_id=None, mode='general', idempotency_key=None):
+        self.sent.append(idempotency_key)
+        return {'response': 'Reply', 'session_id': session_id or 'new-session'}
+
+
+class DrainTest(unittest.TestCase):
+    
+    def make_outbox(self, api):
+        storage = MemoryStorage()
+        outbox = OutboxService(api, storage)
+        for text in ('first', 'second'):
+            outbox.enqueue(outbox.create(text, None, 'general', group='chat'))
+        return outbox, storage
+    
+    def test_server_down_sends_nothing(self):
+        api = FakeAPI(up=False)
+        outbox, storage = self.make_outbox(api)
+        
+        self.assertEqual(outbox.drain(), 0)
+        self.assertEqual(api.sent, [])
+        self.assertEqual(len(outbox.pending()), 2)
+        self.assertEqual(len(storage.outbox), 2)
+    
+    def test_unreachable_backend_sends_nothing(self):
+        # Nothing listens on port 9 (discard) locally, so every request fails
+        api = APIService('http://127.0.0.1:9')
+        sent = []
+        api.send_message = lambda *args, **kwargs: sent.append(args) or {}
+        outbox, _ = self.make_outbox(api)
+        
+        self.assertEqual(outbox.drain(), 0)
+        self.assertEqual(sent, [])
+        self.assertEqual(len(outbox.pending()), 2)
+    
+    def test_server_up_sends_in_order(self):
+        api = FakeAPI(up=True)
+        outbox, storage = self.make_outbox(api)
+        keys = [item['id'] for item in outbox.pending()]
+        
+        self.assertEqual(outbox.drain(), 2)
+        self.assertEqual(api.sent, keys)
+        self.assertFalse(outbox.has_pending())
+        self.assertEqual(storage.outbox, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
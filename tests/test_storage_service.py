@@ -0,0 +1,118 @@
+"""
+Tests for StorageService's write queue
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.sqlite_storage_service import SQLiteStorageService
+from services.storage_service import StorageService
+
+
+class WriteQueueTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.storage_dir = tempfile.mkdtemp()
+        os.environ['JARVIS_STORAGE_DIR'] = self.storage_dir
+        self.storage = StorageService()
+    
+    def tearDown(self):
+        os.environ.pop('JARVIS_STORAGE_DIR', None)
+        shutil.rmtree(self.storage_dir, ignore_errors=True)
+    
+    def save_history_cache(self, session_id, messages):
+        """What ChatScreen._save_history_cache queues"""
+        messages = list(messages)
+        self.storage.defer(
+            lambda: self.storage.save_messages(session_id, messages),
+            key=f'history:{session_id}'
+        )
+    
+    def append(self, session_id, message):
+        self.storage.defer(lambda: self.storage.append_message(session_id, message))
+    
+    def contents(self, session_id):
+        return [m['content'] for m in self.storage.load_messages(session_id)]
+    
+    def test_replaced_snapshot_runs_after_later_appends(self):
+        first = {'role': 'user', 'content': 'first'}
+        second = {'role': 'assistant', 'content': 'second'}
+        
+        self.save_history_cache('s', [first])
+        self.append('s', second)
+        self.save_history_cache('s', [first, second])
+        self.storage.flush()
+        
+        self.assertEqual(self.contents('s'), ['first', 'second'])
+    
+    def test_interleaved_snapshots_and_appends(self):
+        messages = []
+        for i in range(5):
+            message = {'role': 'user', 'content': str(i)}
+            messages.append(message)
+            self.append('s', message)
+            self.save_history_cache('s', messages)
+        self.append('s', {'role': 'assistant', 'content': 'last'})
+        self.storage.flush()
+        
+        self.assertEqual(self.contents('s'), ['0', '1', '2', '3', '4', 'last'])
+    
+    def test_flush_writes_what_deferred_operations_queue(self):
+        message = {'role': 'user', 'content': 'hello'}
+        session = {'session_id': 's', 'preview': 'hello'}
+        
+        def save():
+            self.storage.append_message('s', message)
+            self.storage.save_session(session)
+        
+        self.storage.defer(save)
+        self.storage.flush()
+        
+        self.assertFalse(self.storage._pending)
+        for filename in ('messages_s.json', 'sessions.json'):
+            self.assertTrue(os.path.exists(os.path.join(self.storage_dir, filename)))
+    
+    def test_latest_file_write_wins(self):
+        self.storage.save_settings({'theme': 'light'})
+        self.storage.save_settings({'theme': 'dark'})
+        self.storage.flush()
+        
+        self.assertEqual(self.storage.load_settings()['theme'], 'dark')
+
+
+class SQLiteClearTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.storage_dir = tempfile.mkdtemp()
+        os.environ['JARVIS_STORAGE_DIR'] = self.storage_dir
+        self.storage = SQLiteStorageService()
+    
+    def tearDown(self):
+        os.environ.pop('JARVIS_STORAGE_DIR', None)
+        shutil.rmtree(self.storage_dir, ignore_errors=True)
+    
+    def test_clear_all_waits_for_running_operation(self):
+        started = threading.Event()
+        
+        def save():
+            started.set()
+            time.sleep(0.1)
+            self.storage.save_messages('s', [{'role': 'user', 'content': 'late'}])
+        
+        self.storage.defer(save)
+        started.wait(5)
+        self.storage.clear_all()
+        self.storage.flush()
+        
+        self.assertEqual(self.storage.load_messages('s'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()